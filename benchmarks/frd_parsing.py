@@ -0,0 +1,69 @@
+'''Compares a line by line parse of a .frd STRESS block with FrdReader on
+synthetic files, and times the export to an FrdArchive.
+
+    PYTHONPATH=. python benchmarks/frd_parsing.py [n_nodes ...]
+'''
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+from yapfc.frdReader import FrdReader, FrdArchive
+
+STRESS: list[str] = ["SXX", "SYY", "SZZ", "SXY", "SYZ", "SZX"]
+
+
+def writeSyntheticFrd(fpath: str, nNodes: int, nSets: int = 3) -> None:
+    rng = np.random.default_rng(0)
+    with open(fpath, "w") as f:
+        f.write("    1C\n")
+        f.write(f"    2C{nNodes:30d}{'':37s}1\n")
+        for i, point in enumerate(rng.random((nNodes, 3))):
+            f.write(f" -1{i + 1:10d}" + "".join(f'{v:12.5E}' for v in point) + "\n")
+        f.write(" -3\n")
+        for k in range(nSets):
+            f.write(f"    1PSTEP{k + 1:25d}{1:12d}{k + 1:12d}\n")
+            f.write(f"  100CL  101{(k + 1) * 0.5:12.5E}{nNodes:12d}                     0{k + 1:5d}           1\n")
+            f.write(f" -4  STRESS  {len(STRESS):5d}    1\n")
+            for j, component in enumerate(STRESS):
+                f.write(f" -5  {component:8s}    1    4{j + 1:5d}    0\n")
+            for i, values in enumerate(rng.normal(0.0, 1e8, (nNodes, len(STRESS)))):
+                f.write(f" -1{i + 1:10d}" + "".join(f'{v:12.5E}' for v in values) + "\n")
+            f.write(" -3\n")
+        f.write("9999\n")
+
+def lineParse(fpath: str, setIndex: int) -> np.ndarray:
+    values: list[list[float]] = []
+    current = 0
+    with open(fpath, "r") as f:
+        for line in f:
+            if line.startswith("    1PSTEP"):
+                current = int(line.split()[1])
+            elif current == setIndex and line.startswith(" -1"):
+                values.append([float(line[13 + 12 * i:25 + 12 * i]) for i in range(len(STRESS))])
+    return np.array(values)
+
+def timeit(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sizes = [int(i) for i in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    print(f'{"nodes":>10} {"lines [s]":>10} {"index [s]":>10} {"block [s]":>10} {"speedup":>8} '
+          f'{"export [s]":>11} {"archive [s]":>12} {"size ratio":>11}')
+    with tempfile.TemporaryDirectory() as directory:
+        for n in sizes:
+            fpath = os.path.join(directory, f'{n}.frd')
+            writeSyntheticFrd(fpath, n)
+            lines = timeit(lineParse, fpath, 3)
+            reader = FrdReader(fpath)
+            index = timeit(reader.getBlocks)
+            block = timeit(reader.read, 3, "STRESS")
+            archivePath = os.path.join(directory, f'{n}_archive')
+            export = timeit(reader.export, archivePath)
+            archive = timeit(lambda: np.asarray(FrdArchive(archivePath).read(3, "STRESS")[1]).sum())
+            archiveSize = sum(i.stat().st_size for i in os.scandir(archivePath))
+            print(f'{n:>10} {lines:>10.3f} {index:>10.4f} {block:>10.4f} {lines / block:>8.1f} '
+                  f'{export:>11.3f} {archive:>12.4f} {os.path.getsize(fpath) / archiveSize:>11.1f}')
@@ -0,0 +1,61 @@
+'''Compares the per-cell VTK conversion loop that Mesh._loadMesh used to run
+with gridFromMeshData on synthetic meshes.
+
+    PYTHONPATH=. python benchmarks/mesh_conversion.py [n_cells ...]
+'''
+import sys
+import time
+import numpy as np
+import vtk
+from yapfc.meshData import MeshData, CellBlock
+from yapfc.mesh import gridFromMeshData
+
+
+def syntheticTetMesh(nCells: int) -> MeshData:
+    rng = np.random.default_rng(0)
+    nPoints = max(nCells // 5, 4)
+    points = rng.random((nPoints, 3))
+    connectivity = rng.integers(0, nPoints, size=(nCells, 4), dtype=np.int64)
+    return MeshData(points, [CellBlock("tetra", connectivity)])
+
+def syntheticMixedMesh(nCells: int) -> MeshData:
+    rng = np.random.default_rng(0)
+    nPoints = max(nCells, 20)
+    points = rng.random((nPoints, 3))
+    blocks = [CellBlock(cellType, rng.integers(0, nPoints, size=(nCells // 4, nNodes), dtype=np.int64))
+              for cellType, nNodes in (("tetra10", 10), ("hexahedron20", 20), ("wedge15", 15), ("quad", 4))]
+    return MeshData(points, blocks)
+
+def loopConversion(data: MeshData) -> vtk.vtkUnstructuredGrid:
+    vtk_points = vtk.vtkPoints()
+    for i in data.points:
+        vtk_points.InsertNextPoint(i)
+
+    cells = data.blocks[0].connectivity
+    vtk_cells = vtk.vtkCellArray()
+    for cell in cells:
+        tetra = vtk.vtkTetra()
+        for i in range(4):
+            tetra.GetPointIds().SetId(i, cell[i])
+        vtk_cells.InsertNextCell(tetra)
+
+    grid = vtk.vtkUnstructuredGrid()
+    grid.SetPoints(vtk_points)
+    grid.SetCells(vtk.VTK_TETRA, vtk_cells)
+    return grid
+
+def timeit(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sizes = [int(i) for i in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    print(f'{"cells":>10} {"loop [s]":>10} {"bulk [s]":>10} {"speedup":>8} {"mixed bulk [s]":>15}')
+    for n in sizes:
+        tets = syntheticTetMesh(n)
+        loop = timeit(loopConversion, tets)
+        bulk = timeit(gridFromMeshData, tets)
+        mixed = timeit(gridFromMeshData, syntheticMixedMesh(n))
+        print(f'{n:>10} {loop:>10.3f} {bulk:>10.4f} {loop / bulk:>8.0f} {mixed:>15.4f}')
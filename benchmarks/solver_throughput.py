@@ -0,0 +1,73 @@
+'''Measures solver throughput in jobs/hour for different ways of splitting the
+core budget: 1xN runs the jobs one after another with N threads each, Nx1
+runs N single threaded jobs at the same time (and the layouts in between).
+
+    PYTHONPATH=. python benchmarks/solver_throughput.py <ccx> <deck.inp> [jobs] [--pin]
+'''
+import os
+import sys
+import time
+import shutil
+import tempfile
+import itertools
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from yapfc.coreBudget import CoreBudget
+from yapfc.runner import CCX_ARGS
+
+
+def layouts(cores: int) -> list[int]:
+    '''Numbers of concurrent jobs to try, from 1xN to Nx1.'''
+    result = []
+    jobs = 1
+    while jobs <= cores:
+        result.append(jobs)
+        jobs *= 2
+    if result[-1] != cores:
+        result.append(cores)
+    return result
+
+def runJob(ccx: str, deck: str, budget: CoreBudget, starting: int, workDir: str) -> float:
+    '''Runs deck once in workDir on the cores the budget gives it, starting
+    is the number of jobs that did not start yet.'''
+    name = os.path.splitext(os.path.basename(deck))[0]
+    shutil.copy(deck, os.path.join(workDir, f'{name}.inp'))
+    cpus = budget.acquire(starting, block=True)
+    try:
+        start = time.perf_counter()
+        process = subprocess.Popen([ccx, name, *CCX_ARGS], cwd=workDir, env={**os.environ, **budget.getEnvironment(cpus)},
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        budget.pin(process.pid, cpus)
+        if process.wait() != 0:
+            raise RuntimeError(f'ccx failed with exit code {process.returncode} in {workDir}')
+        return time.perf_counter() - start
+    finally:
+        budget.release(cpus)
+
+def measure(ccx: str, deck: str, concurrent: int, nJobs: int, pin: bool) -> float:
+    budget = CoreBudget(maxJobs=concurrent, pin=pin)
+    root = tempfile.mkdtemp(prefix="yapfc_throughput_")
+    try:
+        started = itertools.count()
+        def work(i: int) -> float:
+            workDir = os.path.join(root, str(i))
+            os.makedirs(workDir)
+            return runJob(ccx, deck, budget, nJobs - next(started), workDir)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=budget.getMaxJobs()) as pool:
+            list(pool.map(work, range(nJobs)))
+        return nJobs / (time.perf_counter() - start) * 3600
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    args = [i for i in sys.argv[1:] if i != "--pin"]
+    if len(args) < 2:
+        sys.exit(__doc__)
+    ccx, deck = args[0], os.path.abspath(args[1])
+    cores = CoreBudget().getCores()
+    nJobs = int(args[2]) if len(args) > 2 else cores
+    print(f'{"layout":>10} {"jobs/hour":>12}')
+    for concurrent in layouts(cores):
+        throughput = measure(ccx, deck, concurrent, nJobs, "--pin" in sys.argv)
+        print(f'{concurrent:>4}x{cores // concurrent:<5} {throughput:12.1f}')
@@ -0,0 +1,60 @@
+import os
+import numpy as np
+import pytest
+from yapfc.frdReader import FrdReader, FrdArchive
+
+COMPONENTS = ["D1", "D2", "D3"]
+
+
+def writeFrd(fpath: str, points: np.ndarray, sets: list[np.ndarray]) -> None:
+    with open(fpath, "w") as f:
+        f.write("    1C\n")
+        f.write(f"    2C{len(points):30d}{'':37s}1\n")
+        for i, point in enumerate(points):
+            f.write(f" -1{i + 1:10d}" + "".join(f'{v:12.5E}' for v in point) + "\n")
+        f.write(" -3\n")
+        for k, values in enumerate(sets):
+            f.write(f"    1PSTEP{k + 1:25d}{1:12d}{k + 1:12d}\n")
+            f.write(f"  100CL  101{(k + 1) * 0.5:12.5E}{len(values):12d}                     0{k + 1:5d}           1\n")
+            f.write(f" -4  DISP    {len(COMPONENTS):5d}    1\n")
+            for j, component in enumerate(COMPONENTS):
+                f.write(f" -5  {component:8s}    1    2{j + 1:5d}    0\n")
+            for i, row in enumerate(values):
+                f.write(f" -1{i + 1:10d}" + "".join(f'{v:12.5E}' for v in row) + "\n")
+            f.write(" -3\n")
+        f.write("9999\n")
+
+@pytest.fixture
+def frd(tmp_path):
+    rng = np.random.default_rng(0)
+    points = rng.random((7, 3))
+    sets = [rng.normal(0.0, 1e3, (7, 3)) for _ in range(2)]
+    fpath = os.path.join(tmp_path, "job.frd")
+    writeFrd(fpath, points, sets)
+    return fpath, points, sets
+
+def test_read_blocks(frd):
+    fpath, points, sets = frd
+    reader = FrdReader(fpath, chunkRecords=3)
+    assert reader.getSets() == [1, 2]
+    ids, coords = reader.readNodes()
+    assert ids.tolist() == list(range(1, 8))
+    assert np.allclose(coords, points, rtol=1e-5)
+    for setIndex, values in enumerate(sets, start=1):
+        ids, read = reader.read(setIndex, "DISP")
+        assert ids.tolist() == list(range(1, 8))
+        assert np.allclose(read, values, rtol=1e-5)
+    with pytest.raises(KeyError):
+        reader.read(3, "DISP")
+
+def test_archive_round_trip(frd, tmp_path):
+    fpath, points, sets = frd
+    archive = FrdArchive(FrdReader(fpath).export(os.path.join(tmp_path, "archive")))
+    assert archive.isCurrent()
+    assert archive.getSets() == [1, 2]
+    ids, values = archive.read(2, "DISP")
+    assert ids.tolist() == list(range(1, 8))
+    assert np.allclose(values, sets[1], rtol=1e-5)
+    with open(fpath, "a") as f:
+        f.write("\n")
+    assert not archive.isCurrent()
@@ -0,0 +1,63 @@
+import os
+import numpy as np
+import pytest
+from yapfc.inpReader import readInp
+
+DECK = '''*HEADING
+** two tetrahedra sharing a face
+*NODE, NSET=NALL
+1, 0.0, 0.0, 0.0
+2, 1.0, 0.0, 0.0
+3, 0.0, 1.0, 0.0
+4, 0.0, 0.0, 1.0
+5, 1.0, 1.0, 1.0
+*ELEMENT, TYPE=C3D4, ELSET=EALL
+10, 1, 2, 3, 4
+11, 2, 3, 4, 5
+*NSET, NSET=BASE
+1, 2, 3
+*ELSET, ELSET=FIRST, GENERATE
+10, 10, 1
+'''
+
+
+def writeFile(fpath: str, text: str) -> str:
+    with open(fpath, "w") as f:
+        f.write(text)
+    return fpath
+
+def test_read_deck(tmp_path):
+    data = readInp(writeFile(os.path.join(tmp_path, "deck.inp"), DECK))
+    assert data.getNumberOfPoints() == 5 and data.getNumberOfCells() == 2
+    assert data.blocks[0].ccxType == "C3D4"
+    assert data.blocks[0].connectivity.tolist() == [[0, 1, 2, 3], [1, 2, 3, 4]]
+    assert data.elementIds.tolist() == [10, 11]
+    assert data.nodeSets["BASE"].tolist() == [0, 1, 2]
+    assert data.elementSets["FIRST"].tolist() == [0]
+    assert data.elementSets["EALL"].tolist() == [0, 1]
+
+@pytest.mark.parametrize("chunkSize", [16, 64, 1 << 22])
+def test_omitted_coordinates_are_zero(tmp_path, chunkSize):
+    nodes = "*NODE\n1, 1.0, 2.0, 3.0\n12, 1.0, 2.0\n13, 4.0\n\n14, 5.0, 6.0, 7.0\n15\n"
+    data = readInp(writeFile(os.path.join(tmp_path, "nodes.inp"), nodes), chunkSize)
+    assert data.nodeIds.tolist() == [1, 12, 13, 14, 15]
+    assert np.array_equal(data.points, [[1, 2, 3], [1, 2, 0], [4, 0, 0], [5, 6, 7], [0, 0, 0]])
+
+def test_two_dimensional_nodes(tmp_path):
+    data = readInp(writeFile(os.path.join(tmp_path, "nodes.inp"), "*NODE\n1, 1.0, 2.0\n2, 3.0, 4.0\n"))
+    assert np.array_equal(data.points, [[1, 2, 0], [3, 4, 0]])
+
+def test_include_and_continued_records(tmp_path):
+    writeFile(os.path.join(tmp_path, "nodes.inp"), DECK.split("*ELEMENT")[0])
+    writeFile(os.path.join(tmp_path, "deck.inp"), "*INCLUDE, INPUT=nodes.inp\n*ELEMENT, TYPE=C3D4\n1, 1, 2,\n3, 4\n")
+    data = readInp(os.path.join(tmp_path, "deck.inp"), 16)
+    assert data.getNumberOfPoints() == 5
+    assert data.blocks[0].connectivity.tolist() == [[0, 1, 2, 3]]
+
+def test_duplicate_node_labels(tmp_path):
+    with pytest.raises(ValueError, match="Duplicate node labels"):
+        readInp(writeFile(os.path.join(tmp_path, "nodes.inp"), "*NODE\n1, 0, 0, 0\n1, 1, 0, 0\n"))
+
+def test_undefined_node_label(tmp_path):
+    with pytest.raises(ValueError, match="Undefined node labels"):
+        readInp(writeFile(os.path.join(tmp_path, "deck.inp"), "*NODE\n1, 0, 0, 0\n*ELEMENT, TYPE=C3D4\n1, 1, 2, 3, 4\n"))
@@ -0,0 +1,53 @@
+import os
+import vtk
+import numpy as np
+import pytest
+from yapfc.mesh import Mesh
+
+TESTING_DATA = os.path.join(os.path.dirname(__file__), "..", "testing_data")
+
+# Unit cube corners in VTK/CalculiX order and the mid-edge nodes of a 20 node hexahedron
+CUBE = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]], float)
+HEX_EDGES = [(0, 1), (1, 2), (2, 3), (3, 0), (4, 5), (5, 6), (6, 7), (7, 4), (0, 4), (1, 5), (2, 6), (3, 7)]
+TET_EDGES = [(0, 1), (1, 2), (2, 0), (0, 3), (1, 3), (2, 3)]
+
+
+def writeDeck(fpath: str, points: np.ndarray, elementType: str, elements: list[list[int]]) -> None:
+    with open(fpath, "w") as f:
+        f.write("*NODE\n")
+        f.writelines(f'{i + 1}, {x}, {y}, {z}\n' for i, (x, y, z) in enumerate(points))
+        f.write(f'*ELEMENT, TYPE={elementType}\n')
+        for label, nodes in enumerate(elements, start=1):
+            values = [label, *(i + 1 for i in nodes)]
+            f.write(",\n".join(", ".join(map(str, values[i:i + 16])) for i in range(0, len(values), 16)) + "\n")
+
+def assertSurfaceIds(mesh: Mesh) -> None:
+    '''Every surface cell maps to a cell of the grid that owns all its points.'''
+    surface = mesh.getSurface()
+    cells = mesh.getOriginalCellIds(np.arange(surface.GetNumberOfCells()))
+    assert len(cells) and cells.min() >= 0 and cells.max() < mesh.getData().getNumberOfCells()
+    gridPoints = vtk.vtkIdList()
+    surfacePoints = vtk.vtkIdList()
+    for surfaceCell, cell in enumerate(cells):
+        mesh.getMesh().GetCellPoints(int(cell), gridPoints)
+        surface.GetCellPoints(surfaceCell, surfacePoints)
+        owned = {gridPoints.GetId(i) for i in range(gridPoints.GetNumberOfIds())}
+        points = mesh.getOriginalPointIds(np.array([surfacePoints.GetId(i) for i in range(surfacePoints.GetNumberOfIds())]))
+        assert set(points.tolist()) <= owned
+    assert np.allclose(mesh.getData().points[mesh.getOriginalPointIds(np.arange(surface.GetNumberOfPoints()))],
+                       np.array([surface.GetPoint(i) for i in range(surface.GetNumberOfPoints())]))
+
+
+def test_quadratic_wedges_load() -> None:
+    mesh = Mesh(os.path.join(TESTING_DATA, "example.inp"))
+    assertSurfaceIds(mesh)
+
+@pytest.mark.parametrize("elementType, corners, edges", [("C3D10", CUBE[[0, 1, 3, 4]], TET_EDGES),
+                                                         ("C3D20", CUBE, HEX_EDGES)])
+def test_single_quadratic_cell_loads(tmp_path, elementType: str, corners: np.ndarray, edges: list) -> None:
+    points = np.vstack([corners, [(corners[a] + corners[b]) / 2 for a, b in edges]])
+    fpath = str(tmp_path / f'{elementType}.inp')
+    writeDeck(fpath, points, elementType, [list(range(len(points)))])
+    mesh = Mesh(fpath)
+    assert np.array_equal(np.unique(mesh.getOriginalCellIds(np.arange(mesh.getSurface().GetNumberOfCells()))), [0])
+    assertSurfaceIds(mesh)
@@ -0,0 +1,50 @@
+import os
+import numpy as np
+from yapfc.meshCache import MeshCache, GMSH_CACHE_DIR, loadMeshData
+from yapfc.inpReader import includedFiles
+
+NODES = "*NODE\n1, 0, 0, 0\n2, 1, 0, 0\n3, 0, 1, 0\n4, 0, 0, {z}\n"
+DECK = "*INCLUDE, INPUT=nodes.inp\n*ELEMENT, TYPE=C3D4\n1, 1, 2, 3, 4\n"
+
+
+def writeFile(fpath: str, text: str, mtimeNs: int) -> None:
+    with open(fpath, "w") as f:
+        f.write(text)
+    os.utime(fpath, ns=(mtimeNs, mtimeNs))
+
+def test_included_files(tmp_path):
+    writeFile(os.path.join(tmp_path, "nodes.inp"), NODES.format(z=1), 10**18)
+    writeFile(os.path.join(tmp_path, "deck.inp"), "** mesh\n*include,input=nodes.inp\n" + DECK, 10**18)
+    assert includedFiles(os.path.join(tmp_path, "deck.inp")) == [os.path.join(tmp_path, "nodes.inp")]
+
+def test_edited_include_misses_the_cache(tmp_path):
+    cache = MeshCache(os.path.join(tmp_path, "cache"))
+    deck = os.path.join(tmp_path, "deck.inp")
+    writeFile(os.path.join(tmp_path, "nodes.inp"), NODES.format(z=1), 10**18)
+    writeFile(deck, DECK, 10**18)
+    assert loadMeshData(deck, cache).points[3, 2] == 1.0
+    key = cache.getKey(deck)
+    # Same size, only the included file changes
+    writeFile(os.path.join(tmp_path, "nodes.inp"), NODES.format(z=2), 10**18 + 1)
+    assert cache.getKey(deck) != key
+    assert np.allclose(loadMeshData(deck, cache).points[3], [0, 0, 2])
+
+def test_missing_source_has_no_key(tmp_path):
+    cache = MeshCache(os.path.join(tmp_path, "cache"))
+    assert cache.getKey(os.path.join(tmp_path, "missing.inp")) is None
+    writeFile(os.path.join(tmp_path, "deck.inp"), DECK, 10**18)
+    assert cache.getKey(os.path.join(tmp_path, "deck.inp")) is None
+    assert cache.loadArrays(os.path.join(tmp_path, "deck.inp")) is None
+
+def test_eviction_keeps_user_files(tmp_path):
+    cache = MeshCache(str(tmp_path), 0)
+    gmsh = os.path.join(tmp_path, GMSH_CACHE_DIR)
+    os.makedirs(gmsh)
+    entries = [os.path.join(tmp_path, f'{"a" * 40}.npz'), os.path.join(gmsh, f'{"b" * 40}.msh')]
+    userFiles = [os.path.join(tmp_path, "part.msh"), os.path.join(tmp_path, "part.npz"),
+                 os.path.join(tmp_path, f'{"c" * 40}.msh'), os.path.join(gmsh, "part.msh")]
+    for fpath in entries + userFiles:
+        writeFile(fpath, "data", 10**18)
+    cache.evict()
+    assert not any(os.path.exists(i) for i in entries)
+    assert all(os.path.exists(i) for i in userFiles)
@@ -0,0 +1,39 @@
+import os
+from yapfc.deck import writeIncrementalDeck, getSectionsDir
+from yapfc.project import ProjectNode
+from yapfc.monitor import JobMonitor, stepPeriods
+
+STEPS = '''*STEP
+*STATIC
+0.1, 2.5
+*END STEP
+*STEP, NLGEOM
+** the period of the second step is the default
+*Static
+*END STEP
+*STEP
+*DYNAMIC
+0.01, 0.5'''
+
+
+def test_step_periods_of_incremental_deck(tmp_path):
+    model = ProjectNode("Label", "Model", children=[ProjectNode("StepSubWriter", "Steps", STEPS)])
+    deck = os.path.join(tmp_path, "Job.inp")
+    writeIncrementalDeck([model, *model.getChildren()], deck)
+    assert "*STATIC" not in open(deck).read().upper()
+    assert os.listdir(getSectionsDir(deck))
+    assert stepPeriods(deck) == [2.5, 1.0, 0.5]
+
+def test_step_fraction_uses_period(tmp_path):
+    model = ProjectNode("Label", "Model", children=[ProjectNode("StepSubWriter", "Steps", STEPS)])
+    jobPath = os.path.join(tmp_path, "Job")
+    writeIncrementalDeck([model, *model.getChildren()], f'{jobPath}.inp')
+    with open(f'{jobPath}.sta', "w") as f:
+        f.write(" SUMMARY OF JOB INFORMATION\n STEP      INC     ATT  ITRS     TOT TIME     STEP TIME         INC TIME\n")
+        f.write("   1       3       1     2  0.1250000E+01  0.1250000E+01  0.5000000E+00\n")
+    monitor = JobMonitor(jobPath)
+    monitor.poll()
+    assert abs(monitor.getStepFraction() - 0.5) < 1e-9
+
+def test_missing_deck_has_no_periods(tmp_path):
+    assert stepPeriods(os.path.join(tmp_path, "missing.inp")) == []
@@ -0,0 +1,145 @@
+'''Headless mode: assembles decks from saved projects or meshes and optionally
+solves them, without importing Qt or VTK.
+
+    python -m yapfc [--solve] [-o DIR] PROJECT.yapfc | MESH | DIRECTORY ...
+'''
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from yapfc.deck import writeDeck, iterAnalysisComponents
+from yapfc.project import PROJECT_EXTENSION, loadProject, iterAnalyses
+from yapfc.coreBudget import CoreBudget
+from yapfc.resultCache import ResultCache, DEFAULT_RESULT_CACHE_DIR, DEFAULT_RESULT_CACHE_SIZE_MB
+from yapfc.runner import CCX_ARGS, solver_options
+
+OPTIONS_FILE: str = "options.json"
+
+
+def readOptions(fpath: str = OPTIONS_FILE) -> dict:
+    '''Same options.json as the GUI, read without the Qt dialogs module.'''
+    try:
+        with open(fpath, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def collectInputs(paths: list[str]) -> list[str]:
+    '''Projects and meshes given directly, and every project of a directory.'''
+    inputs: list[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            inputs += sorted(os.path.join(path, name) for name in os.listdir(path)
+                             if name.endswith(PROJECT_EXTENSION))
+        else:
+            inputs.append(path)
+    return inputs
+
+def buildDecks(fpath: str, outputDir: str | None, cache) -> list[str]:
+    '''Writes one deck per Analysis of a project (named after it, the model
+    followed by the analysis writer), or the
+    mesh of a mesh file as <name>.inp. With an outputDir every input gets its
+    own subdirectory, so that equally named analyses of different projects
+    do not overwrite each other. Returns the deck paths.'''
+    name = os.path.splitext(os.path.basename(fpath))[0]
+    outputDir = os.path.join(outputDir, name) if outputDir else os.path.dirname(os.path.abspath(fpath))
+    os.makedirs(outputDir, exist_ok=True)
+    if not fpath.endswith(PROJECT_EXTENSION):
+        from yapfc.meshCache import loadMeshData
+        from yapfc.inpWriter import writeMeshInp
+        deck = os.path.join(outputDir, f'{name}.inp')
+        writeMeshInp(loadMeshData(fpath, cache), deck)
+        print(f'{deck}: mesh written')
+        return [deck]
+
+    model, analyses = loadProject(fpath, cache)
+    decks: list[str] = []
+    for analysis in list(iterAnalyses(analyses)) or [None]:
+        deck = os.path.join(outputDir, f'{analysis.text() if analysis is not None else name}.inp')
+        print(writeDeck(iterAnalysisComponents(model, analysis), deck))
+        decks.append(deck)
+    return decks
+
+def solve(deck: str, ccxPath: str, budget: CoreBudget, cpus: list[int],
+          results: ResultCache | None, force: bool) -> tuple[str, int, float]:
+    '''Runs ccx on deck in its directory with the thread settings of the
+    cpus it got from the budget. Output goes to <name>.log next to the deck.'''
+    workDir = os.path.dirname(os.path.abspath(deck))
+    name = os.path.splitext(os.path.basename(deck))[0]
+    jobPath = os.path.join(workDir, name)
+    key = results.getKey(deck, solver_options(ccxPath)) if results is not None else None
+    if key and not force and results.restore(key, jobPath):
+        return "cached", 0, 0.0
+    start = time.perf_counter()
+    startedAt = time.time()
+    with open(f'{jobPath}.log', "wb") as log:
+        process = subprocess.Popen([ccxPath, name, *CCX_ARGS], cwd=workDir, stdout=log, stderr=subprocess.STDOUT,
+                                   env={**os.environ, **budget.getEnvironment(cpus)})
+        budget.pin(process.pid, cpus)
+        exitCode = process.wait()
+    if exitCode == 0 and key:
+        results.store(key, jobPath, startedAt)
+    return "finished" if exitCode == 0 else "failed", exitCode, time.perf_counter() - start
+
+def main(argv: list[str] | None = None) -> int:
+    start = time.perf_counter()
+    parser = argparse.ArgumentParser(prog="python -m yapfc", description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="projects (*.yapfc), mesh files or directories of projects")
+    parser.add_argument("-o", "--output", help="decks go to OUTPUT/<input name>/, next to each input by default")
+    parser.add_argument("--solve", action="store_true", help="run ccx on every deck")
+    parser.add_argument("--ccx", help="ccx executable, ccx_path of options.json by default")
+    parser.add_argument("--jobs", type=int, help="concurrent solver jobs, max_jobs of options.json by default")
+    parser.add_argument("--cores", type=int, help="cores shared by the jobs, all by default")
+    parser.add_argument("--pin", action="store_true", help="pin every job to its cores")
+    parser.add_argument("--force", action="store_true", help="solve even when cached results exist")
+    parser.add_argument("--no-cache", action="store_true", help="neither read nor write the mesh and result caches")
+    args = parser.parse_args(argv)
+    options = readOptions()
+
+    meshCache = None
+    if not args.no_cache:
+        from yapfc.meshCache import MeshCache, DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE_MB
+        meshCache = MeshCache(options.get("mesh_cache_dir") or DEFAULT_CACHE_DIR,
+                              int(float(options.get("mesh_cache_size_mb") or DEFAULT_CACHE_SIZE_MB) * 2**20))
+    decks: list[str] = []
+    failed = 0
+    for fpath in collectInputs(args.inputs):
+        try:
+            decks += buildDecks(fpath, args.output, meshCache)
+        except (OSError, ValueError, KeyError) as e:
+            print(f'{fpath}: {e}', file=sys.stderr)
+            failed += 1
+    print(f'{len(decks)} decks assembled in {time.perf_counter() - start:.2f} s')
+
+    if args.solve and decks:
+        ccxPath = args.ccx or options.get("ccx_path") or "ccx"
+        budget = CoreBudget(args.cores or int(options.get("cores") or 0),
+                            args.jobs or int(options.get("max_jobs") or 1),
+                            args.pin or bool(options.get("pin_cpus")))
+        results = None if args.no_cache else ResultCache(
+            options.get("result_cache_dir") or DEFAULT_RESULT_CACHE_DIR,
+            int(float(options.get("result_cache_size_mb") or DEFAULT_RESULT_CACHE_SIZE_MB) * 2**20))
+
+        started = itertools.count()
+
+        def run(deck: str) -> tuple[str, int, float]:
+            # The decks that did not start yet share the free cores
+            cpus = budget.acquire(len(decks) - next(started), block=True)
+            try:
+                return solve(deck, ccxPath, budget, cpus, results, args.force)
+            finally:
+                budget.release(cpus)
+
+        with ThreadPoolExecutor(max_workers=budget.getMaxJobs()) as pool:
+            for deck, (state, exitCode, seconds) in zip(decks, pool.map(run, decks)):
+                print(f'{deck}: {state} with exit code {exitCode} after {seconds:.1f} s')
+                failed += state == "failed"
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import vtk
+import numpy as np
+from matplotlib.path import Path
+from vtkmodules.util.numpy_support import vtk_to_numpy, numpy_to_vtk
+from yapfc.mesh import Mesh
+
+# Area selection modes of the viewer
+BOX: str = "box"
+LASSO: str = "lasso"
+# Lasso vertices closer than this many pixels to the previous one are dropped
+LASSO_SPACING: float = 3.0
+# Display coordinates are projected in chunks, bounds the (n, 4) temporaries
+PROJECT_CHUNK: int = 1 << 20
+
+
+def displayCoordinates(renderer: vtk.vtkRenderer, points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    '''(n, 2) display (pixel) coordinates of (n, 3) world points and their
+    normalized depth, inside the view volume for -1 <= depth <= 1. Same
+    result as vtkCoordinate, for all points in a few numpy passes.'''
+    camera = renderer.GetActiveCamera()
+    vtkMatrix = camera.GetCompositeProjectionTransformMatrix(renderer.GetTiledAspectRatio(), -1, 1)
+    matrix = np.array([[vtkMatrix.GetElement(i, j) for j in range(4)] for i in range(4)])
+    width, height = renderer.GetRenderWindow().GetSize()
+    x0, y0, x1, y1 = renderer.GetViewport()
+    display = np.empty((len(points), 2))
+    depth = np.empty(len(points))
+    for start in range(0, len(points), PROJECT_CHUNK):
+        chunk = np.asarray(points[start:start + PROJECT_CHUNK], dtype=np.float64)
+        homogeneous = chunk @ matrix[:, :3].T + matrix[:, 3]
+        w = homogeneous[:, 3]
+        w[w == 0] = np.finfo(np.float64).tiny
+        ndc = homogeneous[:, :3] / w[:, None]
+        display[start:start + len(chunk), 0] = ((ndc[:, 0] + 1) / 2 * (x1 - x0) + x0) * width
+        display[start:start + len(chunk), 1] = ((ndc[:, 1] + 1) / 2 * (y1 - y0) + y0) * height
+        # Points behind the camera flip through w < 0, keep them out of the view volume
+        depth[start:start + len(chunk)] = np.where(w > 0, ndc[:, 2], np.inf)
+    return display, depth
+
+def insideRegion(display: np.ndarray, depth: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    '''Boolean mask of the projected points inside a display polygon (a box is
+    its 4 corners) and inside the view volume. The polygon test only runs on
+    the points within its bounds.'''
+    low, high = polygon.min(axis=0), polygon.max(axis=0)
+    mask = ((display[:, 0] >= low[0]) & (display[:, 0] <= high[0]) & (display[:, 1] >= low[1])
+            & (display[:, 1] <= high[1]) & (np.abs(depth) <= 1))
+    if not _isBox(polygon):
+        candidates = np.flatnonzero(mask)
+        mask[candidates] = Path(polygon).contains_points(display[candidates])
+    return mask
+
+def boxPolygon(start: tuple[int, int], end: tuple[int, int]) -> np.ndarray:
+    (xa, ya), (xb, yb) = start, end
+    return np.array([[xa, ya], [xb, ya], [xb, yb], [xa, yb]], dtype=np.float64)
+
+def throughIds(renderer: vtk.vtkRenderer, mesh: Mesh, polygon: np.ndarray, points: bool) -> np.ndarray:
+    '''Nodes (or cells by their centers) of a mesh inside the region,
+    hidden ones included.'''
+    coords = mesh.getData().points if points else mesh.getCellCenters()
+    return np.flatnonzero(insideRegion(*displayCoordinates(renderer, coords), polygon))
+
+def visibleIds(renderer: vtk.vtkRenderer, mesh: Mesh, polygon: np.ndarray, points: bool) -> np.ndarray:
+    '''Nodes (or cells) of a mesh rendered inside the region. A
+    vtkHardwareSelector gives the surface cells rendered within the bounding
+    box of the region; visible nodes are the nodes of those cells. Nodes,
+    and the cells of a lasso, are then tested against the region itself.
+    The point pass of the selector is avoided, it costs several cell passes.'''
+    low, high = polygon.min(axis=0), polygon.max(axis=0)
+    selector = vtk.vtkHardwareSelector()
+    selector.SetRenderer(renderer)
+    selector.SetArea(int(low[0]), int(low[1]), int(np.ceil(high[0])), int(np.ceil(high[1])))
+    selector.SetFieldAssociation(vtk.vtkDataObject.FIELD_ASSOCIATION_CELLS)
+    selection = selector.Select()
+    surfaceIds: list[np.ndarray] = []
+    for i in range(selection.GetNumberOfNodes()):
+        node = selection.GetNode(i)
+        if node.GetProperties().Get(vtk.vtkSelectionNode.PROP()) is mesh.getActor() and node.GetSelectionList():
+            surfaceIds.append(vtk_to_numpy(node.GetSelectionList()).astype(np.int64))
+    if not surfaceIds:
+        return np.empty(0, np.int64)
+    cells = np.unique(np.concatenate(surfaceIds))
+    if points:
+        ids = np.unique(mesh.getOriginalPointIds(_surfacePointIds(mesh.getSurface(), cells)))
+        coords = mesh.getData().points[ids]
+    else:
+        ids = np.unique(mesh.getOriginalCellIds(cells))
+        if _isBox(polygon):
+            return ids
+        coords = mesh.getCellCenters()[ids]
+    return ids[insideRegion(*displayCoordinates(renderer, coords), polygon)]
+
+def _surfacePointIds(surface: vtk.vtkPolyData, cells: np.ndarray) -> np.ndarray:
+    '''Point ids of surface cells. Polygons are gathered from the cell array
+    in one pass, the few vertices, lines and strips one by one.'''
+    first = surface.GetNumberOfVerts() + surface.GetNumberOfLines()
+    polys = surface.GetPolys()
+    offsets = vtk_to_numpy(polys.GetOffsetsArray()).astype(np.int64)
+    connectivity = vtk_to_numpy(polys.GetConnectivityArray())
+    isPoly = (cells >= first) & (cells < first + polys.GetNumberOfCells())
+    polyIds = cells[isPoly] - first
+    starts, lengths = offsets[polyIds], offsets[polyIds + 1] - offsets[polyIds]
+    # Every start repeated over its length plus the position inside the cell
+    positions = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths) + np.arange(lengths.sum())
+    parts = [connectivity[positions].astype(np.int64)]
+    cellPoints = vtk.vtkIdList()
+    for cell in cells[~isPoly]:
+        surface.GetCellPoints(int(cell), cellPoints)
+        parts.append(np.array([cellPoints.GetId(i) for i in range(cellPoints.GetNumberOfIds())], dtype=np.int64))
+    return np.concatenate(parts)
+
+def _isBox(polygon: np.ndarray) -> bool:
+    '''True for the 4 corners of an axis aligned rectangle as boxPolygon gives.'''
+    return (len(polygon) == 4 and polygon[0, 1] == polygon[1, 1] and polygon[1, 0] == polygon[2, 0]
+            and polygon[2, 1] == polygon[3, 1] and polygon[3, 0] == polygon[0, 0])
+
+
+class RubberBand():
+    '''Outline of the box or lasso being drawn, as a 2D actor in display coordinates.'''
+    def __init__(self) -> None:
+        self._points: list[tuple[float, float]] = []
+        self._polyData = vtk.vtkPolyData()
+        mapper = vtk.vtkPolyDataMapper2D()
+        mapper.SetInputData(self._polyData)
+        self._actor = vtk.vtkActor2D()
+        self._actor.SetMapper(mapper)
+        self._actor.GetProperty().SetColor(1.0, 1.0, 0.0)
+        self._actor.GetProperty().SetLineWidth(1.5)
+        self._actor.VisibilityOff()
+
+    # Getters
+    def getActor(self) -> vtk.vtkActor2D:
+        return self._actor
+
+    def getPolygon(self, mode: str) -> np.ndarray:
+        '''Region drawn so far: the box spanned by the first and last point or
+        the lasso through all of them.'''
+        if mode == BOX:
+            return boxPolygon(self._points[0], self._points[-1])  # type:ignore
+        return np.array(self._points, dtype=np.float64)
+
+    def isEmpty(self) -> bool:
+        return len(self._points) < 2
+
+    # Actions
+    def start(self, position: tuple[int, int]) -> None:
+        self._points = [tuple(position)]  # type:ignore
+        self._actor.VisibilityOn()
+
+    def extend(self, position: tuple[int, int], mode: str) -> None:
+        if mode == BOX:
+            self._points = [self._points[0], tuple(position)]  # type:ignore
+        elif np.hypot(position[0] - self._points[-1][0], position[1] - self._points[-1][1]) >= LASSO_SPACING:
+            self._points.append(tuple(position))  # type:ignore
+        self._update(self.getPolygon(mode))
+
+    def finish(self) -> None:
+        self._actor.VisibilityOff()
+
+    # Internal
+    def _update(self, polygon: np.ndarray) -> None:
+        outline = np.column_stack([polygon, np.zeros(len(polygon))])
+        points = vtk.vtkPoints()
+        points.SetData(numpy_to_vtk(outline, deep=True))
+        line = vtk.vtkPolyLine()
+        line.GetPointIds().SetNumberOfIds(len(polygon) + 1)
+        for i in range(len(polygon) + 1):
+            line.GetPointIds().SetId(i, i % len(polygon))
+        lines = vtk.vtkCellArray()
+        lines.InsertNextCell(line)
+        self._polyData.SetPoints(points)
+        self._polyData.SetLines(lines)
+        self._polyData.Modified()
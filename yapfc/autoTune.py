@@ -0,0 +1,228 @@
+import os
+import re
+import json
+import math
+import time
+import shutil
+import tempfile
+import subprocess
+from typing import Callable
+from yapfc.coreBudget import solverEnvironment, PASTIX_ENVIRONMENT
+from yapfc.resultCache import iterCanonicalLines
+from yapfc.runner import CCX_ARGS
+
+DEFAULT_TUNING_FILE: str = os.path.join(os.path.expanduser("~"), ".cache", "yapfc", "solver_tuning.json")
+SOLVERS: tuple[str, ...] = ("SPOOLES", "PASTIX", "ITERATIVE SCALING", "ITERATIVE CHOLESKY")
+# A trial is killed once it takes this many times longer than the best trial so far
+TRIAL_TIMEOUT_FACTOR: float = 5.0
+MIN_TRIAL_TIMEOUT: float = 60.0
+# Seconds between memory samples of a running trial
+TRIAL_POLL_INTERVAL: float = 0.02
+# Includes up to this size are spliced into trial decks so that the procedure
+# lines in section files can be rewritten, larger ones (meshes) are referenced
+INLINE_INCLUDE_SIZE: int = 2**20
+# Placeholder of the StepSubWriter text that later runs fill with the tuned solver
+SOLVER_VARIABLE: str = "solver"
+
+_SOLVER_PARAM = re.compile(r'(,\s*SOLVER\s*=\s*)[^,\n]*', re.I)
+_PROCEDURE = re.compile(r'^\*\s*(STATIC|DYNAMIC|FREQUENCY|BUCKLE|HEAT\s*TRANSFER|COUPLED\s*TEMPERATURE-DISPLACEMENT|VISCO)\b', re.I)
+_END_STEP = re.compile(r'^\*\s*END\s*STEP', re.I)
+_INCLUDE = re.compile(r'^\*\s*INCLUDE\s*,\s*INPUT\s*=\s*(.+?)\s*$', re.I)
+
+
+def countNodes(deckPath: str) -> int:
+    '''Number of *NODE data lines of a deck, includes followed.'''
+    nodes = 0
+    inNodes = False
+    for line in iterCanonicalLines(deckPath):
+        if line.startswith("*"):
+            inNodes = line.split(",")[0] == "*NODE"
+        elif inNodes:
+            nodes += 1
+    return nodes
+
+def sizeBucket(nodes: int) -> str:
+    '''Models are tuned per decade of node count, "1e4" covers 10k-100k nodes.'''
+    return f'1e{int(math.log10(max(nodes, 1)))}'
+
+def modelNodes(items, deckPath: str | None = None) -> int:
+    '''Node count of the meshes held by the writers, counted from the deck
+    when none holds a mesh.'''
+    nodes = sum(item.getMesh().getNumberOfPoints() for item in items
+                if hasattr(item, "getMesh") and item.getMesh() is not None)
+    if not nodes and deckPath:
+        nodes = countNodes(deckPath)
+    return nodes
+
+def trialConfigs(cores: int) -> list[dict]:
+    threads = sorted({2**i for i in range(int(math.log2(max(cores, 1))) + 1)} | {max(cores, 1)})
+    configs: list[dict] = []
+    for solver in SOLVERS:
+        for count in threads:
+            if solver == "PASTIX":
+                for mixed in (1, 0):
+                    for ordering in (0, 1):
+                        configs.append({"solver": solver, "threads": count,
+                                        "PASTIX_MIXED_PRECISION": str(mixed), "PASTIX_ORDERING": str(ordering)})
+            else:
+                configs.append({"solver": solver, "threads": count})
+    return configs
+
+def configEnvironment(config: dict, maxThreads: int | None = None) -> dict[str, str]:
+    '''Solver environment of a tuned config, its threads capped at maxThreads.'''
+    environment = solverEnvironment(min(config["threads"], maxThreads or config["threads"]))
+    for name in PASTIX_ENVIRONMENT:
+        if name in config:
+            environment[name] = config[name]
+    return environment
+
+def spliceIncludes(deckPath: str) -> str:
+    '''Deck text with the small includes inlined and the others pointing to
+    absolute paths, so that it can be solved from any directory.'''
+    deckDir = os.path.dirname(os.path.abspath(deckPath))
+    lines: list[str] = []
+    with open(deckPath, "r", errors="replace") as f:
+        for line in f:
+            match = _INCLUDE.match(line.strip())
+            if match:
+                path = os.path.join(deckDir, match.group(1))
+                if os.path.getsize(path) <= INLINE_INCLUDE_SIZE:
+                    lines.append(spliceIncludes(path))
+                    continue
+                line = f'*INCLUDE, INPUT={os.path.abspath(path)}\n'
+            lines.append(line if line.endswith("\n") else line + "\n")
+    return "".join(lines)
+
+def trialDeck(text: str, solver: str) -> str:
+    '''The first step of a deck with the given solver and its time period cut
+    down to the initial increment, so that a trial solves a single increment.'''
+    lines: list[str] = []
+    procedureData = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if procedureData and stripped and not stripped.startswith("**"):
+            procedureData = False
+            values = [i.strip() for i in stripped.split(",")]
+            if not stripped.startswith("*") and len(values) >= 2 and values[0]:
+                values[1] = values[0]
+                line = ", ".join(values)
+        match = _PROCEDURE.match(stripped)
+        if match:
+            procedureData = True
+            if _SOLVER_PARAM.search(line):
+                line = _SOLVER_PARAM.sub(lambda m: m.group(1) + solver, line)
+            else:
+                line = f'{line.rstrip()}, SOLVER={solver}'
+        lines.append(line)
+        if _END_STEP.match(stripped):
+            break
+    return "\n".join(lines) + "\n"
+
+def runTrial(ccxPath: str, workDir: str, name: str, config: dict, timeout: float) -> dict:
+    '''Solves workDir/name.inp once, returns wall time and peak memory next to
+    the config. ccx reports some input errors with exit code 0, so the log is
+    checked too.'''
+    start = time.perf_counter()
+    peakMemoryMb = None
+    with open(os.path.join(workDir, f'{name}.log'), "wb") as log:
+        process = subprocess.Popen([ccxPath, name, *CCX_ARGS], cwd=workDir, stdout=log, stderr=subprocess.STDOUT,
+                                   env={**os.environ, **configEnvironment(config)})
+        try:
+            while process.poll() is None:
+                peakMemoryMb = max(peakMemoryMb or 0.0, _peakMemoryMb(process.pid) or 0.0) or None
+                if time.perf_counter() - start > timeout:
+                    raise subprocess.TimeoutExpired(process.args, timeout)
+                time.sleep(TRIAL_POLL_INTERVAL)
+            exitCode = process.returncode
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            exitCode = None
+    wallTime = time.perf_counter() - start
+    with open(os.path.join(workDir, f'{name}.log'), "rb") as log:
+        ok = exitCode == 0 and b"*ERROR" not in log.read()
+    return {**config, "ok": ok, "exit_code": exitCode, "wall_time": wallTime, "peak_memory_mb": peakMemoryMb}
+
+def _peakMemoryMb(pid: int) -> float | None:
+    '''High water mark of the resident set of a running process (Linux only).
+    ru_maxrss of the reaped child is no use here, it includes the RSS of the
+    parent it was forked from.'''
+    try:
+        with open(f'/proc/{pid}/status', "rb") as f:
+            for line in f:
+                if line.startswith(b"VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class SolverTuning():
+    '''Best solver configuration per model size bucket, persisted as JSON.'''
+    def __init__(self, fpath: str = DEFAULT_TUNING_FILE) -> None:
+        self._fpath = fpath
+        try:
+            with open(fpath, "r") as f:
+                self._buckets: dict[str, dict] = json.load(f)
+        except (OSError, ValueError):
+            self._buckets = {}
+
+    # Getters
+    def getBest(self, bucket: str) -> dict | None:
+        entry = self._buckets.get(bucket)
+        return entry["best"] if entry else None
+
+    def getBuckets(self) -> dict[str, dict]:
+        return self._buckets
+
+    # Actions
+    def record(self, bucket: str, nodes: int, trials: list[dict]) -> dict | None:
+        succeeded = [i for i in trials if i["ok"]]
+        if not succeeded:
+            return None
+        best = min(succeeded, key=lambda i: i["wall_time"])
+        self._buckets[bucket] = {"best": best, "nodes": nodes, "trials": trials,
+                                 "date": time.strftime("%Y-%m-%d %H:%M:%S")}
+        os.makedirs(os.path.dirname(os.path.abspath(self._fpath)), exist_ok=True)
+        tmp = f'{self._fpath}.tmp'
+        with open(tmp, "w") as f:
+            json.dump(self._buckets, f, indent=1)
+        os.replace(tmp, self._fpath)
+        return best
+
+
+def autoTune(deckPath: str, ccxPath: str, cores: int, tuning: SolverTuning, nodes: int | None = None,
+             progress: Callable[[int, int, dict], None] | None = None,
+             cancelled: Callable[[], bool] | None = None) -> dict | None:
+    '''Runs single increment trials of the deck for every trialConfig, one
+    after another so that timings do not disturb each other, and records the
+    fastest configuration for the deck's size bucket. A solver that fails
+    (e.g. not compiled into this ccx) is not tried again.'''
+    if nodes is None:
+        nodes = countNodes(deckPath)
+    text = spliceIncludes(deckPath)
+    workDir = tempfile.mkdtemp(prefix="yapfc_tune_")
+    trials: list[dict] = []
+    unavailable: set[str] = set()
+    best = math.inf
+    configs = trialConfigs(cores)
+    try:
+        for index, config in enumerate(configs):
+            if cancelled and cancelled():
+                break
+            if config["solver"] in unavailable:
+                continue
+            with open(os.path.join(workDir, "trial.inp"), "w") as f:
+                f.write(trialDeck(text, config["solver"]))
+            timeout = max(MIN_TRIAL_TIMEOUT, TRIAL_TIMEOUT_FACTOR * best) if best < math.inf else 24 * 3600
+            trial = runTrial(ccxPath, workDir, "trial", config, timeout)
+            trials.append(trial)
+            if trial["ok"]:
+                best = min(best, trial["wall_time"])
+            elif trial["exit_code"] is not None:
+                unavailable.add(config["solver"])
+            if progress:
+                progress(index + 1, len(configs), trial)
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True)
+    return tuning.record(sizeBucket(nodes), nodes, trials)
@@ -0,0 +1,116 @@
+import os
+import threading
+
+# Settings of calculix/ccx_win10_exodus.cmd, besides the thread counts
+PASTIX_ENVIRONMENT: dict[str, str] = {
+    "OPENBLAS_NUM_THREADS": "1",
+    "PASTIX_MIXED_PRECISION": "1",
+    "PASTIX_ORDERING": "0",
+    "PASTIX_SCHEDULER": "0",
+}
+# Thread counts of one ccx process
+THREAD_ENVIRONMENT: tuple[str, ...] = ("OMP_NUM_THREADS", "CCX_NPROC_STIFFNESS", "CCX_NPROC_RESULTS")
+
+
+def availableCpus() -> list[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def solverEnvironment(threads: int) -> dict[str, str]:
+    '''Environment for one ccx process limited to threads cores.'''
+    environment = dict(PASTIX_ENVIRONMENT)
+    for name in THREAD_ENVIRONMENT:
+        environment[name] = str(threads)
+    return environment
+
+def pinProcess(pid: int, cpus: list[int]) -> bool:
+    '''Restricts a running process to cpus, threads it starts later inherit the mask.'''
+    if not cpus or not hasattr(os, "sched_setaffinity"):
+        return False
+    try:
+        os.sched_setaffinity(pid, cpus)
+    except OSError as e:
+        print(f'Unable to pin process {pid} to cpus {cpus}: {e}')
+        return False
+    return True
+
+
+class CoreBudget():
+    '''Shares the cores of the machine between at most maxJobs concurrently
+    running solver jobs, so that parallel jobs never oversubscribe the machine.
+    A job gets its cores when it starts: the free cores are split evenly
+    between the jobs starting at the same time, the cores of a finished job
+    go to the jobs started after it. The cpu lists are used for pinning.'''
+    def __init__(self, cores: int | None = None, maxJobs: int = 1, pin: bool = False) -> None:
+        self._pin = pin
+        # cpu lists of the running jobs
+        self._taken: list[list[int]] = []
+        self._condition = threading.Condition()
+        self._maxJobs = maxJobs
+        self.setCores(cores)
+
+    # Setters
+    def setCores(self, cores: int | None) -> None:
+        '''Limits the budget to the first cores cpus, None or 0 uses all of them.
+        Running jobs keep their cpus.'''
+        with self._condition:
+            self._cpus = availableCpus()
+            if cores:
+                self._cpus = self._cpus[:cores]
+            self.setMaxJobs(self._maxJobs)
+
+    def setMaxJobs(self, maxJobs: int) -> None:
+        with self._condition:
+            self._maxJobs = max(1, min(maxJobs, len(self._cpus)))
+            self._condition.notify_all()
+
+    def setPin(self, pin: bool) -> None:
+        self._pin = pin
+
+    # Getters
+    def getCores(self) -> int:
+        return len(self._cpus)
+
+    def getMaxJobs(self) -> int:
+        return self._maxJobs
+
+    def getRunningJobs(self) -> int:
+        return len(self._taken)
+
+    def getFreeCpus(self) -> list[int]:
+        taken = {cpu for cpus in self._taken for cpu in cpus}
+        return [cpu for cpu in self._cpus if cpu not in taken]
+
+    def getPin(self) -> bool:
+        return self._pin
+
+    def getEnvironment(self, cpus: list[int]) -> dict[str, str]:
+        return solverEnvironment(max(1, len(cpus)))
+
+    # Actions
+    def acquire(self, starting: int = 1, block: bool = False) -> list[int] | None:
+        '''Cpus of a starting job, its share of the free cpus when starting jobs
+        (this one included) start now. None when maxJobs jobs are running or
+        no cpu is free, block waits for a release instead.'''
+        with self._condition:
+            while True:
+                free = self.getFreeCpus()
+                if len(self._taken) < self._maxJobs and free:
+                    share = max(1, len(free) // max(1, min(starting, self._maxJobs - len(self._taken))))
+                    self._taken.append(free[:share])
+                    return free[:share]
+                if not block:
+                    return None
+                self._condition.wait()
+
+    def release(self, cpus: list[int]) -> None:
+        with self._condition:
+            if cpus in self._taken:
+                self._taken.remove(cpus)
+            self._condition.notify_all()
+
+    def pin(self, pid: int, cpus: list[int]) -> bool:
+        if not self._pin:
+            return False
+        return pinProcess(pid, cpus)
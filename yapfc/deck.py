@@ -0,0 +1,165 @@
+import os
+import re
+import json
+import time
+import hashlib
+from typing import Iterable, Iterator
+
+WRITE_BUFFER: int = 1 << 20
+
+
+MANIFEST: str = "manifest.json"
+_UNSAFE = re.compile(r'[^\w.-]')
+# ${name} or ${name=default} in writer text
+_PLACEHOLDER = re.compile(r'\$\{(\w+)(?:=([^}]*))?\}')
+
+
+class DeckStats():
+    def __init__(self, fpath: str, sections: int, bytesWritten: int, seconds: float,
+                 rewritten: int | None = None) -> None:
+        self.fpath = fpath
+        self.sections = sections
+        self.bytesWritten = bytesWritten
+        self.seconds = seconds
+        self.rewritten = sections if rewritten is None else rewritten
+
+    def __str__(self) -> str:
+        return (f'{self.fpath}: {self.sections} sections ({self.rewritten} rewritten), '
+                f'{self.bytesWritten / 2**20:.2f} MB written in {self.seconds:.3f} s')
+
+
+def iterComponents(item) -> Iterator:
+    '''Depth first walk over a tree item and all of its children.'''
+    yield item
+    if item.hasChildren():
+        for row in range(item.rowCount()):
+            yield from iterComponents(item.child(row))
+
+def iterAnalysisComponents(model, analysis=None) -> Iterator:
+    '''Writers of the deck of one analysis: the model, then the analysis
+    writer itself with its text and children.'''
+    yield from iterComponents(model)
+    if analysis is not None:
+        yield from iterComponents(analysis)
+
+def templateNames(text: str) -> dict[str, str | None]:
+    '''Placeholders of a templated writer text and their defaults.'''
+    return {match.group(1): match.group(2) for match in _PLACEHOLDER.finditer(text)}
+
+def renderTemplate(text: str, variables: dict[str, float] | None = None) -> str:
+    '''Replaces ${name} placeholders by the value from variables or the
+    default given as ${name=default}.'''
+    if "${" not in text:
+        return text
+    variables = variables or {}
+    def replace(match: re.Match) -> str:
+        name, default = match.groups()
+        if name in variables:
+            return format(variables[name], ".12g") if isinstance(variables[name], float) else str(variables[name])
+        if default is None:
+            raise ValueError(f'No value for parameter ${{{name}}}')
+        return default
+    return _PLACEHOLDER.sub(replace, text)
+
+def iterSectionText(item, deckDir: str = ".", includeDir: str | None = None,
+                    variables: dict[str, float] | None = None) -> Iterator[str]:
+    '''Text of one writer. Writers with large sections implement
+    iterStoredText(deckDir, includeDir) and hand it over in pieces instead of
+    one string, or write it to an include file in includeDir (the deck
+    directory by default).'''
+    if hasattr(item, "iterStoredText"):
+        yield from item.iterStoredText(deckDir, includeDir)
+    elif hasattr(item, "getStoredText"):
+        yield renderTemplate(item.getStoredText(), variables)
+
+def writeDeck(items: Iterable, fpath: str, variables: dict[str, float] | None = None,
+              includeDir: str | None = None) -> DeckStats:
+    '''Streams every writer section into a buffered file, the deck is never
+    held in memory as a whole. variables fill the ${name} placeholders.'''
+    start = time.perf_counter()
+    deckDir = os.path.dirname(os.path.abspath(fpath))
+    sections = 0
+    with open(fpath, "w", buffering=WRITE_BUFFER) as f:
+        for item in items:
+            sections += 1
+            f.write('\n')
+            for text in iterSectionText(item, deckDir, includeDir, variables):
+                f.write(text)
+    return DeckStats(fpath, sections, os.path.getsize(fpath), time.perf_counter() - start)
+
+def getSectionsDir(fpath: str) -> str:
+    return f'{os.path.splitext(fpath)[0]}_sections'
+
+def sectionHash(item) -> str:
+    return hashlib.sha1(item.getStoredText().encode()).hexdigest()
+
+def sectionName(item, position: int) -> str:
+    '''Section file of a writer, keyed by its writer id so that inserting,
+    removing or moving other writers leaves the file alone. Items without an
+    id fall back to their position.'''
+    key = item.getWriterId() if hasattr(item, "getWriterId") else f'{position:03d}'
+    return f'{_UNSAFE.sub("_", item.text())}_{key}.inp'
+
+def writeIncrementalDeck(items: Iterable, fpath: str, variables: dict[str, float] | None = None) -> DeckStats:
+    '''Writes every writer section to its own file in <deck>_sections and
+    splices them into the deck with *INCLUDE. A section file is rewritten only
+    when the hash of its writer text differs from the one recorded in the
+    manifest, or the file was touched since. Writers that stream their text
+    (iterStoredText) manage their own files and are written inline. The
+    variables a section uses are recorded next to its hash.'''
+    start = time.perf_counter()
+    deckDir = os.path.dirname(os.path.abspath(fpath))
+    sectionsDir = getSectionsDir(fpath)
+    os.makedirs(sectionsDir, exist_ok=True)
+    manifestPath = os.path.join(sectionsDir, MANIFEST)
+    try:
+        with open(manifestPath) as f:
+            manifest: dict[str, dict] = json.load(f)
+    except (FileNotFoundError, ValueError):
+        manifest = {}
+
+    sections = 0
+    rewritten = 0
+    bytesWritten = 0
+    written: dict[str, dict] = {}
+    with open(fpath, "w", buffering=WRITE_BUFFER) as f:
+        for item in items:
+            sections += 1
+            f.write('\n')
+            if hasattr(item, "iterStoredText") or not item.getStoredText():
+                for text in iterSectionText(item, deckDir):
+                    f.write(text)
+                continue
+
+            name = sectionName(item, sections)
+            path = os.path.join(sectionsDir, name)
+            entry: dict = {"hash": sectionHash(item)}
+            if variables:
+                used = {key: str(value) for key, value in variables.items() if key in templateNames(item.getStoredText())}
+                if used:
+                    entry["variables"] = used
+            recorded = manifest.get(name)
+            try:
+                stat = os.stat(path)
+                current = {**entry, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            except FileNotFoundError:
+                current = None
+            if current is None or current != recorded:
+                text = renderTemplate(item.getStoredText(), variables)
+                with open(path, "w", buffering=WRITE_BUFFER) as section:
+                    section.write(text)
+                    section.write('\n')
+                stat = os.stat(path)
+                current = {**entry, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+                rewritten += 1
+                bytesWritten += stat.st_size
+            written[name] = current
+            f.write(f'*INCLUDE, INPUT={os.path.basename(sectionsDir)}/{name}')
+
+    for name in set(manifest) - set(written):
+        if os.path.exists(os.path.join(sectionsDir, name)):
+            os.remove(os.path.join(sectionsDir, name))
+    with open(manifestPath, "w") as f:
+        json.dump(written, f)
+    bytesWritten += os.path.getsize(fpath)
+    return DeckStats(fpath, sections, bytesWritten, time.perf_counter() - start, rewritten)
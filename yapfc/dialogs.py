@@ -1,3 +1,4 @@
+import os
 import json
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QCheckBox, QRadioButton,
@@ -6,6 +7,8 @@ from PySide6.QtWidgets import (
 )
 from enum import Enum, StrEnum, auto
 from typing import TYPE_CHECKING
+from yapfc.meshCache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE_MB
+from yapfc.resultCache import DEFAULT_RESULT_CACHE_DIR, DEFAULT_RESULT_CACHE_SIZE_MB
 
 if TYPE_CHECKING:
     from yapfc.model import CcxWriter
@@ -35,6 +38,44 @@ class OptionsDialog(QDialog):
         self.paraview_path = QLineEdit()
         layout.addWidget(self.paraview_path)
 
+        layout.addWidget(QLabel("gmsh path:"))
+        self.gmsh_path = QLineEdit()
+        self.gmsh_path.setPlaceholderText("gmsh")
+        layout.addWidget(self.gmsh_path)
+
+        layout.addWidget(QLabel("Mesh cache directory:"))
+        self.mesh_cache_dir = QLineEdit()
+        self.mesh_cache_dir.setPlaceholderText(DEFAULT_CACHE_DIR)
+        layout.addWidget(self.mesh_cache_dir)
+
+        layout.addWidget(QLabel("Mesh cache size [MB]:"))
+        self.mesh_cache_size = QLineEdit()
+        self.mesh_cache_size.setPlaceholderText(str(DEFAULT_CACHE_SIZE_MB))
+        layout.addWidget(self.mesh_cache_size)
+
+        layout.addWidget(QLabel("Concurrent analyses:"))
+        self.max_jobs = QLineEdit()
+        self.max_jobs.setPlaceholderText("1")
+        layout.addWidget(self.max_jobs)
+
+        layout.addWidget(QLabel("Solver cores (all if empty):"))
+        self.cores = QLineEdit()
+        self.cores.setPlaceholderText(str(os.cpu_count() or 1))
+        layout.addWidget(self.cores)
+
+        self.pin_cpus = QCheckBox("Pin solver jobs to their cores")
+        layout.addWidget(self.pin_cpus)
+
+        layout.addWidget(QLabel("Result cache directory:"))
+        self.result_cache_dir = QLineEdit()
+        self.result_cache_dir.setPlaceholderText(DEFAULT_RESULT_CACHE_DIR)
+        layout.addWidget(self.result_cache_dir)
+
+        layout.addWidget(QLabel("Result cache size [MB]:"))
+        self.result_cache_size = QLineEdit()
+        self.result_cache_size.setPlaceholderText(str(DEFAULT_RESULT_CACHE_SIZE_MB))
+        layout.addWidget(self.result_cache_size)
+
 #        # Checkboxes
 #        self.checkbox1 = QCheckBox("Enable feature A")
 #        self.checkbox2 = QCheckBox("Enable feature B")
@@ -75,7 +116,15 @@ class OptionsDialog(QDialog):
     def save_options(self):
         options = {
             "ccx_path": self.ccx_path.text(),
-            "paraview_path": self.paraview_path.text()
+            "paraview_path": self.paraview_path.text(),
+            "gmsh_path": self.gmsh_path.text(),
+            "mesh_cache_dir": self.mesh_cache_dir.text(),
+            "mesh_cache_size_mb": self.mesh_cache_size.text(),
+            "result_cache_dir": self.result_cache_dir.text(),
+            "result_cache_size_mb": self.result_cache_size.text(),
+            "max_jobs": self.max_jobs.text(),
+            "cores": self.cores.text(),
+            "pin_cpus": self.pin_cpus.isChecked()
 #            "feature_a": self.checkbox1.isChecked(),
 #            "feature_b": self.checkbox2.isChecked(),
 #            "mode_1": self.radio1.isChecked(),
@@ -91,6 +140,14 @@ class OptionsDialog(QDialog):
                 options = json.load(f)
                 self.ccx_path.setText(options.get("ccx_path", ""))
                 self.paraview_path.setText(options.get("paraview_path", ""))
+                self.gmsh_path.setText(options.get("gmsh_path", ""))
+                self.mesh_cache_dir.setText(options.get("mesh_cache_dir", ""))
+                self.mesh_cache_size.setText(str(options.get("mesh_cache_size_mb", "")))
+                self.result_cache_dir.setText(options.get("result_cache_dir", ""))
+                self.result_cache_size.setText(str(options.get("result_cache_size_mb", "")))
+                self.max_jobs.setText(str(options.get("max_jobs", "")))
+                self.cores.setText(str(options.get("cores", "")))
+                self.pin_cpus.setChecked(bool(options.get("pin_cpus", False)))
 #                self.checkbox1.setChecked(options.get("feature_a", False))
 #                self.checkbox2.setChecked(options.get("feature_b", False))
 #                self.radio1.setChecked(options.get("mode_1", False))
@@ -0,0 +1,221 @@
+import numpy as np
+from yapfc.meshData import MeshData
+from yapfc.meshCache import MeshCache
+
+# Corner nodes (zero based) of the faces S1, S2, ... of every volume cell type
+# in CalculiX numbering. Quadratic cells share the table of their linear type,
+# their corner nodes come first. Pyramids are no CalculiX element, their faces
+# are only needed so that the faces they cover do not count as boundary.
+FACE_NODES: dict[str, list[list[int]]] = {
+    "tetra": [[0, 1, 2], [0, 3, 1], [1, 3, 2], [2, 3, 0]],
+    "hexahedron": [[0, 1, 2, 3], [4, 7, 6, 5], [0, 4, 5, 1], [1, 5, 6, 2], [2, 6, 7, 3], [3, 7, 4, 0]],
+    "wedge": [[0, 1, 2], [3, 4, 5], [0, 1, 4, 3], [1, 2, 5, 4], [2, 0, 3, 5]],
+    "pyramid": [[0, 1, 2, 3], [0, 4, 1], [1, 4, 2], [2, 4, 3], [3, 4, 0]],
+}
+FACE_NODES["tetra10"] = FACE_NODES["tetra"]
+FACE_NODES["hexahedron20"] = FACE_NODES["hexahedron"]
+FACE_NODES["wedge15"] = FACE_NODES["wedge"]
+
+# Faces whose normals differ by more than this many degrees stop a flood fill
+DEFAULT_FEATURE_ANGLE: float = 20.0
+# Meshes with this many cells get their face index built off the UI thread
+BACKGROUND_CELLS: int = 100_000
+# Cache entries of face indices are keyed by the mesh file and this
+FACE_INDEX_KEY: str = "faces1"
+
+
+class FaceIndex():
+    '''Boundary faces of the volume cells of a mesh and which faces share an
+    edge. Faces are rows of (n, 4) corner node indices, triangles padded with
+    -1, ordered by their cell; normals point out of the cell. The adjacency
+    is kept in CSR form (indptr, indices), so a flood fill only gathers
+    slices of flat arrays. 2D and 1D cells have no faces in the index.'''
+    def __init__(self, cells: np.ndarray, faceNumbers: np.ndarray, nodes: np.ndarray,
+                 normals: np.ndarray, indptr: np.ndarray, indices: np.ndarray) -> None:
+        self._cells = cells
+        self._faceNumbers = faceNumbers
+        self._nodes = nodes
+        self._normals = normals
+        self._indptr = indptr
+        self._indices = indices
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    # Getters
+    def getCells(self) -> np.ndarray:
+        return self._cells
+
+    def getFaceNumbers(self) -> np.ndarray:
+        '''CalculiX face number of every face, 1 for S1.'''
+        return self._faceNumbers
+
+    def getNodes(self) -> np.ndarray:
+        return self._nodes
+
+    def getNormals(self) -> np.ndarray:
+        return self._normals
+
+    def getNeighbors(self, face: int) -> np.ndarray:
+        return self._indices[self._indptr[face]:self._indptr[face + 1]]
+
+    def findFace(self, cell: int, nodes: np.ndarray | list[int]) -> int:
+        '''Boundary face of a cell whose corners are all among nodes (the
+        point ids of a picked surface polygon), -1 if there is none.'''
+        first, last = np.searchsorted(self._cells, [cell, cell + 1])
+        candidates = self._nodes[first:last]
+        inside = np.isin(candidates, np.asarray(nodes)) | (candidates < 0)
+        matches = np.flatnonzero(inside.all(axis=1))
+        return int(first + matches[0]) if len(matches) else -1
+
+    def toLabels(self, faces: np.ndarray, data: MeshData) -> np.ndarray:
+        '''(n, 2) element label and face number of faces, sorted.'''
+        faces = np.asarray(faces, dtype=np.int64)
+        pairs = np.column_stack([data.elementMap.toLabels(self._cells[faces]), self._faceNumbers[faces]])
+        return pairs[np.lexsort(pairs.T[::-1])] if len(pairs) else pairs.reshape(0, 2)
+
+    # Actions
+    def floodFill(self, seed: int, featureAngle: float = DEFAULT_FEATURE_ANGLE) -> np.ndarray:
+        '''Faces reachable from seed across edges where the normals of the two
+        faces differ by at most featureAngle degrees, ascending. Grows one
+        ring of faces per numpy pass.'''
+        cosine = np.cos(np.radians(featureAngle))
+        reached = np.zeros(len(self), dtype=bool)
+        reached[seed] = True
+        frontier = np.array([seed], dtype=np.int64)
+        while len(frontier):
+            starts = self._indptr[frontier]
+            counts = self._indptr[frontier + 1] - starts
+            sources = np.repeat(frontier, counts)
+            targets = self._indices[_ranges(starts, counts)]
+            dots = np.einsum("ij,ij->i", self._normals[sources], self._normals[targets])
+            frontier = np.unique(targets[~reached[targets] & (dots >= cosine)])
+            reached[frontier] = True
+        return np.flatnonzero(reached)
+
+    def toArrays(self) -> dict[str, np.ndarray]:
+        return {"cells": self._cells, "faceNumbers": self._faceNumbers, "nodes": self._nodes,
+                "normals": self._normals, "indptr": self._indptr, "indices": self._indices}
+
+    @classmethod
+    def fromArrays(cls, arrays) -> 'FaceIndex':
+        return cls(arrays["cells"], arrays["faceNumbers"], arrays["nodes"],
+                   arrays["normals"], arrays["indptr"], arrays["indices"])
+
+    @classmethod
+    def build(cls, data: MeshData) -> 'FaceIndex':
+        '''Collects all faces of all volume cells, keeps those that occur once
+        (sorted corner nodes as the key) and connects the boundary faces that
+        share an edge. Every step is a sort or a gather over all faces.'''
+        dtype = np.int32 if data.getNumberOfPoints() < 2**31 else np.int64
+        cells: list[np.ndarray] = []
+        numbers: list[np.ndarray] = []
+        nodes: list[np.ndarray] = []
+        start = 0
+        for block in data.blocks:
+            if block.cellType in FACE_NODES:
+                ids = np.arange(start, start + len(block), dtype=np.int64)
+                for number, corners in enumerate(FACE_NODES[block.cellType], start=1):
+                    faceNodes = np.full((len(block), 4), -1, dtype=dtype)
+                    faceNodes[:, :len(corners)] = block.connectivity[:, corners]
+                    cells.append(ids)
+                    numbers.append(np.full(len(block), number, dtype=np.int8))
+                    nodes.append(faceNodes)
+            start += len(block)
+        if not nodes:
+            return cls(np.empty(0, np.int64), np.empty(0, np.int8), np.empty((0, 4), dtype),
+                       np.empty((0, 3)), np.zeros(1, np.int64), np.empty(0, np.int64))
+        allNodes = np.concatenate(nodes)
+        keys = np.sort(allNodes, axis=1)
+        order = np.lexsort(keys.T[::-1])
+        keys = keys[order]
+        same = (keys[1:] == keys[:-1]).all(axis=1)
+        single = np.ones(len(keys), dtype=bool)
+        single[1:] &= ~same
+        single[:-1] &= ~same
+        boundary = order[single]
+        del keys, order, same, single
+        allCells, allNumbers = np.concatenate(cells), np.concatenate(numbers)
+        # Back in cell order, findFace searches the faces of a cell by its id
+        boundary = boundary[np.lexsort((allNumbers[boundary], allCells[boundary]))]
+        faceCells = allCells[boundary]
+        faceNumbers = allNumbers[boundary]
+        faceNodes = allNodes[boundary]
+        del allNodes
+        normals = _normals(data, faceCells, faceNodes)
+        indptr, indices = _adjacency(faceNodes, data.getNumberOfPoints())
+        return cls(faceCells, faceNumbers, faceNodes, normals, indptr, indices)
+
+
+def loadFaceIndex(fpath: str, data: MeshData, cache: MeshCache | None = None) -> FaceIndex:
+    '''Face index of the mesh read from fpath, from the mesh cache when it
+    holds one for the unchanged file, else built (and stored).'''
+    if cache is not None:
+        arrays = cache.loadArrays(fpath, FACE_INDEX_KEY)
+        if arrays is not None:
+            try:
+                return FaceIndex.fromArrays(arrays)
+            except KeyError:
+                pass
+    index = FaceIndex.build(data)
+    if cache is not None:
+        cache.storeArrays(fpath, index.toArrays(), FACE_INDEX_KEY)
+    return index
+
+def surfaceDefinition(name: str, pairs: np.ndarray) -> str:
+    '''*SURFACE block of (n, 2) element label, face number pairs.'''
+    lines = [f'*SURFACE, NAME={name}, TYPE=ELEMENT']
+    lines += [f'{label}, S{number}' for label, number in pairs]
+    return "\n".join(lines) + "\n"
+
+def _normals(data: MeshData, cells: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+    '''Unit normals of faces, from the diagonals of quads and two edges of
+    triangles, flipped to point away from the center of their cell. The face
+    tables do not orient every face the same way.'''
+    points = data.points
+    isTriangle = nodes[:, 3] < 0
+    p0, p1, p2 = points[nodes[:, 0]], points[nodes[:, 1]], points[nodes[:, 2]]
+    p3 = points[np.where(isTriangle, nodes[:, 0], nodes[:, 3])]
+    normals = np.cross(np.where(isTriangle[:, None], p1 - p0, p2 - p0), np.where(isTriangle[:, None], p2 - p0, p3 - p1))
+    center = np.zeros((len(cells), 3))
+    start = 0
+    for block in data.blocks:
+        inBlock = np.flatnonzero((cells >= start) & (cells < start + len(block)))
+        if len(inBlock):
+            corners = block.connectivity[cells[inBlock] - start]
+            for column in corners.T:
+                center[inBlock] += points[column]
+            center[inBlock] /= corners.shape[1]
+        start += len(block)
+    faceCenter = np.where(isTriangle[:, None], (p0 + p1 + p2) / 3, (p0 + p1 + p2 + p3) / 4)
+    flip = np.einsum("ij,ij->i", normals, faceCenter - center) < 0
+    normals[flip] *= -1
+    length = np.linalg.norm(normals, axis=1)
+    length[length == 0] = 1.0
+    return normals / length[:, None]
+
+def _adjacency(nodes: np.ndarray, nPoints: int) -> tuple[np.ndarray, np.ndarray]:
+    '''CSR adjacency of faces sharing an edge. Faces are grouped by sorted
+    edge keys; the two faces of a manifold edge become neighbors, the faces
+    around a non-manifold edge are chained.'''
+    nxt = np.roll(nodes, -1, axis=1)
+    isTriangle = nodes[:, 3] < 0
+    nxt[isTriangle, 2] = nodes[isTriangle, 0]
+    valid = (nodes >= 0) & (nxt >= 0)
+    low = np.minimum(nodes, nxt)[valid].astype(np.int64)
+    high = np.maximum(nodes, nxt)[valid].astype(np.int64)
+    faces = np.broadcast_to(np.arange(len(nodes), dtype=np.int64)[:, None], nodes.shape)[valid]
+    edges = low * nPoints + high
+    order = np.argsort(edges, kind="stable")
+    edges, faces = edges[order], faces[order]
+    shared = np.flatnonzero(edges[1:] == edges[:-1])
+    rows = np.concatenate([faces[shared], faces[shared + 1]])
+    columns = np.concatenate([faces[shared + 1], faces[shared]])
+    order = np.argsort(rows, kind="stable")
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(nodes)), out=indptr[1:])
+    return indptr, columns[order]
+
+def _ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    '''Concatenated aranges start:start + length.'''
+    return np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths) + np.arange(lengths.sum())
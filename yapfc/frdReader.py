@@ -0,0 +1,374 @@
+import os
+import re
+import json
+import numpy as np
+from typing import Iterator
+
+# Records parsed per numpy pass, small enough for the temporaries to stay in cache
+CHUNK_RECORDS: int = 1 << 12
+SEARCH_CHUNK: int = 1 << 22
+INDEX_NAME: str = "index.json"
+ARCHIVE_VERSION: int = 1
+_VALUE_WIDTH: int = 12
+_VALUES_PER_LINE: int = 6
+_TIME = re.compile(rb'100C.*?([-+]?\d+\.\d*E[-+]?\d+)\s+(\d+)')
+# Fortran drops the E of three digit exponents: 1.00000-100
+_SHORT_EXPONENT = re.compile(rb'(\d)([-+]\d{3})')
+_POWERS_OF_TEN: np.ndarray = 10.0 ** np.arange(128)
+# Digit positions of an E12.5 field (" d.dddddE+dd") and the weights of the mantissa digits
+_MANTISSA_DIGITS: np.ndarray = np.array([1, 3, 4, 5, 6, 7])
+_MANTISSA_WEIGHTS: np.ndarray = 10.0 ** np.arange(5, -1, -1)
+
+
+class FrdBlock():
+    '''Position and layout of the data records of one .frd block. Node blocks
+    are named "NODES", result blocks carry the name of their -4 record.'''
+    def __init__(self, name: str, components: list[str], count: int, offset: int, length: int,
+                 idWidth: int, setIndex: int = 0, step: int = 0, increment: int = 0, time: float = 0.0) -> None:
+        self.name = name
+        self.components = components
+        self.count = count
+        self.offset = offset
+        self.length = length
+        self.idWidth = idWidth
+        self.setIndex = setIndex
+        self.step = step
+        self.increment = increment
+        self.time = time
+
+    def toDict(self) -> dict:
+        return dict(self.__dict__)
+
+    @classmethod
+    def fromDict(cls, block: dict) -> 'FrdBlock':
+        return cls(**block)
+
+
+class FrdReader():
+    '''Reads CalculiX .frd result files without parsing them line by line.
+    The block index is built on first use by reading the block headers only
+    and seeking over the fixed width data records, so a multi GB file is
+    indexed in a few ms. A block is then parsed by seeking straight to it and
+    converting CHUNK_RECORDS records at a time through fixed width numpy
+    byte views; irregular records (three digit exponents, uneven lines)
+    take a slower per line path.'''
+    def __init__(self, fpath: str, chunkRecords: int = CHUNK_RECORDS) -> None:
+        self._fpath = fpath
+        self._chunkRecords = chunkRecords
+        self._nodes: FrdBlock | None = None
+        self._blocks: list[FrdBlock] | None = None
+
+    # Getters
+    def getFilePath(self) -> str:
+        return self._fpath
+
+    def getBlocks(self) -> list[FrdBlock]:
+        '''Result blocks in file order.'''
+        if self._blocks is None:
+            self._buildIndex()
+        return self._blocks
+
+    def getSets(self) -> list[int]:
+        '''Result set indices (one per written time), in file order.'''
+        return sorted({block.setIndex for block in self.getBlocks()})
+
+    def getBlock(self, setIndex: int, name: str) -> FrdBlock:
+        for block in self.getBlocks():
+            if block.setIndex == setIndex and block.name == name:
+                return block
+        raise KeyError(f'{os.path.basename(self._fpath)} has no {name} in result set {setIndex}')
+
+    # Actions
+    def readNodes(self) -> tuple[np.ndarray, np.ndarray]:
+        '''Node labels and (n, 3) coordinates of the first node block.'''
+        self.getBlocks()
+        if self._nodes is None:
+            raise KeyError(f'{os.path.basename(self._fpath)} has no node block')
+        return self._readBlock(self._nodes)
+
+    def read(self, setIndex: int, name: str) -> tuple[np.ndarray, np.ndarray]:
+        '''Node labels and (n, components) values of a result block.'''
+        return self._readBlock(self.getBlock(setIndex, name))
+
+    def export(self, directory: str, dtype: type = np.float32) -> str:
+        '''Writes every block as .npy (values as float32 by default, .frd
+        values carry 6 significant digits) with an index.json, see FrdArchive.
+        Node labels of result blocks are only stored when they differ from
+        the node block. Returns the directory.'''
+        os.makedirs(directory, exist_ok=True)
+        blocks: list[dict] = []
+        nodeIds = None
+        self.getBlocks()
+        if self._nodes is not None:
+            nodeIds, coords = self.readNodes()
+            np.save(os.path.join(directory, "node_ids.npy"), _compactLabels(nodeIds))
+            np.save(os.path.join(directory, "nodes.npy"), coords)
+        for block in self.getBlocks():
+            ids, values = self._readBlock(block)
+            entry = block.toDict()
+            entry["file"] = f'{block.setIndex:05d}_{_fileName(block.name)}.npy'
+            np.save(os.path.join(directory, entry["file"]), values.astype(dtype))
+            if nodeIds is None or not np.array_equal(ids, nodeIds):
+                entry["ids_file"] = f'{block.setIndex:05d}_{_fileName(block.name)}_ids.npy'
+                np.save(os.path.join(directory, entry["ids_file"]), _compactLabels(ids))
+            blocks.append(entry)
+        stat = os.stat(self._fpath)
+        index = {"version": ARCHIVE_VERSION, "source": os.path.abspath(self._fpath),
+                 "source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns, "blocks": blocks}
+        tmp = os.path.join(directory, f'{INDEX_NAME}.tmp')
+        with open(tmp, "w") as f:
+            json.dump(index, f, indent=1)
+        os.replace(tmp, os.path.join(directory, INDEX_NAME))
+        return directory
+
+    # Index
+    def _buildIndex(self) -> None:
+        self._blocks = []
+        setInfo: tuple[int, int, int] = (0, 0, 0)
+        with open(self._fpath, "rb") as f:
+            while True:
+                line = f.readline()
+                if not line:
+                    break
+                key = line.lstrip()
+                if key.startswith(b"2C"):
+                    block = self._dataBlock(f, "NODES", [], int(line[24:36]), _idWidth(line))
+                    if self._nodes is None:
+                        self._nodes = block
+                elif key.startswith(b"3C"):
+                    # Elements are in the deck, skip to the end of the block
+                    _skipToEnd(f, f.tell())
+                elif key.startswith(b"1PSTEP"):
+                    values = line.split()[1:4]
+                    setInfo = tuple(int(i) for i in values) + (0,) * (3 - len(values))  # type:ignore
+                elif key.startswith(b"100C"):
+                    self._blocks.append(self._resultBlock(f, line, setInfo))
+                elif key.startswith(b"9999"):
+                    break
+
+    def _resultBlock(self, f, header: bytes, setInfo: tuple[int, int, int]) -> FrdBlock:
+        match = _TIME.search(header)
+        time, count = (float(match.group(1)), int(match.group(2))) if match else (0.0, 0)
+        name = ""
+        components: list[str] = []
+        while True:
+            position = f.tell()
+            line = f.readline()
+            if line.startswith(b" -4"):
+                name = line.split()[1].decode()
+            elif line.startswith(b" -5"):
+                component = line.split()[1].decode()
+                # ALL only tells viewers to draw the vector, it has no values
+                if component != "ALL":
+                    components.append(component)
+            else:
+                f.seek(position)
+                break
+        block = self._dataBlock(f, name, components, count, _idWidth(header))
+        block.setIndex, block.increment, block.step = setInfo
+        block.time = time
+        return block
+
+    def _dataBlock(self, f, name: str, components: list[str], count: int, idWidth: int) -> FrdBlock:
+        '''Indexes the records that start at the current position and leaves
+        the file after the -3 line that closes them.'''
+        offset = f.tell()
+        first = f.readline()
+        position = offset
+        if count and first.startswith(b" -1"):
+            # All records are as long as the first one (continuation lines included)
+            recordLength = len(first)
+            while True:
+                line = f.readline()
+                if not line.startswith(b" -2"):
+                    break
+                recordLength += len(line)
+            end = offset + count * recordLength
+            f.seek(end)
+            if f.readline().startswith(b" -3"):
+                return FrdBlock(name, components, count, offset, end - offset, idWidth)
+            position = offset
+        end = _skipToEnd(f, position)
+        return FrdBlock(name, components, count, offset, end - offset, idWidth)
+
+    # Parsing
+    def _readBlock(self, block: FrdBlock) -> tuple[np.ndarray, np.ndarray]:
+        with open(self._fpath, "rb") as f:
+            f.seek(block.offset)
+            data = f.read(block.length)
+        nValues = len(block.components) if block.components else 3
+        if not block.count or not data:
+            return np.empty(0, np.int64), np.empty((0, nValues))
+        layout = _recordLayout(data, nValues, block.idWidth)
+        if layout is not None and len(data) == block.count * layout[0]:
+            try:
+                return self._readFixed(data, block, nValues, layout)
+            except ValueError:
+                pass
+        return _readLines(data, nValues, block.idWidth)
+
+    def _readFixed(self, data: bytes, block: FrdBlock, nValues: int,
+                   layout: tuple[int, np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+        recordLength, starts = layout
+        ids = np.empty(block.count, np.int64)
+        values = np.empty((block.count, nValues))
+        columns = (starts[:, None] + np.arange(_VALUE_WIDTH)).ravel()
+        records = np.frombuffer(data, dtype=np.uint8).reshape(block.count, recordLength)
+        for start in range(0, block.count, self._chunkRecords):
+            chunk = records[start:start + self._chunkRecords]
+            ids[start:start + len(chunk)] = _digits(chunk, 3, 3 + block.idWidth)
+            fields = chunk[:, columns].reshape(len(chunk), nValues, _VALUE_WIDTH)
+            parsed = _parseE125(fields)
+            if parsed is None:
+                parsed = np.ascontiguousarray(fields).view(f'S{_VALUE_WIDTH}')[..., 0].astype(np.float64)
+            values[start:start + len(chunk)] = parsed
+        return ids, values
+
+
+class FrdArchive():
+    '''Blocks exported by FrdReader.export, opened as read-only memory maps.'''
+    def __init__(self, directory: str) -> None:
+        self._directory = directory
+        with open(os.path.join(directory, INDEX_NAME), "r") as f:
+            index = json.load(f)
+        if index.get("version", 0) > ARCHIVE_VERSION:
+            raise ValueError(f'{directory} was written by a newer yapfc')
+        self._source = index.get("source", "")
+        self._sourceStat = (index.get("source_size"), index.get("source_mtime_ns"))
+        self._entries = index["blocks"]
+        self._blocks = [FrdBlock.fromDict({k: v for k, v in i.items() if k not in ("file", "ids_file")})
+                        for i in self._entries]
+
+    # Getters
+    def getBlocks(self) -> list[FrdBlock]:
+        return self._blocks
+
+    def getSets(self) -> list[int]:
+        return sorted({block.setIndex for block in self._blocks})
+
+    def isCurrent(self) -> bool:
+        '''False once the source .frd was rewritten (or removed) since the export.'''
+        try:
+            stat = os.stat(self._source)
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime_ns) == self._sourceStat
+
+    # Actions
+    def readNodes(self) -> tuple[np.ndarray, np.ndarray]:
+        return self._load("node_ids.npy"), self._load("nodes.npy")
+
+    def read(self, setIndex: int, name: str) -> tuple[np.ndarray, np.ndarray]:
+        for entry in self._entries:
+            if entry["setIndex"] == setIndex and entry["name"] == name:
+                ids = self._load(entry["ids_file"]) if "ids_file" in entry else self._load("node_ids.npy")
+                return ids, self._load(entry["file"])
+        raise KeyError(f'{self._directory} has no {name} in result set {setIndex}')
+
+    # Internal
+    def _load(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self._directory, name), mmap_mode="r")
+
+
+def iterBlocks(fpath: str) -> Iterator[tuple[FrdBlock, np.ndarray, np.ndarray]]:
+    '''Every result block of a .frd with its node labels and values, one
+    block in memory at a time.'''
+    reader = FrdReader(fpath)
+    for block in reader.getBlocks():
+        yield block, *reader.read(block.setIndex, block.name)
+
+def _idWidth(header: bytes) -> int:
+    '''Label width of the records, the last field of a block header is the
+    format: 0 short (I5), 1 long (I10).'''
+    fields = header.split()
+    return 5 if fields and fields[-1] == b"0" else 10
+
+def _skipToEnd(f, start: int) -> int:
+    '''Searches for the -3 line that closes a block from start on. Returns
+    its offset and leaves the file after it.'''
+    f.seek(start)
+    if f.read(3) == b" -3":
+        f.readline()
+        return start
+    position = start
+    tail = b""
+    while True:
+        f.seek(position)
+        chunk = f.read(SEARCH_CHUNK)
+        if not chunk:
+            f.seek(position)
+            return position
+        data = tail + chunk
+        found = data.find(b"\n -3")
+        if found >= 0:
+            end = position - len(tail) + found + 1
+            f.seek(end)
+            f.readline()
+            return end
+        tail = data[-3:]
+        position += len(chunk)
+
+def _recordLayout(data: bytes, nValues: int, idWidth: int) -> tuple[int, np.ndarray] | None:
+    '''Length of one record and the offsets of its value fields, taken from
+    the first record. None when its lines do not look fixed width.'''
+    lines = -(-nValues // _VALUES_PER_LINE)
+    starts: list[int] = []
+    position = 0
+    for line in range(lines):
+        end = data.find(b"\n", position)
+        if end < 0:
+            return None
+        count = min(_VALUES_PER_LINE, nValues - line * _VALUES_PER_LINE)
+        first = position + 3 + idWidth
+        if len(data[first:end].rstrip(b"\r")) != count * _VALUE_WIDTH:
+            return None
+        starts += [first + i * _VALUE_WIDTH for i in range(count)]
+        position = end + 1
+    return position, np.array(starts)
+
+def _parseE125(fields: np.ndarray) -> np.ndarray | None:
+    '''Decodes (..., 12) bytes in Fortran E12.5 layout (" d.dddddE+dd")
+    from their digits, several times faster than converting them as strings.
+    Identical to strtod for exponents within +-22 of the mantissa, within an
+    ulp beyond. None when any field deviates from the layout.'''
+    if not (np.all(fields[..., 2] == ord(".")) and np.all(fields[..., 8] == ord("E"))):
+        return None
+    # The byte codes are summed as they are, the offset of "0" is taken off once
+    mantissa = fields[..., _MANTISSA_DIGITS].astype(np.float64) @ _MANTISSA_WEIGHTS - ord("0") * _MANTISSA_WEIGHTS.sum()
+    exponent = fields[..., 10].astype(np.int64) * 10 + fields[..., 11] - ord("0") * 11
+    exponent = np.where(fields[..., 9] == ord("-"), -exponent, exponent) - 5
+    # Dividing by an exact power of ten rounds like strtod does
+    scale = _POWERS_OF_TEN[np.abs(exponent)]
+    values = np.where(exponent >= 0, mantissa * scale, mantissa / scale)
+    return np.where(fields[..., 0] == ord("-"), -values, values)
+
+def _digits(fields: np.ndarray, start: int, end: int) -> np.ndarray:
+    '''Integer value of the digit bytes fields[..., start:end], blanks count as 0.'''
+    value = np.zeros(fields.shape[:-1], np.int64)
+    for position in range(start, end):
+        digit = fields[..., position].astype(np.int64) - ord("0")
+        value = value * 10 + np.where(digit >= 0, digit, 0)
+    return value
+
+def _readLines(data: bytes, nValues: int, idWidth: int) -> tuple[np.ndarray, np.ndarray]:
+    ids: list[int] = []
+    values: list[list[float]] = []
+    for line in data.splitlines():
+        if line.startswith(b" -1"):
+            ids.append(int(line[3:3 + idWidth]))
+            values.append([])
+        elif not line.startswith(b" -2"):
+            continue
+        text = line[3 + idWidth:].rstrip()
+        values[-1] += [float(_SHORT_EXPONENT.sub(rb'\1E\2', text[i:i + _VALUE_WIDTH]))
+                       for i in range(0, len(text), _VALUE_WIDTH)]
+    array = np.zeros((len(values), nValues))
+    for row, rowValues in enumerate(values):
+        array[row, :len(rowValues)] = rowValues[:nValues]
+    return np.array(ids, dtype=np.int64), array
+
+def _compactLabels(ids: np.ndarray) -> np.ndarray:
+    return ids.astype(np.int32) if not len(ids) or ids.max() < 2**31 else ids
+
+def _fileName(name: str) -> str:
+    return re.sub(r'[^\w.-]', "_", name)
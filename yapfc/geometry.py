@@ -0,0 +1,150 @@
+import os
+import time
+import hashlib
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from yapfc.meshCache import MeshCache, GMSH_CACHE_DIR
+from yapfc.meshData import LoadCancelled
+
+GEOMETRY_EXTENSIONS: tuple[str, ...] = (".geo", ".stp", ".step", ".brep", ".igs", ".iges")
+
+# Parameter name -> gmsh command line option, anything else is passed as -setnumber
+# so that DefineConstant values of .geo files (e.g. N in testing_data/hex.geo) can be overridden
+GMSH_OPTIONS: dict[str, str] = {
+    "clmax": "-clmax",
+    "clmin": "-clmin",
+    "clscale": "-clscale",
+    "order": "-order",
+}
+
+
+def isGeometryFile(fpath: str) -> bool:
+    return fpath.lower().endswith(GEOMETRY_EXTENSIONS)
+
+def parseGmshParams(text: str) -> dict[str, float]:
+    '''"N=8, clmax=0.2" -> {"N": 8.0, "clmax": 0.2}'''
+    params: dict[str, float] = {}
+    for item in text.replace(";", ",").split(","):
+        if not item.strip():
+            continue
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f'Expected name=value, got "{item.strip()}"')
+        params[name.strip()] = float(value)
+    return params
+
+def fileHash(fpath: str) -> str:
+    digest = hashlib.sha1()
+    with open(fpath, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class GmshMesher():
+    '''Meshes geometry files with gmsh as a subprocess. Results are cached as
+    .msh files keyed by the geometry content and the parameters, next to the
+    entries of a mesh cache and within its size budget. Without a cache every
+    call runs gmsh and the .msh goes to a temporary directory that the caller
+    removes. The number of concurrently running gmsh processes is bounded by
+    a core budget.'''
+    def __init__(self, gmshPath: str = "gmsh", cache: MeshCache | None = None, cores: int | None = None,
+                 threadsPerJob: int = 1) -> None:
+        self._gmshPath = gmshPath
+        self._cache = cache
+        self._tempDir: str | None = None
+        self._cores = cores or os.cpu_count() or 1
+        self._threadsPerJob = max(1, min(threadsPerJob, self._cores))
+        self._slots = threading.BoundedSemaphore(self.getMaxJobs())
+
+    # Setters
+    def setGmshPath(self, gmshPath: str) -> None:
+        self._gmshPath = gmshPath
+
+    def setCache(self, cache: MeshCache | None) -> None:
+        self._cache = cache
+
+    # Getters
+    def getMaxJobs(self) -> int:
+        return max(1, self._cores // self._threadsPerJob)
+
+    def getKey(self, fpath: str, params: dict[str, float]) -> str:
+        source = fileHash(fpath) + "|" + ",".join(f'{k}={float(v)!r}' for k, v in sorted(params.items()))
+        return hashlib.sha1(source.encode()).hexdigest()
+
+    def getCacheDir(self) -> str:
+        if self._cache is None:
+            if self._tempDir is None:
+                self._tempDir = tempfile.mkdtemp(prefix="yapfc_gmsh_")
+            return self._tempDir
+        return os.path.join(self._cache.getCacheDir(), GMSH_CACHE_DIR)
+
+    def getCachedPath(self, fpath: str, params: dict[str, float]) -> str:
+        return os.path.join(self.getCacheDir(), f'{self.getKey(fpath, params)}.msh')
+
+    # Actions
+    def mesh(self, fpath: str, params: dict[str, float] | None = None,
+             cancelled: Callable[[], bool] | None = None) -> str:
+        '''Returns the path of the .msh for fpath, running gmsh only on a cache miss.'''
+        params = params or {}
+        output = self.getCachedPath(fpath, params)
+        if self._cache is not None and os.path.exists(output):
+            os.utime(output)
+            print(f'gmsh cache hit for {fpath} {params}')
+            return output
+
+        os.makedirs(self.getCacheDir(), exist_ok=True)
+        tmp = f'{output}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with self._slots:
+            if cancelled and cancelled():
+                raise LoadCancelled(fpath)
+            start = time.perf_counter()
+            self._run(fpath, params, tmp, cancelled)
+            print(f'gmsh meshed {fpath} {params} in {time.perf_counter() - start:.2f} s')
+        os.replace(tmp, output)
+        if self._cache is not None:
+            self._cache.evict()
+        return output
+
+    def meshMany(self, jobs: list[tuple[str, dict[str, float]]]) -> list[str]:
+        with ThreadPoolExecutor(max_workers=self.getMaxJobs()) as pool:
+            return list(pool.map(lambda job: self.mesh(*job), jobs))
+
+    # Internal
+    def _run(self, fpath: str, params: dict[str, float], output: str,
+             cancelled: Callable[[], bool] | None) -> None:
+        command = [self._gmshPath, fpath, "-3", "-nt", str(self._threadsPerJob), "-format", "msh", "-o", output]
+        for name, value in params.items():
+            if name.lower() in GMSH_OPTIONS:
+                command += [GMSH_OPTIONS[name.lower()], f'{value:g}']
+            else:
+                command += ["-setnumber", name, f'{value:g}']
+
+        log = f'{output}.log'
+        try:
+            with open(log, "wb") as logFile:
+                # Output goes to a file so that a chatty gmsh can never block on a full pipe
+                process = subprocess.Popen(command, stdout=logFile, stderr=subprocess.STDOUT, shell=False)
+                while process.poll() is None:
+                    if cancelled and cancelled():
+                        process.kill()
+                        process.wait()
+                        raise LoadCancelled(fpath)
+                    try:
+                        process.wait(timeout=0.2)
+                    except subprocess.TimeoutExpired:
+                        pass
+            if process.returncode != 0 or not os.path.exists(output):
+                with open(log, "rb") as logFile:
+                    tail = logFile.read()[-2000:].decode(errors="replace")
+                raise RuntimeError(f'gmsh failed with exit code {process.returncode}:\n{tail}')
+        except BaseException:
+            if os.path.exists(output):
+                os.remove(output)
+            raise
+        finally:
+            if os.path.exists(log):
+                os.remove(log)
@@ -0,0 +1,97 @@
+import numpy as np
+
+# Labels up to this multiple of the number of ids get a dense lookup table
+DENSE_FACTOR: int = 4
+
+
+class IdMap():
+    '''Bidirectional map between external labels (CalculiX node/element
+    numbers) and internal zero based indices (VTK point/cell ids).
+    index -> label is an array lookup. label -> index uses a dense table
+    when labels are compact, otherwise a binary search over sorted labels.
+    Labels must be unique, duplicates raise a ValueError.'''
+    def __init__(self, ids: np.ndarray, what: str = "") -> None:
+        self._ids: np.ndarray = np.asarray(ids, dtype=np.int64)
+        self._table: np.ndarray | None = None
+        self._order: np.ndarray | None = None
+        self._sorted: np.ndarray | None = None
+        self._minId = int(self._ids.min()) if len(self._ids) else 0
+        self._maxId = int(self._ids.max()) if len(self._ids) else -1
+        duplicate = self._findDuplicate()
+        if duplicate is not None:
+            raise ValueError(f'Duplicate {what + " " if what else ""}labels, e.g. {duplicate}')
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, label: int) -> bool:
+        return self.toIndices(np.array([label]), strict=False)[0] >= 0
+
+    @classmethod
+    def identity(cls, n: int, start: int = 1) -> 'IdMap':
+        return cls(np.arange(start, start + n, dtype=np.int64))
+
+    # Getters
+    def getIds(self) -> np.ndarray:
+        return self._ids
+
+    def isDense(self) -> bool:
+        return self._minId >= 0 and self._maxId <= DENSE_FACTOR * len(self._ids) + 1024
+
+    # Index -> label
+    def toLabel(self, index: int) -> int:
+        return int(self._ids[index])
+
+    def toLabels(self, indices: np.ndarray) -> np.ndarray:
+        return self._ids[indices]
+
+    # Label -> index
+    def toIndex(self, label: int) -> int:
+        index = int(self.toIndices(np.array([label]), strict=False)[0])
+        if index < 0:
+            raise KeyError(label)
+        return index
+
+    def toIndices(self, labels: np.ndarray, strict: bool = True, what: str = "") -> np.ndarray:
+        '''Vectorized label -> index. Unknown labels raise a ValueError, or
+        give -1 when strict is False.'''
+        labels = np.asarray(labels, dtype=np.int64)
+        if len(self._ids) == 0:
+            indices = np.full(labels.shape, -1, dtype=np.int64)
+        elif self.isDense():
+            table = self._getTable()
+            indices = table[np.clip(labels, -1, self._maxId + 1)]
+        else:
+            order, sortedIds = self._getSorted()
+            pos = np.clip(np.searchsorted(sortedIds, labels), 0, len(sortedIds) - 1)
+            indices = np.where(sortedIds[pos] == labels, order[pos], -1)
+        if strict and (indices < 0).any():
+            raise ValueError(f'Undefined {what + " " if what else ""}labels, e.g. {labels[indices < 0].flat[0]}')
+        return indices
+
+    # Internal
+    def _findDuplicate(self) -> int | None:
+        '''A label that occurs more than once, None when all are unique.'''
+        if len(self._ids) == 0:
+            return None
+        if self.isDense():
+            counts = np.bincount(self._ids)
+            duplicates = np.flatnonzero(counts > 1)
+        else:
+            _, sortedIds = self._getSorted()
+            duplicates = sortedIds[1:][sortedIds[1:] == sortedIds[:-1]]
+        return int(duplicates[0]) if len(duplicates) else None
+
+    def _getTable(self) -> np.ndarray:
+        if self._table is None:
+            # Slot maxId + 1 stays -1 and catches every out of range label after clipping
+            table = np.full(self._maxId + 2, -1, dtype=np.int64)
+            table[self._ids] = np.arange(len(self._ids), dtype=np.int64)
+            self._table = table
+        return self._table
+
+    def _getSorted(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._order is None or self._sorted is None:
+            self._order = np.argsort(self._ids, kind="stable")
+            self._sorted = self._ids[self._order]
+        return self._order, self._sorted
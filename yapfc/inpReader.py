@@ -0,0 +1,264 @@
+import os
+import re
+import numpy as np
+from yapfc.meshData import MeshData, CellBlock, CCX_CELL_TYPES, CELL_NODE_COUNT, ProgressCallback
+from yapfc.idMap import IdMap
+
+CHUNK_SIZE: int = 1 << 22
+_KEYWORD_LINE = re.compile(rb'^[ \t]*\*[^\n]*', re.M)
+_INCLUDE_LINE = re.compile(rb'^[ \t]*\*[ \t]*INCLUDE\b[^\n]*', re.M | re.I)
+_SET_NAME = re.compile(rb'[A-Za-z_]')
+_SPLIT = re.compile(rb'[\s,]+')
+
+
+def readInp(fpath: str, chunkSize: int = CHUNK_SIZE, progress: ProgressCallback | None = None) -> MeshData:
+    return InpReader(chunkSize, progress).read(fpath)
+
+def isInpFile(fpath: str) -> bool:
+    '''Abaqus/CalculiX decks do not always carry the .inp extension (see
+    testing_data/abaq), so anything whose first non blank line is a keyword counts.'''
+    if fpath.lower().endswith(".inp"):
+        return True
+    try:
+        with open(fpath, "rb") as f:
+            head = f.read(4096).lstrip()
+    except OSError:
+        return False
+    return head.startswith(b"*")
+
+def includedFiles(fpath: str, chunkSize: int = CHUNK_SIZE) -> list[str]:
+    '''Files a deck pulls in with *INCLUDE, recursively and in reading order.
+    Only the include lines are looked at, chunk by chunk.'''
+    files: list[str] = []
+    def addIncludes(segment: bytes) -> None:
+        for match in _INCLUDE_LINE.finditer(segment):
+            include = _parseKeyword(match.group().strip())[1].get("INPUT", "").strip('"')
+            path = os.path.join(os.path.dirname(fpath), include)
+            if path not in files:
+                files.append(path)
+                files.extend(i for i in includedFiles(path, chunkSize) if i not in files)
+    with open(fpath, "rb") as f:
+        remainder = b""
+        while True:
+            chunk = f.read(chunkSize)
+            if not chunk:
+                break
+            chunk = remainder + chunk
+            cut = chunk.rfind(b"\n") + 1
+            remainder = chunk[cut:]
+            addIncludes(chunk[:cut])
+        addIncludes(remainder)
+    return files
+
+class InpReader():
+    '''Streams *NODE, *ELEMENT, *NSET and *ELSET data of a deck (following
+    *INCLUDE) in fixed size chunks. Data lines are never split in Python,
+    whole segments between keyword lines are parsed by numpy at once.'''
+    def __init__(self, chunkSize: int = CHUNK_SIZE, progress: ProgressCallback | None = None) -> None:
+        self._chunkSize = chunkSize
+        self._progress = progress
+        self._bytesRead = 0
+        self._bytesTotal = 0
+        self._nodeIds: list[np.ndarray] = []
+        self._nodeCoords: list[np.ndarray] = []
+        # CalculiX element type -> (n, 1 + nodes) arrays of label + node labels
+        self._elements: dict[str, list[np.ndarray]] = {}
+        # (kind, name, labels, referenced set names) in definition order
+        self._sets: list[tuple[str, str, np.ndarray, list[str]]] = []
+        self._state: dict | None = None
+
+    def read(self, fpath: str) -> MeshData:
+        self._readFile(fpath)
+        self._finishBlock()
+        return self._assemble()
+
+    # Streaming
+    def _readFile(self, fpath: str) -> None:
+        self._bytesTotal += os.path.getsize(fpath)
+        with open(fpath, "rb") as f:
+            remainder = b""
+            while True:
+                chunk = f.read(self._chunkSize)
+                if not chunk:
+                    break
+                self._bytesRead += len(chunk)
+                if self._progress:
+                    self._progress("read", self._bytesRead, self._bytesTotal)
+                chunk = remainder + chunk
+                cut = chunk.rfind(b"\n") + 1
+                if cut == 0:
+                    remainder = chunk
+                    continue
+                remainder = chunk[cut:]
+                self._parseChunk(chunk[:cut], fpath)
+            if remainder:
+                self._parseChunk(remainder + b"\n", fpath)
+
+    def _parseChunk(self, chunk: bytes, fpath: str) -> None:
+        position = 0
+        for match in _KEYWORD_LINE.finditer(chunk):
+            self._parseData(chunk[position:match.start()])
+            position = match.end()
+            line = match.group().strip()
+            if line.startswith(b"**"):
+                continue
+            self._finishBlock()
+            keyword, params = _parseKeyword(line)
+            self._startBlock(keyword, params, fpath)
+        self._parseData(chunk[position:])
+
+    def _startBlock(self, keyword: str, params: dict[str, str], fpath: str) -> None:
+        match keyword:
+            case "NODE":
+                self._state = {"kind": "node", "nset": params.get("NSET"), "ids": []}
+            case "ELEMENT":
+                ccxType = params.get("TYPE", "").upper()
+                if ccxType not in CCX_CELL_TYPES:
+                    print(f'Skipped unsupported element type {ccxType}')
+                    self._state = None
+                    return
+                self._state = {"kind": "element", "type": ccxType, "elset": params.get("ELSET"),
+                               "pending": np.empty(0, np.int64), "ids": [],
+                               "rowLength": CELL_NODE_COUNT[CCX_CELL_TYPES[ccxType]] + 1}
+            case "NSET" | "ELSET":
+                kind = keyword.lower()
+                self._state = {"kind": kind, "name": params.get(keyword, ""),
+                               "generate": "GENERATE" in params, "labels": [], "refs": []}
+            case "INCLUDE":
+                self._state = None
+                include = params.get("INPUT", "").strip('"')
+                self._readFile(os.path.join(os.path.dirname(fpath), include))
+            case _:
+                self._state = None
+
+    def _parseData(self, segment: bytes) -> None:
+        state = self._state
+        if state is None or not segment.strip():
+            return
+        match state["kind"]:
+            case "node":
+                values = np.fromstring(segment.replace(b",", b" "), sep=" ")
+                rows = _rows(values, _valuesPerLine(segment))
+                ids = rows[:, 0].astype(np.int64)
+                # Omitted trailing coordinates are 0.0
+                coords = np.zeros((len(rows), 3))
+                coords[:, :min(3, rows.shape[1] - 1)] = rows[:, 1:4]
+                self._nodeIds.append(ids)
+                self._nodeCoords.append(coords)
+                state["ids"].append(ids)
+            case "element":
+                # Records may continue over several lines, so rows are cut from the token stream
+                values = np.fromstring(segment.replace(b",", b" "), dtype=np.int64, sep=" ")
+                values = np.concatenate([state["pending"], values])
+                rowLength = state["rowLength"]
+                full = len(values) // rowLength * rowLength
+                state["pending"] = values[full:]
+                if full:
+                    rows = values[:full].reshape(-1, rowLength)
+                    self._elements.setdefault(state["type"], []).append(rows)
+                    state["ids"].append(rows[:, 0])
+            case "nset" | "elset":
+                if _SET_NAME.search(segment):
+                    labels: list[int] = []
+                    for token in _SPLIT.split(segment.strip()):
+                        if not token:
+                            continue
+                        if token.lstrip(b"-").isdigit():
+                            labels.append(int(token))
+                        else:
+                            state["refs"].append(token.decode())
+                    values = np.array(labels, dtype=np.int64)
+                else:
+                    values = np.fromstring(segment.replace(b",", b" "), dtype=np.int64, sep=" ")
+                state["labels"].append(values)
+
+    def _finishBlock(self) -> None:
+        state = self._state
+        self._state = None
+        if state is None:
+            return
+        match state["kind"]:
+            case "node":
+                if state["nset"] and state["ids"]:
+                    self._sets.append(("nset", state["nset"], np.concatenate(state["ids"]), []))
+            case "element":
+                if len(state["pending"]):
+                    raise ValueError(f'Incomplete {state["type"]} element record')
+                if state["elset"] and state["ids"]:
+                    self._sets.append(("elset", state["elset"], np.concatenate(state["ids"]), []))
+            case "nset" | "elset":
+                labels = np.concatenate(state["labels"]) if state["labels"] else np.empty(0, np.int64)
+                if state["generate"]:
+                    ranges = labels.reshape(-1, 3)
+                    labels = np.concatenate([np.arange(a, b + 1, c) for a, b, c in ranges] or [labels])
+                self._sets.append((state["kind"], state["name"], labels, state["refs"]))
+
+    # Assembly
+    def _assemble(self) -> MeshData:
+        nodeIds = np.concatenate(self._nodeIds) if self._nodeIds else np.empty(0, np.int64)
+        self._nodeIds.clear()
+        points = np.concatenate(self._nodeCoords) if self._nodeCoords else np.empty((0, 3))
+        self._nodeCoords.clear()
+
+        nodeMap = IdMap(nodeIds, "node")
+        blocks: list[CellBlock] = []
+        elementIds: list[np.ndarray] = []
+        for ccxType, chunks in self._elements.items():
+            rows = np.concatenate(chunks)
+            chunks.clear()
+            elementIds.append(rows[:, 0].copy())
+            connectivity = nodeMap.toIndices(rows[:, 1:], what="node")
+            blocks.append(CellBlock(CCX_CELL_TYPES[ccxType], connectivity, ccxType))
+        elementIdArray = np.concatenate(elementIds) if elementIds else np.empty(0, np.int64)
+        maps = {"nset": (nodeMap, "node"), "elset": (IdMap(elementIdArray, "element"), "element")}
+
+        nodeSets: dict[str, np.ndarray] = {}
+        elementSets: dict[str, np.ndarray] = {}
+        for kind, name, labels, refs in self._sets:
+            sets = nodeSets if kind == "nset" else elementSets
+            idMap, what = maps[kind]
+            known = {key.upper(): key for key in sets}
+            parts = [sets[name]] if name in sets else []
+            parts.append(idMap.toIndices(labels, what=what))
+            for ref in refs:
+                if ref.upper() in known:
+                    parts.append(sets[known[ref.upper()]])
+                else:
+                    print(f'Set {name} references unknown set {ref}')
+            sets[name] = np.unique(np.concatenate(parts))
+        # The maps built for the translation above are reused
+        return MeshData(points, blocks, nodeIds, elementIdArray, nodeSets, elementSets, nodeMap, maps["elset"][0])
+
+
+def _valuesPerLine(segment: bytes) -> np.ndarray:
+    '''Number of values on every non blank line of a data segment.'''
+    raw = np.frombuffer(segment, dtype=np.uint8)
+    # Spaces, tabs, line breaks and commas, every other byte belongs to a value
+    separator = (raw <= 32) | (raw == 44)
+    starts = np.flatnonzero(separator[:-1] > separator[1:]) + 1
+    if len(raw) and not separator[0]:
+        starts = np.concatenate([[0], starts])
+    lineEnds = np.concatenate([np.flatnonzero(raw == 10), [len(raw)]])
+    counts = np.diff(np.searchsorted(starts, lineEnds), prepend=0)
+    return counts[counts > 0]
+
+def _rows(values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    '''values cut into one row per line, short lines padded with 0.0.'''
+    if len(counts) == 0:
+        return values.reshape(0, 1)
+    width = int(counts.max())
+    if (counts == width).all():
+        return values.reshape(-1, width)
+    rows = np.zeros((len(counts), width))
+    lines = np.repeat(np.arange(len(counts)), counts)
+    rows[lines, np.arange(len(values)) - np.repeat(np.cumsum(counts) - counts, counts)] = values
+    return rows
+
+def _parseKeyword(line: bytes) -> tuple[str, dict[str, str]]:
+    parts = line.decode(errors="replace").lstrip()[1:].split(",")
+    params: dict[str, str] = {}
+    for part in parts[1:]:
+        key, _, value = part.partition("=")
+        if key.strip():
+            params[key.strip().upper()] = value.strip()
+    return " ".join(parts[0].split()).upper(), params
@@ -0,0 +1,125 @@
+import os
+import re
+import numpy as np
+from typing import Iterator
+from yapfc.meshData import MeshData, CellBlock, CELL_DIMENSION, DEFAULT_CCX_TYPES
+
+# Rows formatted by one % operation, large enough to amortize the Python overhead
+CHUNK_ROWS: int = 50_000
+# CalculiX reads at most 16 entries per data line
+ENTRIES_PER_LINE: int = 16
+WRITE_BUFFER: int = 1 << 20
+_UNSAFE = re.compile(r'[^\w.-]')
+
+
+def rowFormat(entries: int, entry: str = "%d", perLine: int = ENTRIES_PER_LINE) -> str:
+    '''"%d, %d, ...\\n" for one record, continued on a new line every perLine entries.'''
+    parts: list[str] = []
+    for i in range(entries):
+        parts.append(entry)
+        if i == entries - 1:
+            parts.append("\n")
+        elif (i + 1) % perLine == 0:
+            parts.append(",\n")
+        else:
+            parts.append(", ")
+    return "".join(parts)
+
+def formatRows(rows: np.ndarray, fmt: str) -> Iterator[str]:
+    '''Formats a 2D array CHUNK_ROWS records at a time with a single string
+    % operation per chunk instead of one per line.'''
+    for start in range(0, len(rows), CHUNK_ROWS):
+        chunk = rows[start:start + CHUNK_ROWS]
+        yield (fmt * len(chunk)) % tuple(chunk.ravel().tolist())
+
+def formatLabels(labels: np.ndarray) -> Iterator[str]:
+    full = len(labels) // ENTRIES_PER_LINE * ENTRIES_PER_LINE
+    yield from formatRows(labels[:full].reshape(-1, ENTRIES_PER_LINE), rowFormat(ENTRIES_PER_LINE))
+    if full < len(labels):
+        yield rowFormat(len(labels) - full) % tuple(labels[full:].tolist())
+
+def exportedBlocks(data: MeshData) -> list[tuple[int, CellBlock]]:
+    '''(first cell index, block) of the blocks that become *ELEMENT blocks.
+    Decks read from .inp keep every block. For other sources only the blocks of
+    the highest dimension are kept, so the boundary triangles and lines a gmsh
+    volume mesh carries are not turned into shell and beam elements.'''
+    starts = np.cumsum([0] + [len(block) for block in data.blocks])
+    blocks = [(int(start), block) for start, block in zip(starts, data.blocks) if block.cellType in DEFAULT_CCX_TYPES]
+    if all(block.ccxType for _, block in blocks):
+        return blocks
+    dimension = max((CELL_DIMENSION[block.cellType] for _, block in blocks), default=0)
+    return [(start, block) for start, block in blocks if CELL_DIMENSION[block.cellType] == dimension]
+
+def iterMeshInp(data: MeshData, elset: str = "EALL") -> Iterator[str]:
+    '''*NODE, *ELEMENT, *NSET and *ELSET blocks of data with CalculiX labels.'''
+    yield "*NODE, NSET=NALL\n"
+    nodes = np.column_stack([data.nodeIds.astype(np.float64), data.points])
+    yield from formatRows(nodes, "%d, %.12e, %.12e, %.12e\n")
+
+    exported = np.zeros(data.getNumberOfCells(), dtype=bool)
+    for start, block in exportedBlocks(data):
+        ccxType = block.ccxType or DEFAULT_CCX_TYPES[block.cellType]
+        connectivity = block.connectivity
+        labels = data.elementIds[start:start + len(block)]
+        exported[start:start + len(block)] = True
+        yield f"*ELEMENT, TYPE={ccxType}, ELSET={elset}\n"
+        for chunkStart in range(0, len(block), CHUNK_ROWS):
+            rows = np.column_stack([labels[chunkStart:chunkStart + CHUNK_ROWS],
+                                    data.nodeMap.toLabels(connectivity[chunkStart:chunkStart + CHUNK_ROWS])])
+            yield from formatRows(rows, rowFormat(rows.shape[1]))
+
+    for name, indices in data.nodeSets.items():
+        yield f"*NSET, NSET={name}\n"
+        yield from formatLabels(data.nodeIds[indices])
+    for name, indices in data.elementSets.items():
+        indices = indices[exported[indices]]
+        if len(indices):
+            yield f"*ELSET, ELSET={name}\n"
+            yield from formatLabels(data.elementIds[indices])
+
+def writeMeshInp(data: MeshData, fpath: str, elset: str = "EALL") -> None:
+    tmp = f'{fpath}.tmp'
+    with open(tmp, "w", buffering=WRITE_BUFFER) as f:
+        for text in iterMeshInp(data, elset):
+            f.write(text)
+    os.replace(tmp, fpath)
+
+def includeName(name: str) -> str:
+    return _UNSAFE.sub('_', name) + ".mesh.inp"
+
+def includeLine(fpath: str, deckDir: str) -> str:
+    return f'*INCLUDE, INPUT={os.path.relpath(fpath, deckDir).replace(os.sep, "/")}'
+
+
+class MeshInclude():
+    '''A mesh exported to a *NODE/*ELEMENT/*NSET/*ELSET include file. The file
+    is written once, later decks reuse it as long as it is the one written here,
+    wherever they are, so the *INCLUDE path of a deck does not change.'''
+    def __init__(self, data: MeshData, sourcePath: str | None = None) -> None:
+        self._data = data
+        self._sourcePath = sourcePath
+        # (path, size, mtime) of the include file as last written by export
+        self._exported: tuple[str, int, int] | None = None
+
+    # Getters
+    def getData(self) -> MeshData:
+        return self._data
+
+    def getSourcePath(self) -> str | None:
+        return self._sourcePath
+
+    # Actions
+    def export(self, fpath: str) -> str:
+        '''Path of the include, fpath when there is no earlier export still on disk.'''
+        if self._exported is not None:
+            path, size, mtime = self._exported
+            try:
+                stat = os.stat(path)
+                if (stat.st_size, stat.st_mtime_ns) == (size, mtime):
+                    return path
+            except FileNotFoundError:
+                pass
+        writeMeshInp(self._data, fpath)
+        stat = os.stat(fpath)
+        self._exported = (fpath, stat.st_size, stat.st_mtime_ns)
+        return fpath
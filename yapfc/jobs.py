@@ -0,0 +1,248 @@
+import os
+import time
+import threading
+from collections import deque
+from enum import Enum, auto
+from PySide6.QtCore import QObject, QProcess, QProcessEnvironment, QRunnable, Signal
+from yapfc.resultCache import ResultCache
+from yapfc.coreBudget import CoreBudget, THREAD_ENVIRONMENT
+from yapfc.autoTune import SolverTuning, autoTune
+
+
+class JobState(Enum):
+    Queued = auto()
+    Running = auto()
+    Finished = auto()
+    Failed = auto()
+    Cancelled = auto()
+
+
+class SolverJob(QObject):
+    '''One solver run as a QProcess. stdout and stderr are merged and drained
+    as soon as data arrives, so a verbose solve can never block on a full pipe.'''
+    output = Signal(object, str)  # job, text
+    started = Signal(object)  # job
+    finished = Signal(object)  # job
+
+    def __init__(self, name: str, program: str, arguments: list[str], workDir: str,
+                 cache: ResultCache | None = None, cacheKey: str | None = None,
+                 environment: dict[str, str] | None = None, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._name = name
+        self._program = program
+        self._arguments = arguments
+        self._workDir = workDir
+        self._cache = cache
+        self._cacheKey = cacheKey
+        self._environment = environment or {}
+        self._state = JobState.Queued
+        self._exitCode: int | None = None
+        self._startTime = 0.0
+        self._wallTime = 0.0
+        self._process: QProcess | None = None
+
+    # Getters
+    def getName(self) -> str:
+        return self._name
+
+    def getWorkDir(self) -> str:
+        return self._workDir
+
+    def getState(self) -> JobState:
+        return self._state
+
+    def getExitCode(self) -> int | None:
+        return self._exitCode
+
+    def getWallTime(self) -> float:
+        if self._state == JobState.Running:
+            return time.perf_counter() - self._startTime
+        return self._wallTime
+
+    def isActive(self) -> bool:
+        return self._state in (JobState.Queued, JobState.Running)
+
+    def getProcessId(self) -> int:
+        return self._process.processId() if self._process is not None else 0
+
+    # Actions
+    def start(self, environment: dict[str, str] | None = None) -> None:
+        '''environment comes from the core budget, the job's own settings win
+        but its thread counts stay within those of the budget.'''
+        budget = environment or {}
+        environment = {**budget, **self._environment}
+        for name in THREAD_ENVIRONMENT:
+            if name in budget and name in self._environment:
+                environment[name] = str(min(int(budget[name]), int(self._environment[name])))
+        process = QProcess(self)
+        process.setProgram(self._program)
+        process.setArguments(self._arguments)
+        process.setWorkingDirectory(self._workDir)
+        if environment:
+            processEnvironment = QProcessEnvironment.systemEnvironment()
+            for name, value in environment.items():
+                processEnvironment.insert(name, value)
+            process.setProcessEnvironment(processEnvironment)
+        process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
+        process.readyReadStandardOutput.connect(self._drain)
+        process.finished.connect(self._finished)
+        process.errorOccurred.connect(self._error)
+        self._process = process
+        self._state = JobState.Running
+        self._startTime = time.perf_counter()
+        self._startedAt = time.time()
+        process.start()
+        self.started.emit(self)
+
+    def cancel(self) -> None:
+        if self._state == JobState.Queued:
+            self._state = JobState.Cancelled
+            self.finished.emit(self)
+        elif self._state == JobState.Running and self._process is not None:
+            self._state = JobState.Cancelled
+            self._process.kill()
+
+    # Internal
+    def _drain(self) -> None:
+        data = self._process.readAllStandardOutput().data()
+        if data:
+            self.output.emit(self, data.decode(errors="replace"))
+
+    def _finished(self, exitCode: int, exitStatus: QProcess.ExitStatus) -> None:
+        self._drain()
+        self._wallTime = time.perf_counter() - self._startTime
+        self._exitCode = exitCode
+        if self._state != JobState.Cancelled:
+            crashed = exitStatus != QProcess.ExitStatus.NormalExit
+            self._state = JobState.Failed if crashed or exitCode != 0 else JobState.Finished
+        if self._state == JobState.Finished and self._cache is not None and self._cacheKey:
+            self._cache.store(self._cacheKey, os.path.join(self._workDir, self._name), self._startedAt)
+        self.finished.emit(self)
+
+    def _error(self, error: QProcess.ProcessError) -> None:
+        # A process that never started does not emit finished
+        if error == QProcess.ProcessError.FailedToStart:
+            self.output.emit(self, f'Unable to start {self._program}: {self._process.errorString()}\n')
+            self._state = JobState.Failed
+            self._wallTime = time.perf_counter() - self._startTime
+            self.finished.emit(self)
+
+
+class JobManager(QObject):
+    '''Queues solver jobs and runs as many of them at the same time as the
+    core budget allows. Every job gets the thread settings of the cores the
+    budget gives it when it starts and is optionally pinned to them.'''
+    jobStarted = Signal(object)
+    jobOutput = Signal(object, str)
+    jobFinished = Signal(object)
+
+    def __init__(self, budget: CoreBudget | None = None, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._budget = budget or CoreBudget()
+        self._queue: deque[SolverJob] = deque()
+        # running job -> its cpus
+        self._running: dict[SolverJob, list[int]] = {}
+        self._jobs: list[SolverJob] = []
+
+    # Setters
+    def setMaxJobs(self, maxJobs: int) -> None:
+        self._budget.setMaxJobs(maxJobs)
+        self._startNext()
+
+    # Getters
+    def getBudget(self) -> CoreBudget:
+        return self._budget
+
+    def getMaxJobs(self) -> int:
+        return self._budget.getMaxJobs()
+
+    def getCpus(self, job: SolverJob) -> list[int]:
+        '''Cpus a running job got from the budget.'''
+        return self._running.get(job, [])
+
+    def getJobs(self) -> list[SolverJob]:
+        return list(self._jobs)
+
+    def getLastJob(self, name: str) -> SolverJob | None:
+        for job in reversed(self._jobs):
+            if job.getName() == name:
+                return job
+        return None
+
+    # Actions
+    def submit(self, job: SolverJob) -> SolverJob:
+        job.setParent(self)
+        job.started.connect(self.jobStarted)
+        job.output.connect(self.jobOutput)
+        job.finished.connect(self._jobFinished)
+        self._jobs.append(job)
+        self._queue.append(job)
+        self._startNext()
+        return job
+
+    def cancel(self, job: SolverJob) -> None:
+        if job in self._queue:
+            self._queue.remove(job)
+        job.cancel()
+
+    def cancelAll(self) -> None:
+        for job in list(self._queue) + list(self._running):
+            self.cancel(job)
+
+    # Internal
+    def _startNext(self) -> None:
+        while self._queue:
+            cpus = self._budget.acquire(len(self._queue))
+            if cpus is None:
+                break
+            job = self._queue.popleft()
+            self._running[job] = cpus
+            job.start(self._budget.getEnvironment(cpus))
+            if job.getProcessId():
+                self._budget.pin(job.getProcessId(), cpus)
+
+    def _jobFinished(self, job: SolverJob) -> None:
+        if job in self._running:
+            self._budget.release(self._running.pop(job))
+        self.jobFinished.emit(job)
+        self._startNext()
+
+
+class AutoTuneSignals(QObject):
+    progress = Signal(int, int, object)  # done, total, trial
+    finished = Signal(str, object)  # deck path, best config or None
+    failed = Signal(str, str)  # deck path, error message
+
+
+class AutoTuneTask(QRunnable):
+    '''Runs the solver trials of autoTune on a QThreadPool thread. The trials
+    run one by one outside the JobManager, so queued jobs do not skew them.'''
+    def __init__(self, deckPath: str, ccxPath: str, cores: int, tuning: SolverTuning,
+                 nodes: int | None = None) -> None:
+        super().__init__()
+        self.setAutoDelete(False)
+        self.signals = AutoTuneSignals()
+        self._deckPath = deckPath
+        self._ccxPath = ccxPath
+        self._cores = cores
+        self._tuning = tuning
+        self._nodes = nodes
+        self._cancelEvent = threading.Event()
+
+    # Getters
+    def getDeckPath(self) -> str:
+        return self._deckPath
+
+    # Actions
+    def cancel(self) -> None:
+        '''Stops after the running trial.'''
+        self._cancelEvent.set()
+
+    def run(self) -> None:
+        try:
+            best = autoTune(self._deckPath, self._ccxPath, self._cores, self._tuning, self._nodes,
+                            self.signals.progress.emit, self._cancelEvent.is_set)
+        except Exception as e:
+            self.signals.failed.emit(self._deckPath, str(e))
+        else:
+            self.signals.finished.emit(self._deckPath, best)
@@ -0,0 +1,122 @@
+import threading
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from yapfc.mesh import Mesh
+from yapfc.meshCache import MeshCache
+from yapfc.meshData import LoadCancelled
+from yapfc.geometry import GmshMesher, isGeometryFile
+
+
+class MeshLoadSignals(QObject):
+    progress = Signal(str, str, int, int)  # fpath, stage, done, total
+    finished = Signal(str, object)  # fpath, Mesh
+    failed = Signal(str, str)  # fpath, error message
+    cancelled = Signal(str)  # fpath
+
+
+class MeshLoadTask(QRunnable):
+    '''Parses, converts and colors one mesh on a QThreadPool thread. Results
+    travel back through queued signals, so slots run on the UI thread.'''
+    def __init__(self, fpath: str, cache: MeshCache | None = None,
+                 mesher: GmshMesher | None = None, params: dict[str, float] | None = None) -> None:
+        super().__init__()
+        self.setAutoDelete(False)
+        self.signals = MeshLoadSignals()
+        self._fpath = fpath
+        self._cache = cache
+        self._mesher = mesher
+        self._params = params
+        self._cancelEvent = threading.Event()
+
+    # Getters
+    def getFilePath(self) -> str:
+        return self._fpath
+
+    # Actions
+    def cancel(self) -> None:
+        self._cancelEvent.set()
+
+    def run(self) -> None:
+        try:
+            fpath = self._fpath
+            if self._mesher is not None and isGeometryFile(fpath):
+                self._report("mesh", 0, 1)
+                fpath = self._mesher.mesh(fpath, self._params, self._cancelEvent.is_set)
+                self._report("mesh", 1, 1)
+            mesh = Mesh(fpath, self._cache, self._report, self._fpath)
+            if self._cancelEvent.is_set():
+                raise LoadCancelled(self._fpath)
+        except LoadCancelled:
+            self.signals.cancelled.emit(self._fpath)
+        except Exception as e:
+            self.signals.failed.emit(self._fpath, str(e))
+        else:
+            self.signals.finished.emit(self._fpath, mesh)
+
+    # Internal
+    def _report(self, stage: str, done: int, total: int) -> None:
+        if self._cancelEvent.is_set():
+            raise LoadCancelled(self._fpath)
+        self.signals.progress.emit(self._fpath, stage, done, total)
+
+
+class FaceIndexSignals(QObject):
+    finished = Signal(object)  # Mesh
+    failed = Signal(str, str)  # fpath, error message
+
+
+class FaceIndexTask(QRunnable):
+    '''Builds (or reads from the cache) the face index of a loaded mesh, so
+    that surface picking on a large mesh does not stall the UI.'''
+    def __init__(self, mesh: Mesh) -> None:
+        super().__init__()
+        self.setAutoDelete(False)
+        self.signals = FaceIndexSignals()
+        self._mesh = mesh
+
+    def run(self) -> None:
+        try:
+            self._mesh.getFaceIndex()
+        except Exception as e:
+            self.signals.failed.emit(self._mesh.getFilePath(), str(e))
+        else:
+            self.signals.finished.emit(self._mesh)
+
+
+class MeshLoader(QObject):
+    '''Runs MeshLoadTasks and FaceIndexTasks in parallel and keeps them alive
+    until they report back.'''
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._tasks: list[MeshLoadTask] = []
+        # Kept alive like the load tasks, face indices cannot be cancelled
+        self._indexTasks: list[FaceIndexTask] = []
+
+    def load(self, fpath: str, cache: MeshCache | None = None,
+             mesher: GmshMesher | None = None, params: dict[str, float] | None = None) -> MeshLoadTask:
+        task = MeshLoadTask(fpath, cache, mesher, params)
+        task.signals.finished.connect(lambda *_: self._release(task))
+        task.signals.failed.connect(lambda *_: self._release(task))
+        task.signals.cancelled.connect(lambda *_: self._release(task))
+        self._tasks.append(task)
+        self._pool.start(task)
+        return task
+
+    def indexFaces(self, mesh: Mesh) -> FaceIndexTask:
+        task = FaceIndexTask(mesh)
+        task.signals.finished.connect(lambda *_: self._indexTasks.remove(task))
+        task.signals.failed.connect(lambda *_: self._indexTasks.remove(task))
+        self._indexTasks.append(task)
+        self._pool.start(task)
+        return task
+
+    def cancelAll(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+
+    def getRunningTasks(self) -> list[MeshLoadTask]:
+        return list(self._tasks)
+
+    def _release(self, task: MeshLoadTask) -> None:
+        if task in self._tasks:
+            self._tasks.remove(task)
@@ -1,11 +1,11 @@
-from PySide6.QtWidgets import QMainWindow, QStatusBar, QVBoxLayout, QDockWidget, QTreeView, QMenu, QInputDialog, QFileDialog, QWidget
-from PySide6.QtGui import  QAction, QStandardItemModel, QStandardItem
-from PySide6.QtCore import Qt, QPoint, QObject, QModelIndex
+from PySide6.QtWidgets import QMainWindow, QStatusBar, QVBoxLayout, QDockWidget, QTreeView, QMenu, QInputDialog, QFileDialog, QWidget, QProgressDialog, QMessageBox, QPlainTextEdit, QApplication
+from PySide6.QtGui import  QAction, QActionGroup, QStandardItemModel, QStandardItem
+from PySide6.QtCore import Qt, QPoint, QObject, QModelIndex, QTimer, QThreadPool
 from yapfc.model import (
     CcxWriter, MeshSubWriter, MaterialSubWriter,
     SectionSubWriter, ConstraintSubWriter, ContactSubWriter,
     AmplitudeSubWriter, InitialConditionSubWriter, StepSubWriter,
-    Label, AnalysisSubWriter, BoundarySubWriter
+    Label, AnalysisSubWriter, BoundarySubWriter, writerFromDict
 )
 import vtk
 import vtkmodules.qt.QVTKRenderWindowInteractor as QVTK
@@ -20,9 +20,29 @@ from vtkmodules.vtkRenderingCore import (
 from typing import Any, cast, List
 from enum import Enum, auto
 import numpy as np
-from yapfc.mesh import Mesh
-from yapfc.runner import run_script, save_inp_file, open_paraview
-from yapfc.dialogs import OptionsDialog, get_option_from_json
+import os
+import re
+from yapfc.mesh import Mesh, SELECTED_COLOR
+from yapfc.loader import MeshLoader
+from yapfc.geometry import GmshMesher, isGeometryFile, parseGmshParams
+from yapfc.meshCache import MeshCache, DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE_MB
+from yapfc.resultCache import ResultCache, DEFAULT_RESULT_CACHE_DIR, DEFAULT_RESULT_CACHE_SIZE_MB
+from yapfc.runner import CCX_ARGS, solver_options, open_paraview
+from yapfc.jobs import JobManager, JobState, SolverJob, AutoTuneTask
+from yapfc.autoTune import SolverTuning, SOLVER_VARIABLE, configEnvironment, modelNodes, sizeBucket
+from yapfc.coreBudget import CoreBudget
+from yapfc.monitorPanel import MonitorPanel
+from yapfc.results import ExodusResults, ResultView
+from yapfc.resultsPanel import ResultsPanel
+from yapfc.selection import SelectionEngine
+from yapfc.markers import PointMarkers, FaceMarkers
+from yapfc.faces import BACKGROUND_CELLS, DEFAULT_FEATURE_ANGLE, surfaceDefinition
+from yapfc.areaSelection import BOX, LASSO, RubberBand, throughIds, visibleIds
+from yapfc.project import PROJECT_EXTENSION, saveProject, readProject
+from yapfc.sweep import SWEEP_JOBS, Sweep, parseRanges, expandVariants, collectTemplateNames
+from yapfc.deck import writeIncrementalDeck, iterAnalysisComponents
+from yapfc.dialogs import OptionsDialog, get_option_from_json, CCXWriterCategory
+from yapfc.meshData import MeshData
 
 class Tools(Enum):
     Options = 0
@@ -47,21 +67,36 @@ def isInsOrSubclsIns(obj:Any, cls:type) -> bool:
     else:
         return False
 
-def collect_components(item):
-    components = [item]  # Start with the current item
-
-    if item.hasChildren():
-        for row in range(item.rowCount()):
-            child_item = item.child(row)
-            components.extend(collect_components(child_item))  # Recursive call
-
-    return components
+def material_cell_groups(data: MeshData, section_texts: list[str]) -> dict[str, np.ndarray]:
+    '''Cell indices per material, from the ELSET/MATERIAL pairs of *... SECTION lines.'''
+    sets = {name.upper(): cells for name, cells in data.elementSets.items()}
+    parts: dict[str, list[np.ndarray]] = {}
+    for text in section_texts:
+        for line in text.splitlines():
+            if not re.match(r'\s*\*\w[\w ]*section\b', line, re.IGNORECASE):
+                continue
+            params = dict((k.strip().upper(), v.strip()) for k, _, v in (p.partition("=") for p in line.split(",")[1:]))
+            elset, material = params.get("ELSET", "").upper(), params.get("MATERIAL", "")
+            if elset in sets and material:
+                parts.setdefault(material, []).append(sets[elset])
+    return {material: np.unique(np.concatenate(cells)) for material, cells in parts.items()}
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
 
         self.mesh:Mesh
+        self.loaded_meshes: list[Mesh] = []
+        self.mesh_loader = MeshLoader(self)
+        self.gmsh_mesher = GmshMesher()
+        self.job_manager = JobManager(CoreBudget(), parent=self)
+        self.job_manager.jobStarted.connect(self.job_started)
+        self.job_manager.jobOutput.connect(self.job_output)
+        self.job_manager.jobFinished.connect(self.job_finished)
+        self.tuning = SolverTuning()
+        self.tune_task: AutoTuneTask | None = None
+        # job -> sweep and variant index of queued and running sweep variants
+        self.sweep_jobs: dict[SolverJob, tuple[Sweep, int]] = {}
         self.options = OptionsDialog(self)
 
         self.setWindowTitle("yapfc")
@@ -78,12 +113,15 @@ class MainWindow(QMainWindow):
 
         self.file_menu = self.menu_bar.addMenu("File")
         self.open_action = QAction("Open", self)
-        self.open_action.triggered.connect(lambda: self.central_widget.AddActor(self.open_mesh()))
-        self.open_action.triggered.connect(lambda: self.central_widget.ResetCamera())
+        self.open_action.triggered.connect(self.open_mesh)
+        self.open_project_action = QAction("Open Project", self)
+        self.open_project_action.triggered.connect(self.open_project)
         self.save_action = QAction("Save", self)
+        self.save_action.triggered.connect(self.save_project)
         self.exit_action = QAction("Exit", self)
         self.exit_action.triggered.connect(self.close)
         self.file_menu.addAction(self.open_action)
+        self.file_menu.addAction(self.open_project_action)
         self.file_menu.addAction(self.save_action)
         self.close_action = QAction("Close", self)
         self.close_action.triggered.connect(lambda: self.central_widget.RemoveActor(self.central_widget.GetAllActors()[0]))
@@ -114,11 +152,51 @@ class MainWindow(QMainWindow):
         self.surface_edges_rep.triggered.connect(lambda: self.central_widget.SetRepresentation(4))
         self.view_menu.addAction(self.surface_edges_rep)
 
+        self.view_menu.addSeparator()
+        self.color_default = QAction("Default colors", self)
+        self.color_default.triggered.connect(lambda: self.color_mesh("default"))
+        self.view_menu.addAction(self.color_default)
+
+        self.color_sets = QAction("Color by element set", self)
+        self.color_sets.triggered.connect(lambda: self.color_mesh("sets"))
+        self.view_menu.addAction(self.color_sets)
+
+        self.color_materials = QAction("Color by material", self)
+        self.color_materials.triggered.connect(lambda: self.color_mesh("materials"))
+        self.view_menu.addAction(self.color_materials)
+
 
         # Selection
         self.selection_menu = self.menu_bar.addMenu("Selection")
         self.selection_menu.addActions([QAction(item.name, self) for item in Selection])
         [item.triggered.connect(lambda _, idx=index: self.central_widget.setSelectionFilter(Selection(idx).value)) for index, item in enumerate(self.selection_menu.actions())]
+        self.selection_menu.addSeparator()
+        self.invert_selection = QAction("Invert Selection", self)
+        self.invert_selection.triggered.connect(lambda: self.central_widget.invertSelection())
+        self.selection_menu.addAction(self.invert_selection)
+        self.clear_selection = QAction("Clear Selection", self)
+        self.clear_selection.triggered.connect(lambda: self.central_widget.clearSelection())
+        self.selection_menu.addAction(self.clear_selection)
+        # Area modes replace rotation by dragging a region, Ctrl+drag deselects
+        self.selection_menu.addSeparator()
+        self.area_modes = QActionGroup(self)
+        self.area_modes.setExclusionPolicy(QActionGroup.ExclusionPolicy.ExclusiveOptional)
+        for text, mode in (("Box Selection", BOX), ("Lasso Selection", LASSO)):
+            action = QAction(text, self, checkable=True)
+            action.toggled.connect(lambda checked, m=mode: self.central_widget.setAreaMode(m if checked else None))
+            self.area_modes.addAction(action)
+            self.selection_menu.addAction(action)
+        self.select_through = QAction("Select Through", self, checkable=True)
+        self.select_through.toggled.connect(lambda checked: setattr(self.central_widget, "selectThrough", checked))
+        self.selection_menu.addAction(self.select_through)
+        # Surface picking floods across faces up to the feature angle
+        self.selection_menu.addSeparator()
+        self.feature_angle = QAction("Surface Feature Angle...", self)
+        self.feature_angle.triggered.connect(self.set_feature_angle)
+        self.selection_menu.addAction(self.feature_angle)
+        self.copy_surface = QAction("Copy Surface Definition", self)
+        self.copy_surface.triggered.connect(self.copy_surface_definition)
+        self.selection_menu.addAction(self.copy_surface)
 
         # Tools
         self.tools_menu = self.menu_bar.addMenu("Tools")
@@ -136,6 +214,34 @@ class MainWindow(QMainWindow):
         # Create the tree view
         self.tree_view = QTreeView()
         self.dock_widget.setWidget(self.tree_view)
+        # Solver output of every job ends up in the log panel
+        self.log_dock = QDockWidget("Solver Log", self)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.log_dock)
+        self.log_view = QPlainTextEdit()
+        self.log_view.setReadOnly(True)
+        self.log_view.setMaximumBlockCount(20000)
+        self.log_dock.setWidget(self.log_view)
+        # Output is appended in batches, per chunk appends stall the UI on verbose solves
+        self.log_buffer: list[str] = []
+        self.log_timer = QTimer(self)
+        self.log_timer.setInterval(100)
+        self.log_timer.timeout.connect(self.flush_log)
+        self.log_timer.start()
+        # Live convergence plots of running jobs, next to the log
+        self.monitor_dock = QDockWidget("Solve Monitor", self)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.monitor_dock)
+        self.monitor_panel = MonitorPanel(self.monitor_dock)
+        self.monitor_dock.setWidget(self.monitor_panel)
+        self.tabifyDockWidget(self.log_dock, self.monitor_dock)
+        self.log_dock.raise_()
+        # Results mode controls, shown while a result file is open
+        self.results_dock = QDockWidget("Results", self)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.results_dock)
+        self.results_panel = ResultsPanel(self.results_dock)
+        self.results_panel.changed.connect(self.central_widget.UpdateView)
+        self.results_panel.closed.connect(self.close_results)
+        self.results_dock.setWidget(self.results_panel)
+        self.results_dock.hide()
         # Set up a standard item model
         self.model = QStandardItemModel()
         self.model.setHorizontalHeaderLabels(["Components"])
@@ -168,10 +274,53 @@ class MainWindow(QMainWindow):
         self.tree_view.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.tree_view.customContextMenuRequested.connect(self.open_context_menu)
 
-    def open_file_dialog(self):
+    def open_file_dialog(self) -> list[str]:
         options = QFileDialog()
-        file_name, _ = QFileDialog.getOpenFileName(self, "Open File", "", "All Files (*);;STL Files (*.stl);;Mesh Files (*.mesh);;Msh Files (*.msh)", options=options.options())
-        return file_name
+        file_names, _ = QFileDialog.getOpenFileNames(self, "Open Files", "", "All Files (*);;STL Files (*.stl);;Mesh Files (*.mesh);;Msh Files (*.msh);;CalculiX Files (*.inp);;Geometry Files (*.geo *.stp *.step *.brep *.igs *.iges)", options=options.options())
+        return file_names
+
+    def save_project(self) -> None:
+        fpath, _ = QFileDialog.getSaveFileName(self, "Save Project", "", f"yapfc Projects (*{PROJECT_EXTENSION})")
+        if not fpath:
+            return
+        if not fpath.endswith(PROJECT_EXTENSION):
+            fpath += PROJECT_EXTENSION
+        saveProject(self.model_item, self.analyses, fpath)
+        self.status_bar.showMessage(f'Project saved to {fpath}', 10000)
+
+    def open_project(self) -> None:
+        fpath, _ = QFileDialog.getOpenFileName(self, "Open Project", "", f"yapfc Projects (*{PROJECT_EXTENSION})")
+        if fpath:
+            self.load_project(fpath)
+
+    def load_project(self, fpath: str) -> None:
+        try:
+            project = readProject(fpath)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Open Project", f'Unable to open {fpath}:\n{e}')
+            return
+        labels = {self.model_item.child(row).text(): self.model_item.child(row) for row in range(self.model_item.rowCount())}
+        labels[self.analyses.text()] = self.analyses
+        for label in labels.values():
+            for row in reversed(range(label.rowCount())):
+                self.removeItem(label.child(row))
+        for actor in [mesh.getActor() for mesh in self.loaded_meshes]:
+            self.central_widget.RemoveActor(actor)
+        self.loaded_meshes.clear()
+
+        base_dir = os.path.dirname(os.path.abspath(fpath))
+        for node in project["model"].get("children", []) + [project.get("analyses", {})]:
+            label = labels.get(node.get("text", ""))
+            if label is None:
+                print(f'Skipped unknown project category {node.get("text")}')
+                continue
+            for child in node.get("children", []):
+                writer = writerFromDict(child)
+                label.appendRow(writer)
+                if child.get("mesh"):
+                    # The restored writer gets its mesh once it is loaded
+                    self.load_mesh(os.path.join(base_dir, child["mesh"]), writer=writer)
+        self.status_bar.showMessage(f'Project {fpath} opened', 10000)
 
     def double_click_on_writer(self, index):
         item = self.model.itemFromIndex(index)
@@ -200,7 +349,13 @@ class MainWindow(QMainWindow):
         removeItem = QAction(f"Remove {selected_item_class}", self)
         openTextEdit = QAction(f"Text edit {selected_item_class}", self)
         runAnalysis = QAction("Run Analysis", self)
+        forceRunAnalysis = QAction("Force Re-run", self)
+        cancelAnalysis = QAction("Cancel Analysis", self)
+        sweepAnalysis = QAction("Parametric Sweep...", self)
+        tuneAnalysis = QAction("Auto-tune Solver", self)
+        cancelTune = QAction("Cancel Auto-tune", self)
         showResults = QAction("Show Results", self)
+        paraviewResults = QAction("Open in ParaView", self)
 
         match selected_item.getTextLabel():
             case "Meshes":
@@ -243,8 +398,25 @@ class MainWindow(QMainWindow):
                 menu.addAction(addBoundary)
                 menu.addAction(removeItem)
             case "Analysis":
+                job = self.job_manager.getLastJob(selected_item.text())
+                running = job is not None and job.isActive()
+                runAnalysis.setEnabled(not running)
+                forceRunAnalysis.setEnabled(not running)
+                showResults.setEnabled(self.results_ready(selected_item.text()))
                 menu.addAction(runAnalysis)
+                menu.addAction(forceRunAnalysis)
+                if running:
+                    menu.addAction(cancelAnalysis)
+                menu.addAction(sweepAnalysis)
+                if self.tune_task is None:
+                    tuneAnalysis.setEnabled(not running)
+                    menu.addAction(tuneAnalysis)
+                else:
+                    menu.addAction(cancelTune)
                 menu.addAction(showResults)
+                if get_option_from_json("options.json", "paraview_path"):
+                    paraviewResults.setEnabled(showResults.isEnabled())
+                    menu.addAction(paraviewResults)
                 menu.addAction(removeItem)
 
         addItem.triggered.connect(lambda: self.addItem(selected_item))
@@ -252,14 +424,125 @@ class MainWindow(QMainWindow):
         removeItem.triggered.connect(lambda: self.removeItem(selected_item))
         openTextEdit.triggered.connect(lambda: self.openTextEdit(selected_item))
         runAnalysis.triggered.connect(lambda: self.runAnalysis())
+        forceRunAnalysis.triggered.connect(lambda: self.runAnalysis(force=True))
+        cancelAnalysis.triggered.connect(lambda: self.cancel_analysis(selected_item.text()))
+        sweepAnalysis.triggered.connect(lambda: self.run_sweep(selected_item))
+        tuneAnalysis.triggered.connect(lambda: self.auto_tune(selected_item))
+        cancelTune.triggered.connect(lambda: self.tune_task.cancel() if self.tune_task else None)
         showResults.triggered.connect(lambda: self.show_results())
+        paraviewResults.triggered.connect(lambda: open_paraview(get_option_from_json("options.json", "paraview_path"),
+                                                                f"{selected_item.text()}.exo"))
 
         menu.exec(self.tree_view.viewport().mapToGlobal(position))
 
-    def open_mesh(self):
-        fpath = self.open_file_dialog()
-        self.mesh = Mesh(fpath)
-        return self.mesh.getActor()
+    def open_mesh(self) -> None:
+        fpaths = self.open_file_dialog()
+        params: dict[str, float] = {}
+        if any(isGeometryFile(i) for i in fpaths):
+            text, ok = QInputDialog.getText(self, "gmsh parameters",
+                                            "Overrides, e.g. N=8, clmax=0.2 (empty for defaults):")
+            if not ok:
+                return
+            try:
+                params = parseGmshParams(text)
+            except ValueError as e:
+                QMessageBox.warning(self, "gmsh parameters", str(e))
+                return
+        for fpath in fpaths:
+            self.load_mesh(fpath, params)
+
+    def load_mesh(self, fpath: str, params: dict[str, float] | None = None,
+                  writer: MeshSubWriter | None = None) -> None:
+        '''Loads on the mesh loader thread pool, the UI stays responsive and
+        several files can be loading at the same time. Geometry files are
+        meshed by gmsh first, within the core budget of the mesher. The mesh
+        goes to writer, a new mesh writer by default.'''
+        cache = self.mesh_cache()
+        self.gmsh_mesher.setGmshPath(get_option_from_json("options.json", "gmsh_path") or "gmsh")
+        self.gmsh_mesher.setCache(cache)
+        task = self.mesh_loader.load(fpath, cache, self.gmsh_mesher, params)
+        dialog = QProgressDialog(f"Loading {os.path.basename(fpath)}", "Cancel", 0, 100, self)
+        dialog.setWindowModality(Qt.WindowModality.NonModal)
+        dialog.setMinimumDuration(500)
+        dialog.setAutoClose(False)
+        dialog.setAutoReset(False)
+        dialog.canceled.connect(task.cancel)
+        task.signals.progress.connect(lambda _, stage, done, total: self.mesh_load_progress(dialog, stage, done, total))
+        task.signals.finished.connect(lambda _, mesh: self.mesh_loaded(mesh, dialog, writer))
+        task.signals.failed.connect(lambda path, error: self.mesh_load_failed(path, error, dialog))
+        task.signals.cancelled.connect(lambda path: self.mesh_load_cancelled(path, dialog))
+
+    def mesh_load_progress(self, dialog: QProgressDialog, stage: str, done: int, total: int) -> None:
+        # Reading takes the first 70 % of the bar, VTK conversion the rest
+        fraction = done / total if total else 1.0
+        match stage:
+            case "mesh":
+                dialog.setLabelText(f"{dialog.labelText().splitlines()[0]}\nMeshing with gmsh")
+            case "read":
+                dialog.setValue(int(70 * fraction))
+                dialog.setLabelText(f"{dialog.labelText().splitlines()[0]}\nRead {done / 2**20:.1f} of {total / 2**20:.1f} MB")
+            case "convert":
+                dialog.setValue(70 + int(30 * fraction))
+                dialog.setLabelText(f"{dialog.labelText().splitlines()[0]}\nConverted {done} of {total} cells")
+
+    def mesh_loaded(self, mesh: Mesh, dialog: QProgressDialog, writer: MeshSubWriter | None = None) -> None:
+        dialog.close()
+        # Selected ids belong to the current mesh
+        self.central_widget.selections.clear()
+        self.mesh = mesh
+        self.loaded_meshes.append(mesh)
+        # The loaded mesh reaches the solver deck through its own *INCLUDE writer
+        if writer is None:
+            self.meshes.appendRow(MeshSubWriter(os.path.basename(mesh.getFilePath()), mesh.getData(), mesh.getFilePath()))
+        else:
+            writer.setMesh(mesh.getData(), mesh.getFilePath())
+        self.central_widget.AddActor(mesh.getActor())
+        self.central_widget.ResetCamera()
+        self.central_widget.UpdateView()
+        self.status_bar.showMessage(f"Loaded {mesh.getFilePath()}: {mesh.getData().getNumberOfPoints()} nodes, "
+                                    f"{mesh.getData().getNumberOfCells()} cells", 5000)
+        # Small meshes build their face index on the first surface pick
+        if mesh.getData().getNumberOfCells() >= BACKGROUND_CELLS:
+            task = self.mesh_loader.indexFaces(mesh)
+            task.signals.finished.connect(lambda m: print(f'Face index of {m.getFilePath()} ready'))
+            task.signals.failed.connect(lambda path, error: print(f'Unable to index the faces of {path}: {error}'))
+
+    def set_feature_angle(self) -> None:
+        angle, ok = QInputDialog.getDouble(self, "Surface Feature Angle",
+                                           "Faces meeting at a larger angle (degrees) stop a surface pick:",
+                                           self.central_widget.featureAngle, 0.0, 180.0, 1)
+        if ok:
+            self.central_widget.featureAngle = angle
+
+    def copy_surface_definition(self) -> None:
+        name, ok = QInputDialog.getText(self, "Surface Definition", "Surface name:", text="Surface-1")
+        if ok and name:
+            QApplication.clipboard().setText(self.central_widget.getSurfaceDefinition(name))
+            self.status_bar.showMessage(f"*SURFACE {name} copied to the clipboard", 5000)
+
+    def mesh_load_failed(self, fpath: str, error: str, dialog: QProgressDialog) -> None:
+        dialog.close()
+        QMessageBox.warning(self, "Open", f"Unable to load {fpath}:\n{error}")
+
+    def mesh_load_cancelled(self, fpath: str, dialog: QProgressDialog) -> None:
+        dialog.close()
+        self.status_bar.showMessage(f"Loading {fpath} cancelled", 5000)
+
+    def mesh_cache(self) -> MeshCache:
+        cache_dir = get_option_from_json("options.json", "mesh_cache_dir") or DEFAULT_CACHE_DIR
+        try:
+            size_mb = float(get_option_from_json("options.json", "mesh_cache_size_mb") or DEFAULT_CACHE_SIZE_MB)
+        except ValueError:
+            size_mb = DEFAULT_CACHE_SIZE_MB
+        return MeshCache(cache_dir, int(size_mb * 2**20))
+
+    def result_cache(self) -> ResultCache:
+        cache_dir = get_option_from_json("options.json", "result_cache_dir") or DEFAULT_RESULT_CACHE_DIR
+        try:
+            size_mb = float(get_option_from_json("options.json", "result_cache_size_mb") or DEFAULT_RESULT_CACHE_SIZE_MB)
+        except ValueError:
+            size_mb = DEFAULT_RESULT_CACHE_SIZE_MB
+        return ResultCache(cache_dir, int(size_mb * 2**20))
 
     def addItem(self, parent_item):
         parent_class: str = parent_item.getTextLabel()
@@ -299,44 +582,256 @@ class MainWindow(QMainWindow):
     def openTextEdit(self, item: CcxWriter):
         item.openTextEditor()
 
-    def runAnalysis(self):
+    def runAnalysis(self, force: bool = False):
         indexes = self.tree_view.selectedIndexes()
         if indexes:
             selected_item:Label = self.model.itemFromIndex(indexes[0]) #type:ignore
 
-            inp_list: list[str] = []
-            inp_text: str = ""
-            comp: list[Label] = collect_components(self.model_item)
-            for label in comp:
-                try:
-                    inp_list.append(label.getStoredText())
-                except:
-                    pass
-
-            for x in inp_list:
-                inp_text = inp_text + '\n' + x
-            print(inp_text)
-
-            save_inp_file(inp_text, selected_item.text())
-            run_script(get_option_from_json("options.json", "ccx_path"), selected_item.text())
+            name = selected_item.text()
+            items = list(iterAnalysisComponents(self.model_item, selected_item))
+            deck = f"{name}.inp"
+            # The auto-tuned solver of this model size goes into the ${solver} placeholder of the steps,
+            # without a mesh writer the nodes are counted in the previous deck
+            tuned = self.tuning.getBest(sizeBucket(modelNodes(items, deck if os.path.exists(deck) else None)))
+            try:
+                stats = writeIncrementalDeck(items, deck, {SOLVER_VARIABLE: tuned["solver"]} if tuned else None)
+            except ValueError as e:
+                QMessageBox.warning(self, "Run Analysis", str(e))
+                return
+            print(stats)
+            self.status_bar.showMessage(str(stats), 10000)
+            ccx_path = get_option_from_json("options.json", "ccx_path")
+            self.update_core_budget()
+            options = solver_options(ccx_path)
+            environment = None
+            if tuned is not None:
+                # The thread counts are capped by the cores the job gets when it starts
+                environment = configEnvironment(tuned)
+                options["environment"] = {key: value for key, value in environment.items() if key.startswith("PASTIX")}
+            cache = self.result_cache()
+            key = cache.getKey(deck, options)
+            if not force and cache.restore(key, name):
+                self.status_bar.showMessage(f'{name}: results restored from cache', 10000)
+                return
+            self.job_manager.submit(SolverJob(name, ccx_path, [name, *CCX_ARGS], os.getcwd(), cache, key, environment))
+
+    def run_sweep(self, analysis: AnalysisSubWriter) -> None:
+        names = collectTemplateNames(iterAnalysisComponents(self.model_item, analysis))
+        if not names:
+            QMessageBox.information(self, "Parametric Sweep",
+                                    "Add ${name} or ${name=default} placeholders to the writer texts first.")
+            return
+        default = analysis.getSweep() or "\n".join(f'{name} = {value or ""}' for name, value in names.items())
+        text, ok = QInputDialog.getMultiLineText(self, "Parametric Sweep",
+                                                 "One parameter per line, start:stop:count or a list of values:", default)
+        if not ok:
+            return
+        try:
+            variants = expandVariants(parseRanges(text))
+        except ValueError as e:
+            QMessageBox.warning(self, "Parametric Sweep", str(e))
+            return
+        analysis.setSweep(text)
+
+        name = analysis.text()
+        sweep = Sweep(name, os.path.abspath(f"{name}_sweep"), variants)
+        try:
+            sweep.writeDecks(list(iterAnalysisComponents(self.model_item, analysis)))
+        except ValueError as e:
+            QMessageBox.warning(self, "Parametric Sweep", str(e))
+            return
+        print(f'{name}: {len(variants)} variants written to {sweep.getRoot()}')
+
+        ccx_path = get_option_from_json("options.json", "ccx_path")
+        cache = self.result_cache()
+        options = solver_options(ccx_path)
+        jobs: list[SolverJob] = []
+        for index in range(len(variants)):
+            job_name = sweep.getJobName(index)
+            work_dir = sweep.getWorkDir(index)
+            key = cache.getKey(os.path.join(work_dir, f"{job_name}.inp"), options)
+            if cache.restore(key, os.path.join(work_dir, job_name)):
+                sweep.record(index, "cached", 0, 0.0)
+                continue
+            job = SolverJob(job_name, ccx_path, [job_name, *CCX_ARGS], work_dir, cache, key)
+            self.sweep_jobs[job] = (sweep, index)
+            jobs.append(job)
+        # The pending variants decide the default number of concurrent jobs
+        self.update_core_budget()
+        for job in jobs:
+            self.job_manager.submit(job)
+        self.sweep_finished(sweep)
+
+    def auto_tune(self, analysis: AnalysisSubWriter) -> None:
+        name = analysis.text()
+        items = list(iterAnalysisComponents(self.model_item, analysis))
+        deck = os.path.abspath(f"{name}.inp")
+        try:
+            print(writeIncrementalDeck(items, deck))
+        except ValueError as e:
+            QMessageBox.warning(self, "Auto-tune Solver", str(e))
+            return
+        self.update_core_budget()
+        task = AutoTuneTask(deck, get_option_from_json("options.json", "ccx_path"),
+                            self.job_manager.getBudget().getCores(), self.tuning, modelNodes(items, deck))
+        task.signals.progress.connect(self.tune_progress)
+        task.signals.finished.connect(self.tune_finished)
+        task.signals.failed.connect(self.tune_failed)
+        self.tune_task = task
+        self.log_buffer.append(f'=== {name}: auto-tuning the solver ===\n')
+        QThreadPool.globalInstance().start(task)
+
+    def tune_progress(self, done: int, total: int, trial: dict) -> None:
+        memory = f'{trial["peak_memory_mb"]:.0f} MB' if trial["peak_memory_mb"] is not None else "n/a"
+        state = "ok" if trial["ok"] else f'failed ({trial["exit_code"]})'
+        self.log_buffer.append(f'[{done}/{total}] {trial["solver"]}, {trial["threads"]} threads'
+                               f'{"".join(f", {key}={trial[key]}" for key in trial if key.startswith("PASTIX"))}: '
+                               f'{state}, {trial["wall_time"]:.2f} s, {memory}\n')
+        self.status_bar.showMessage(f'Auto-tune: trial {done} of {total}')
+
+    def tune_finished(self, deck: str, best: dict | None) -> None:
+        self.tune_task = None
+        if best is None:
+            message = f'{os.path.basename(deck)}: auto-tune found no working solver configuration'
+        else:
+            message = (f'{os.path.basename(deck)}: {best["solver"]} with {best["threads"]} threads '
+                       f'({best["wall_time"]:.2f} s) is used from now on')
+        self.log_buffer.append(f'=== {message} ===\n')
+        self.status_bar.showMessage(message, 10000)
+        print(message)
+
+    def tune_failed(self, deck: str, error: str) -> None:
+        self.tune_task = None
+        QMessageBox.warning(self, "Auto-tune Solver", f'Auto-tune of {deck} failed:\n{error}')
+
+    def sweep_finished(self, sweep: Sweep) -> None:
+        if sweep.isComplete():
+            summary = sweep.writeSummary()
+            self.log_buffer.append(f'=== {sweep.getName()}: sweep summary written to {summary} ===\n')
+            self.status_bar.showMessage(f'{sweep.getName()}: sweep finished, summary in {summary}', 10000)
+
+    def update_core_budget(self) -> None:
+        budget = self.job_manager.getBudget()
+        try:
+            budget.setCores(int(get_option_from_json("options.json", "cores") or 0))
+        except ValueError:
+            print('Invalid cores option, using all cores')
+            budget.setCores(None)
+        # Pending sweep variants run in parallel unless max_jobs says otherwise
+        max_jobs = min(SWEEP_JOBS, len(self.sweep_jobs)) or 1
+        try:
+            max_jobs = int(get_option_from_json("options.json", "max_jobs") or max_jobs)
+        except ValueError:
+            print(f'Invalid max_jobs option, running {max_jobs} jobs at a time')
+        self.job_manager.setMaxJobs(max_jobs)
+        budget.setPin(bool(get_option_from_json("options.json", "pin_cpus")))
+
+    def cancel_analysis(self, name: str) -> None:
+        job = self.job_manager.getLastJob(name)
+        if job is not None:
+            self.job_manager.cancel(job)
+
+    def results_ready(self, name: str) -> bool:
+        job = self.job_manager.getLastJob(name)
+        if job is not None and job.getState() != JobState.Finished:
+            return False
+        return os.path.exists(f"{name}.exo")
+
+    def flush_log(self) -> None:
+        if self.log_buffer:
+            text = "".join(self.log_buffer)
+            self.log_buffer.clear()
+            self.log_view.appendPlainText(text.rstrip("\n"))
+
+    def job_started(self, job: SolverJob) -> None:
+        self.monitor_panel.addJob(job)
+        budget = self.job_manager.getBudget()
+        self.log_buffer.append(f'=== {job.getName()} started on {len(self.job_manager.getCpus(job))} cores '
+                               f'({budget.getRunningJobs()} of {budget.getMaxJobs()} concurrent jobs '
+                               f'on {budget.getCores()} cores) ===\n')
+        self.status_bar.showMessage(f'{job.getName()}: running')
+
+    def job_output(self, job: SolverJob, text: str) -> None:
+        self.log_buffer.append(text)
+        self.monitor_panel.feedOutput(job, text)
+
+    def job_finished(self, job: SolverJob) -> None:
+        self.monitor_panel.finishJob(job)
+        message = (f'{job.getName()}: {job.getState().name.lower()} with exit code {job.getExitCode()} '
+                   f'after {job.getWallTime():.1f} s')
+        self.log_buffer.append(f'=== {message} ===\n')
+        self.status_bar.showMessage(message, 10000)
+        print(message)
+        if job in self.sweep_jobs:
+            sweep, index = self.sweep_jobs.pop(job)
+            sweep.record(index, job.getState().name.lower(), job.getExitCode(), job.getWallTime())
+            self.sweep_finished(sweep)
     
     def show_results(self) -> None:
         indexes = self.tree_view.selectedIndexes()
         if indexes:
             selected_item = self.model.itemFromIndex(indexes[0])
-            open_paraview(get_option_from_json("options.json", "paraview_path"), f"{selected_item.text()}.exo")
+            self.open_results(f"{selected_item.text()}.exo")
+
+    def open_results(self, fpath: str) -> None:
+        try:
+            results = ExodusResults(fpath)
+            view = ResultView(results)
+        except (OSError, ValueError, KeyError) as e:
+            QMessageBox.warning(self, "Show Results", f'Unable to open {fpath}:\n{e}')
+            return
+        if not results.getFields():
+            QMessageBox.warning(self, "Show Results", f'{fpath} holds no fields')
+            return
+        self.central_widget.SetResultView(view)
+        self.results_panel.setView(view)
+        self.results_dock.show()
+        self.central_widget.ResetCamera()
+        self.central_widget.UpdateView()
+        self.status_bar.showMessage(f'{fpath}: {results.getNumberOfNodes()} nodes, {results.getNumberOfElements()} elements, '
+                                    f'{results.getNumberOfSteps()} steps', 10000)
+
+    def close_results(self) -> None:
+        self.central_widget.SetResultView(None)
+        self.results_dock.hide()
+        self.central_widget.UpdateView()
     
+    def color_mesh(self, mode: str) -> None:
+        if not self.loaded_meshes:
+            return
+        mesh = self.mesh
+        match mode:
+            case "default":
+                mesh.colorByDefault()
+                legend = {}
+            case "sets":
+                legend = mesh.colorBySets()
+            case "materials":
+                sections = [i.getStoredText() for i in CcxWriter.getWritersListByCategory(CCXWriterCategory.SectionSubWriter)]
+                legend = mesh.colorByGroups(material_cell_groups(mesh.getData(), sections))
+        self.central_widget.selections.clear(SelectionFilter.Elements)
+        self.status_bar.showMessage(", ".join(f"{name}: rgb{color}" for name, color in legend.items()), 10000)
+        self.central_widget.UpdateView()
+
     def open_options_dialog(self) -> None:
         self.options.exec()
 
 class MouseInteractorStyle(vtkInteractorStyleTrackballCamera):
     def __init__(self, parent:'vtkViewer'):
         self.AddObserver('LeftButtonPressEvent', self.left_button_press_event) #type:ignore
+        self.AddObserver('MouseMoveEvent', self.mouse_move_event) #type:ignore
+        self.AddObserver('LeftButtonReleaseEvent', self.left_button_release_event) #type:ignore
         self.parent: vtkViewer = parent
+        self.dragging: bool = False
         self.selected_mapper = vtkDataSetMapper()
         self.selected_actor = vtkActor()
 
     def left_button_press_event(self, obj, event):
+        if self.parent.areaMode is not None:
+            # The drag draws the region instead of rotating the camera
+            self.dragging = True
+            self.parent.rubberBand.start(self.GetInteractor().GetEventPosition())
+            return
         match self.parent.selectionFilter:
             case SelectionFilter.Elements:
                 self.pickCell()
@@ -350,6 +845,24 @@ class MouseInteractorStyle(vtkInteractorStyleTrackballCamera):
                 self.volumePick()
         self.OnLeftButtonDown()
 
+    def mouse_move_event(self, obj, event):
+        if self.dragging:
+            self.parent.rubberBand.extend(self.GetInteractor().GetEventPosition(), self.parent.areaMode)
+            self.GetInteractor().GetRenderWindow().Render()
+            return
+        self.OnMouseMove()
+
+    def left_button_release_event(self, obj, event):
+        if self.dragging:
+            self.dragging = False
+            band = self.parent.rubberBand
+            band.finish()
+            if not band.isEmpty():
+                self.parent.selectArea(band.getPolygon(self.parent.areaMode), remove=bool(self.GetInteractor().GetControlKey()))
+            self.GetInteractor().GetRenderWindow().Render()
+            return
+        self.OnLeftButtonUp()
+
     def pickCell(self) -> None:
         pos = self.GetInteractor().GetEventPosition()
 
@@ -360,11 +873,12 @@ class MouseInteractorStyle(vtkInteractorStyleTrackballCamera):
 
         world_position = picker.GetPickPosition()
 
-        cellId:int = picker.GetCellId()
+        # The picked cell belongs to the rendered surface, map it back to the grid
+        cellId:int = self.parent.toOriginalId(picker.GetActor(), picker.GetCellId(), SelectionFilter.Elements)
 
         if cellId != -1:
             print(f'''Pick position is: ({world_position[0]:.6g}, {world_position[1]:.6g}, {world_position[2]:.6g})''')
-            print(f'Cell id is: {cellId}')
+            print(f'Element is: {self.parent.pparent.mesh.getData().elementMap.toLabel(cellId)} (cell id {cellId})')
             self.parent.changeInSelection(cellId, SelectionFilter.Elements)
         else:
             self.parent.changeInSelection(cellId, SelectionFilter.Elements)
@@ -380,11 +894,11 @@ class MouseInteractorStyle(vtkInteractorStyleTrackballCamera):
 
         world_position = picker.GetPickPosition()
 
-        pointId:int = picker.GetPointId()
+        pointId:int = self.parent.toOriginalId(picker.GetActor(), picker.GetPointId(), SelectionFilter.Nodes)
 
         if pointId != -1:
             print(f'''Pick position is: ({world_position[0]:.6g}, {world_position[1]:.6g}, {world_position[2]:.6g})''')
-            print(f'Point id is: {pointId}')
+            print(f'Node is: {self.parent.pparent.mesh.getData().nodeMap.toLabel(pointId)} (point id {pointId})')
             self.parent.changeInSelection(pointId, SelectionFilter.Nodes)
         else:
             self.parent.changeInSelection(pointId, SelectionFilter.Nodes)
@@ -394,7 +908,25 @@ class MouseInteractorStyle(vtkInteractorStyleTrackballCamera):
         pass
 
     def surfacePick(self) -> None:
-        pass
+        pos = self.GetInteractor().GetEventPosition()
+
+        picker = vtkCellPicker()
+        picker.SetTolerance(0.0005)
+
+        picker.Pick(pos[0], pos[1], 0, self.GetDefaultRenderer())
+
+        cellId:int = self.parent.toOriginalId(picker.GetActor(), picker.GetCellId(), SelectionFilter.Surfaces)
+
+        if cellId != -1:
+            # The corners of the picked polygon tell which face of the cell it is
+            mesh: Mesh = self.parent.pparent.mesh
+            pointIds = vtk.vtkIdList()
+            mesh.getSurface().GetCellPoints(picker.GetCellId(), pointIds)
+            surfacePoints = np.array([pointIds.GetId(i) for i in range(pointIds.GetNumberOfIds())], dtype=np.int64)
+            self.parent.pickSurface(cellId, mesh.getOriginalPointIds(surfacePoints))
+        else:
+            self.parent.changeInSelection(cellId, SelectionFilter.Surfaces)
+            print('Selection clean')
 
     def volumePick(self) -> None:
         pass
@@ -410,12 +942,18 @@ class vtkViewer(QWidget):
         '''1 = Lower Left , 2 = Lower Right'''
         self.ShowEdges = True
         self.selectionFilter:SelectionFilter = SelectionFilter(1)
-        self.cellSelection:list = []
-        self.nodeSelection:list = []
-        self.edgeSelection:list = []
-        self.surfaceSelection:list = []
-        self.volumeSelection:list = []
-        self.selectionCreatedActors: dict[int, vtkActor] = {}
+        # Selections are keyed by SelectionFilter, the display follows every change in one batch
+        self.selections = SelectionEngine()
+        self.selections.addListener(self.showSelectionChange)
+        # All selected nodes are drawn by this one actor, all selected faces by another
+        self.nodeMarkers = PointMarkers()
+        self.faceMarkers = FaceMarkers()
+        self.featureAngle: float = DEFAULT_FEATURE_ANGLE
+        # None, BOX or LASSO, see setAreaMode
+        self.areaMode: str | None = None
+        self.selectThrough: bool = False
+        self.rubberBand = RubberBand()
+        self.resultView: ResultView | None = None
 
         # Set background color of the renderer
         self.renderer.SetBackground(0.2, 0.3, 0.4)  # RGB color
@@ -428,6 +966,9 @@ class vtkViewer(QWidget):
         self.interactor.GetRenderWindow().LineSmoothingOn()
         self.interactor.Initialize()
         self.interactor.Start()
+        # Large meshes switch to their decimated proxy while the camera moves
+        self.trackball.AddObserver("StartInteractionEvent", lambda obj, event: self.SetLowDetail(True))
+        self.trackball.AddObserver("EndInteractionEvent", lambda obj, event: self.SetLowDetail(False))
 
         #Setup Trihedron
         self.Trihedron = self.MakeAxesActor()
@@ -436,6 +977,7 @@ class vtkViewer(QWidget):
         self.om1.SetInteractor(self.interactor)
         self.om1.EnabledOn()
         self.om1.InteractiveOff()
+        self.renderer.AddViewProp(self.rubberBand.getActor())
 
     def UpdateView(self):
         self.interactor.ReInitialize()
@@ -490,6 +1032,39 @@ class vtkViewer(QWidget):
     def RemoveActor(self, pvtkActor):
         self.renderer.RemoveActor(pvtkActor)
 
+    def SetResultView(self, view: ResultView | None) -> None:
+        '''Results mode: the mesh actors make room for the result surface and
+        its scalar bar. None goes back to the meshes.'''
+        if self.resultView is not None:
+            self.renderer.RemoveActor(self.resultView.getActor())
+            self.renderer.RemoveViewProp(self.resultView.getScalarBar())
+        self.resultView = view
+        for mesh in self.pparent.loaded_meshes:
+            mesh.getActor().SetVisibility(view is None)
+        if view is not None:
+            self.AddActor(view.getActor())
+            self.renderer.AddViewProp(view.getScalarBar())
+
+    def SetLowDetail(self, lowDetail: bool) -> None:
+        meshes = [i for i in self.pparent.loaded_meshes if i.hasLowDetail()]
+        for mesh in meshes:
+            mesh.setLowDetail(lowDetail)
+        if meshes and not lowDetail:
+            self.interactor.GetRenderWindow().Render()
+
+    def toOriginalId(self, actor: vtkActor | None, idx: int, selectionType: SelectionFilter) -> int:
+        '''Maps a cell/point id of a rendered surface to the id in its mesh grid
+        and makes that mesh the current one. Returns -1 for anything else.'''
+        for mesh in self.pparent.loaded_meshes:
+            if actor is not None and mesh.getActor() is actor and idx != -1:
+                if mesh is not self.pparent.mesh:
+                    self.selections.clear()
+                self.pparent.mesh = mesh
+                if selectionType == SelectionFilter.Nodes:
+                    return mesh.getOriginalPointId(idx)
+                return mesh.getOriginalCellId(idx)
+        return -1
+
     def GetAllActors(self) -> list[vtkActor]:
         """Return a list of all vtkActors currently in the renderer."""
         actors = []
@@ -529,87 +1104,129 @@ class vtkViewer(QWidget):
 
         self.UpdateView()
 
-    def getSelection(self, filter:SelectionFilter) -> list[int]:
+    def getSelectionLabels(self, filter:SelectionFilter) -> np.ndarray:
+        '''Selected nodes/elements as CalculiX labels instead of VTK ids.'''
+        data = self.pparent.mesh.getData()
+        ids = np.asarray(self.getSelection(filter), dtype=np.int64)
         match filter:
             case SelectionFilter.Nodes:
-                return self.nodeSelection
-            case SelectionFilter.Edges:
-                return self.edgeSelection
+                return data.nodeMap.toLabels(ids)
             case SelectionFilter.Elements:
-                return self.cellSelection
+                return data.elementMap.toLabels(ids)
             case SelectionFilter.Surfaces:
-                return self.surfaceSelection
-            case SelectionFilter.Volumes:
-                return self.volumeSelection
+                # (n, 2) element labels and face numbers
+                index = self.pparent.mesh.getFaceIndex(build=False)
+                return index.toLabels(ids, data) if index is not None else np.empty((0, 2), np.int64)
             case _:
-                return self.nodeSelection
+                return ids
+
+    def getSelection(self, filter:SelectionFilter) -> np.ndarray:
+        return self.selections.getSelection(filter).getIds()
 
     def changeInSelection(self, idx:int, selectionType:SelectionFilter) -> None:
+        '''Toggles one picked id, -1 (a pick into the void) clears the selection.'''
+        if idx == -1:
+            self.selections.clear(selectionType)
+            print(f'All {selectionType.name.lower()} removed from selection')
+            return
+        self.selections.toggle(selectionType, [idx])
+        state = "selected" if idx in self.selections.getSelection(selectionType) else "no longer selected"
         match selectionType:
             case SelectionFilter.Elements:
-                sel:list[int] = self.cellSelection
-                if idx != -1:
-                    if idx not in sel:
-                        sel.append(idx)
-                        mesh = self.pparent.mesh.getMesh()
-                        colors:vtk.vtkUnsignedCharArray = self.pparent.mesh.getMesh().GetCellData().GetScalars('CellColors')
-                        colors.SetTuple3(idx, 255, 0, 0)
-                        mesh.GetCellData().SetScalars(colors)
-                        mesh.GetCellData().SetActiveScalars('CellColors')
-                        print(f'Node {idx} is selected')
-                    elif idx in sel:
-                        mesh = self.pparent.mesh.getMesh()
-                        colors:vtk.vtkUnsignedCharArray = self.pparent.mesh.getMesh().GetCellData().GetScalars('CellColors')
-                        colors.SetTuple3(idx, 255, 255, 255)
-                        mesh.GetCellData().SetScalars(colors)
-                        mesh.GetCellData().SetActiveScalars('CellColors')
-                        print(f'Element {idx} is no longer selected')
-                else:
-                    for i in sel:
-                        mesh = self.pparent.mesh.getMesh()
-                        colors:vtk.vtkUnsignedCharArray = self.pparent.mesh.getMesh().GetCellData().GetScalars('CellColors')
-                        colors.SetTuple3(i, 255, 255, 255)
-                        mesh.GetCellData().SetScalars(colors)
-                        mesh.GetCellData().SetActiveScalars('CellColors')
-                    print('All nodes removed from selection')
+                print(f'Element {self.pparent.mesh.getData().elementMap.toLabel(idx)} is {state}')
             case SelectionFilter.Nodes:
-                sel:list[int] = self.nodeSelection
-                actSel: dict[int, vtkActor] = self.selectionCreatedActors
-                if idx != -1:
-                    if idx not in sel:
-                        sel.append(idx)
-                        mesh: vtk.vtkUnstructuredGrid | vtk.vtkPolyData= self.pparent.mesh.getMesh()
-                        point_coords = mesh.GetPoint(idx)
-                        sphere_source = vtk.vtkSphereSource()
-                        sphere_source.SetCenter(point_coords)
-                        sphere_source.SetRadius(0.2)  # Adjust radius as needed
-                        sphere_source.Update()
-                        sphere_mapper = vtk.vtkPolyDataMapper()
-                        sphere_mapper.SetInputConnection(sphere_source.GetOutputPort())
-                        sphere_actor = vtk.vtkActor()
-                        sphere_actor.PickableOff()
-                        sphere_actor.SetMapper(sphere_mapper)
-                        sphere_actor.GetProperty().SetColor(1, 0, 0)  # Red color for visibility
-                        self.AddActor(sphere_actor, edgeVisible=False)
-                        actSel[idx] = sphere_actor
-                        print(f'Node {idx} is selected')
-                    elif idx in sel:
-                        sel.remove(idx)
-                        self.RemoveActor(actSel[idx])
-                        actSel.pop(idx)
-                        print(f'Node {idx} is no longer selected')
-                else:
-                    for i in actSel.keys():
-                        self.RemoveActor(actSel[i])
-                    actSel.clear()
-                    sel.clear()
-                    print('All nodes removed from selection')
-            case SelectionFilter.Edges:
-                pass
+                print(f'Node {self.pparent.mesh.getData().nodeMap.toLabel(idx)} is {state}')
+
+    def invertSelection(self) -> None:
+        if not self.pparent.loaded_meshes:
+            return
+        data = self.pparent.mesh.getData()
+        size = data.getNumberOfPoints() if self.selectionFilter == SelectionFilter.Nodes else data.getNumberOfCells()
+        if self.selectionFilter == SelectionFilter.Surfaces:
+            index = self.pparent.mesh.getFaceIndex(build=False)
+            if index is None:
+                return
+            size = len(index)
+        self.selections.setSize(self.selectionFilter, size)
+        self.selections.invert(self.selectionFilter)
+        self.UpdateView()
+
+    def pickSurface(self, cellId:int, pointIds:np.ndarray) -> None:
+        '''Toggles the faces connected to the picked boundary face of a cell
+        up to the feature angle.'''
+        mesh: Mesh = self.pparent.mesh
+        index = mesh.getFaceIndex(build=mesh.getData().getNumberOfCells() < BACKGROUND_CELLS)
+        if index is None:
+            print(f'Faces of {os.path.basename(mesh.getFilePath())} are still being indexed')
+            return
+        face = index.findFace(cellId, pointIds)
+        if face == -1:
+            print(f'Element {mesh.getData().elementMap.toLabel(cellId)} has no boundary face there')
+            return
+        faces = index.floodFill(face, self.featureAngle)
+        if face in self.selections.getSelection(SelectionFilter.Surfaces):
+            self.selections.remove(SelectionFilter.Surfaces, faces)
+            print(f'{len(faces)} faces removed from selection')
+        else:
+            self.selections.add(SelectionFilter.Surfaces, faces)
+            print(f'{len(faces)} faces added to selection')
+        self.UpdateView()
+
+    def getSurfaceDefinition(self, name:str) -> str:
+        '''*SURFACE, TYPE=ELEMENT block of the selected faces.'''
+        if not self.pparent.loaded_meshes:
+            return surfaceDefinition(name, np.empty((0, 2), np.int64))
+        return surfaceDefinition(name, self.getSelectionLabels(SelectionFilter.Surfaces))
+
+    def setAreaMode(self, mode: str | None) -> None:
+        self.areaMode = mode
+        print(f'Area selection {mode or "off"}')
+
+    def selectArea(self, polygon: np.ndarray, remove: bool = False) -> None:
+        '''Adds (or removes) the nodes or elements of the current mesh inside a
+        display polygon: the rendered ones, or all of them when selecting through.'''
+        if not self.pparent.loaded_meshes or self.selectionFilter not in (SelectionFilter.Nodes, SelectionFilter.Elements):
+            return
+        points = self.selectionFilter == SelectionFilter.Nodes
+        # Results mode hides the mesh, only through selection sees it then
+        visible = not self.selectThrough and self.resultView is None
+        ids = (visibleIds if visible else throughIds)(self.renderer, self.pparent.mesh, polygon, points)
+        if remove:
+            self.selections.remove(self.selectionFilter, ids)
+        else:
+            self.selections.add(self.selectionFilter, ids)
+        print(f'{len(ids)} {self.selectionFilter.name.lower()} {"removed from" if remove else "added to"} selection')
+        self.UpdateView()
+
+    def clearSelection(self) -> None:
+        self.selections.clear()
+        self.UpdateView()
+
+    def showSelectionChange(self, selectionType:SelectionFilter, added:np.ndarray, removed:np.ndarray) -> None:
+        '''Listener of the selection engine, applies all ids an operation changed at once.'''
+        match selectionType:
+            case SelectionFilter.Elements:
+                mesh: Mesh = self.pparent.mesh
+                mesh.getCellColors()[added] = SELECTED_COLOR
+                # Restores the removed cells and pushes both changes to VTK in one update
+                mesh.resetColors(removed)
+            case SelectionFilter.Nodes:
+                mesh = self.pparent.mesh
+                # Added with the first selected node, so that the mesh actors come first
+                if not self.renderer.HasViewProp(self.nodeMarkers.getActor()):
+                    self.AddActor(self.nodeMarkers.getActor(), edgeVisible=False)
+                self.nodeMarkers.scaleTo(mesh.getMesh())
+                self.nodeMarkers.setPoints(mesh.getData().points[self.selections.getSelection(selectionType).getIds()])
             case SelectionFilter.Surfaces:
-                pass
-            case SelectionFilter.Volumes:
-                pass
+                mesh = self.pparent.mesh
+                index = mesh.getFaceIndex(build=False)
+                if index is None:
+                    return
+                if not self.renderer.HasViewProp(self.faceMarkers.getActor()):
+                    self.AddActor(self.faceMarkers.getActor(), edgeVisible=False)
+                faces = self.selections.getSelection(selectionType).getIds()
+                self.faceMarkers.scaleTo(mesh.getMesh())
+                self.faceMarkers.setFaces(mesh.getData().points, index.getNodes()[faces], index.getNormals()[faces])
 
     def setSelectionFilter(self, filter:int) -> None:
         self.selectionFilter = SelectionFilter(filter)
@@ -0,0 +1,101 @@
+import vtk
+import numpy as np
+from vtkmodules.util.numpy_support import numpy_to_vtk, numpy_to_vtkIdTypeArray
+
+# Marker radius as a fraction of the bounding box diagonal of the marked model
+MARKER_SCALE: float = 0.005
+MARKER_COLOR: tuple[float, float, float] = (1.0, 0.0, 0.0)
+# Highlighted faces are lifted off the mesh surface by this fraction of the diagonal
+FACE_OFFSET: float = 0.001
+
+
+class PointMarkers():
+    '''Spheres at any number of points drawn by one actor. The sphere is
+    instanced on the GPU by a vtkGlyph3DMapper, changing the marked points
+    only swaps the coordinate array, so render time does not grow with the
+    number of actors.'''
+    def __init__(self, color: tuple[float, float, float] = MARKER_COLOR) -> None:
+        self._coords = np.empty((0, 3))
+        self._polyData = vtk.vtkPolyData()
+        self._polyData.SetPoints(vtk.vtkPoints())
+        self._sphere = vtk.vtkSphereSource()
+        self._sphere.SetThetaResolution(12)
+        self._sphere.SetPhiResolution(8)
+        self._mapper = vtk.vtkGlyph3DMapper()
+        self._mapper.SetInputData(self._polyData)
+        self._mapper.SetSourceConnection(self._sphere.GetOutputPort())
+        self._mapper.ScalingOff()
+        self._mapper.OrientOff()
+        self._actor = vtk.vtkActor()
+        self._actor.SetMapper(self._mapper)
+        self._actor.PickableOff()
+        self._actor.GetProperty().SetColor(color)
+        self.setPoints(self._coords)
+
+    # Getters
+    def getActor(self) -> vtk.vtkActor:
+        return self._actor
+
+    def getNumberOfPoints(self) -> int:
+        return len(self._coords)
+
+    # Setters
+    def setPoints(self, coords: np.ndarray) -> None:
+        '''(n, 3) marker centers, the array is handed to VTK without copying.'''
+        self._coords = np.ascontiguousarray(coords, dtype=np.float64).reshape(-1, 3)
+        self._polyData.GetPoints().SetData(numpy_to_vtk(self._coords, deep=False))
+        self._polyData.Modified()
+        self._actor.SetVisibility(len(self._coords) > 0)
+
+    def setRadius(self, radius: float) -> None:
+        self._sphere.SetRadius(radius)
+
+    def scaleTo(self, dataSet: vtk.vtkDataSet) -> None:
+        '''Sizes the markers relative to the bounding box of dataSet.'''
+        self.setRadius(max(dataSet.GetLength(), 1e-12) * MARKER_SCALE)
+
+
+class FaceMarkers():
+    '''Faces of a mesh drawn over its surface by one actor, e.g. a picked
+    *SURFACE. Faces are rows of 4 node indices (triangles padded with -1),
+    every face gets its own corners lifted along its normal, so that it is
+    not hidden by the coincident mesh face.'''
+    def __init__(self, color: tuple[float, float, float] = MARKER_COLOR) -> None:
+        self._offset = 0.0
+        self._polyData = vtk.vtkPolyData()
+        mapper = vtk.vtkPolyDataMapper()
+        mapper.SetInputData(self._polyData)
+        self._actor = vtk.vtkActor()
+        self._actor.SetMapper(mapper)
+        self._actor.PickableOff()
+        self._actor.GetProperty().SetColor(color)
+        self._actor.VisibilityOff()
+
+    # Getters
+    def getActor(self) -> vtk.vtkActor:
+        return self._actor
+
+    def getNumberOfFaces(self) -> int:
+        return self._polyData.GetNumberOfPolys()
+
+    # Setters
+    def setFaces(self, points: np.ndarray, faces: np.ndarray, normals: np.ndarray) -> None:
+        '''Shows faces of the nodes points with their (n, 3) unit normals.'''
+        valid = faces >= 0
+        counts = valid.sum(axis=1)
+        coords = points[faces[valid]] + np.repeat(normals, counts, axis=0) * self._offset
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        polys = vtk.vtkCellArray()
+        polys.SetData(numpy_to_vtkIdTypeArray(offsets, deep=True),
+                      numpy_to_vtkIdTypeArray(np.arange(len(coords), dtype=np.int64), deep=True))
+        vtkPoints = vtk.vtkPoints()
+        vtkPoints.SetData(numpy_to_vtk(np.ascontiguousarray(coords, dtype=np.float64), deep=True))
+        self._polyData.SetPoints(vtkPoints)
+        self._polyData.SetPolys(polys)
+        self._polyData.Modified()
+        self._actor.SetVisibility(len(faces) > 0)
+
+    def scaleTo(self, dataSet: vtk.vtkDataSet) -> None:
+        '''Sets the lift relative to the bounding box of dataSet, takes effect
+        with the next setFaces.'''
+        self._offset = max(dataSet.GetLength(), 1e-12) * FACE_OFFSET
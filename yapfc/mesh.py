@@ -1,13 +1,116 @@
 import vtk
-import meshio
+import threading
+import numpy as np
+from vtkmodules.util.numpy_support import numpy_to_vtk, numpy_to_vtkIdTypeArray, vtk_to_numpy
 from copy import copy, deepcopy
+from yapfc.meshData import MeshData, ProgressCallback
+from yapfc.meshCache import MeshCache, loadMeshData
+from yapfc.faces import FaceIndex, loadFaceIndex
+
+# meshio cell type -> VTK cell type, node ordering of both is the same
+VTK_CELL_TYPES: dict[str, int] = {
+    "line": vtk.VTK_LINE,
+    "line3": vtk.VTK_QUADRATIC_EDGE,
+    "triangle": vtk.VTK_TRIANGLE,
+    "triangle6": vtk.VTK_QUADRATIC_TRIANGLE,
+    "quad": vtk.VTK_QUAD,
+    "quad8": vtk.VTK_QUADRATIC_QUAD,
+    "tetra": vtk.VTK_TETRA,
+    "tetra10": vtk.VTK_QUADRATIC_TETRA,
+    "hexahedron": vtk.VTK_HEXAHEDRON,
+    "hexahedron20": vtk.VTK_QUADRATIC_HEXAHEDRON,
+    "wedge": vtk.VTK_WEDGE,
+    "wedge15": vtk.VTK_QUADRATIC_WEDGE,
+    "pyramid": vtk.VTK_PYRAMID,
+}
+
+DEFAULT_COLOR: tuple[int, int, int] = (255, 150, 255)
+SELECTED_COLOR: tuple[int, int, int] = (255, 0, 0)
+# Surfaces with more cells than this get a decimated proxy shown while the camera moves
+LOD_CELL_THRESHOLD: int = 300_000
+LOD_TARGET_CELLS: int = 100_000
+# Cycled through when coloring by set or material
+GROUP_COLORS: list[tuple[int, int, int]] = [
+    (31, 119, 180), (255, 127, 14), (44, 160, 44), (214, 39, 40), (148, 103, 189),
+    (140, 86, 75), (227, 119, 194), (127, 127, 127), (188, 189, 34), (23, 190, 207),
+]
+# Grid ids carried through the surface filter, see exteriorSurface
+GRID_CELL_IDS: str = "GridCellIds"
+GRID_POINT_IDS: str = "GridPointIds"
+
+def gridFromMeshData(data: MeshData, progress: ProgressCallback | None = None) -> vtk.vtkUnstructuredGrid:
+    '''Builds the grid from whole numpy arrays instead of cell by cell.
+    Points and a single block connectivity are handed to VTK without copying.'''
+    vtk_points = vtk.vtkPoints()
+    vtk_points.SetData(numpy_to_vtk(np.ascontiguousarray(data.points, dtype=np.float64), deep=False))
+
+    connectivity: list[np.ndarray] = []
+    offsets: list[np.ndarray] = []
+    types: list[np.ndarray] = []
+    start = 0
+    converted, total = 0, data.getNumberOfCells()
+    for block in data.blocks:
+        nCells, nNodes = block.connectivity.shape
+        connectivity.append(block.connectivity.reshape(-1))
+        offsets.append(np.arange(start, start + nCells * nNodes, nNodes, dtype=np.int64))
+        types.append(np.full(nCells, VTK_CELL_TYPES[block.cellType], dtype=np.uint8))
+        start += nCells * nNodes
+        converted += nCells
+        if progress:
+            progress("convert", converted, total)
+    offsets.append(np.array([start], dtype=np.int64))
+
+    conn = connectivity[0] if len(connectivity) == 1 else np.concatenate(connectivity or [np.empty(0, np.int64)])
+    vtk_cells = vtk.vtkCellArray()
+    vtk_cells.SetData(numpy_to_vtkIdTypeArray(np.concatenate(offsets), deep=False),
+                      numpy_to_vtkIdTypeArray(np.ascontiguousarray(conn, dtype=np.int64), deep=False))
+    vtk_types = numpy_to_vtk(np.concatenate(types or [np.empty(0, np.uint8)]), deep=False,
+                             array_type=vtk.VTK_UNSIGNED_CHAR)
+
+    grid = vtk.vtkUnstructuredGrid()
+    grid.SetPoints(vtk_points)
+    grid.SetCells(vtk_types, vtk_cells)
+    return grid
+
+def exteriorSurface(grid: vtk.vtkDataSet) -> tuple[vtk.vtkPolyData, np.ndarray, np.ndarray]:
+    '''Exterior faces of a grid with the grid id of every surface cell and
+    point. vtkOriginalCellIds counts faces instead of cells once quadratic
+    cells are present, so the ids travel as ordinary cell and point arrays of
+    a shallow copy instead. Quadratic faces are drawn by their corner nodes,
+    a picked polygon is then always one whole face.'''
+    source = grid.NewInstance()
+    source.ShallowCopy(grid)
+    for data, count, name in ((source.GetCellData(), grid.GetNumberOfCells(), GRID_CELL_IDS),
+                              (source.GetPointData(), grid.GetNumberOfPoints(), GRID_POINT_IDS)):
+        ids = numpy_to_vtk(np.arange(count, dtype=np.int64), deep=True)
+        ids.SetName(name)
+        data.AddArray(ids)
+    surfaceFilter = vtk.vtkDataSetSurfaceFilter()
+    surfaceFilter.SetInputData(source)
+    surfaceFilter.SetNonlinearSubdivisionLevel(0)
+    surfaceFilter.Update()
+    surface: vtk.vtkPolyData = surfaceFilter.GetOutput()
+    cellIds = surface.GetCellData().GetArray(GRID_CELL_IDS)
+    pointIds = surface.GetPointData().GetArray(GRID_POINT_IDS)
+    return (surface, vtk_to_numpy(cellIds) if cellIds is not None else np.empty(0, np.int64),
+            vtk_to_numpy(pointIds) if pointIds is not None else np.empty(0, np.int64))
 
 
 class Mesh():
-    def __init__(self, fpath: str) -> None:
+    def __init__(self, fpath: str, cache: MeshCache | None = None, progress: ProgressCallback | None = None,
+                 sourcePath: str | None = None) -> None:
+        # fpath is the file read, sourcePath the file the user opened (e.g. the
+        # geometry that gmsh meshed into fpath)
+        self._fpath = fpath
+        self._sourcePath = sourcePath or fpath
+        self._cache = cache
+        self._progress = progress
+        self._cellCenters: np.ndarray | None = None
+        self._faceIndex: FaceIndex | None = None
+        self._faceIndexLock = threading.Lock()
         self._mesh: vtk.vtkUnstructuredGrid | vtk.vtkPolyData = self._loadMesh(fpath)
-        self._actor: vtk.vtkActor = self._MapGridToActor(self._mesh)
         self._setColors()
+        self._actor: vtk.vtkActor = self._MapGridToActor(self._mesh)
 
     #Getters
     def getMesh(self) -> vtk.vtkUnstructuredGrid | vtk.vtkPolyData:
@@ -15,53 +118,155 @@ class Mesh():
     
     def getActor(self) -> vtk.vtkActor:
         return self._actor
+
+    def getData(self) -> MeshData:
+        return self._data
+
+    def getFilePath(self) -> str:
+        return self._sourcePath
+
+    def getSurface(self) -> vtk.vtkPolyData:
+        '''Boundary surface that is actually rendered and picked.'''
+        return self._surface
+
+    def getOriginalCellId(self, surfaceCellId: int) -> int:
+        if surfaceCellId < 0:
+            return surfaceCellId
+        return int(self._surfaceCellIds[surfaceCellId])
+
+    def getOriginalPointId(self, surfacePointId: int) -> int:
+        if surfacePointId < 0:
+            return surfacePointId
+        return int(self._surfacePointIds[surfacePointId])
+
+    def getOriginalCellIds(self, surfaceCellIds: np.ndarray) -> np.ndarray:
+        return self._surfaceCellIds[surfaceCellIds]
+
+    def getOriginalPointIds(self, surfacePointIds: np.ndarray) -> np.ndarray:
+        return self._surfacePointIds[surfacePointIds]
+
+    def getCellCenters(self) -> np.ndarray:
+        '''(n_cells, 3) mean of the nodes of every cell, computed on first use.'''
+        if self._cellCenters is None:
+            centers: list[np.ndarray] = []
+            for block in self._data.blocks:
+                # Summed one node column at a time, points[connectivity] would be nNodes times larger
+                center = np.zeros((len(block), 3))
+                for column in block.connectivity.T:
+                    center += self._data.points[column]
+                centers.append(center / max(block.connectivity.shape[1], 1))
+            self._cellCenters = np.concatenate(centers) if centers else np.empty((0, 3))
+        return self._cellCenters
+
+    def getFaceIndex(self, build: bool = True) -> FaceIndex | None:
+        '''Boundary faces and their adjacency, read from the mesh cache or built
+        on first use. A background build holds the lock, with build False this
+        returns None instead of waiting for it.'''
+        if self._faceIndex is None and build:
+            with self._faceIndexLock:
+                if self._faceIndex is None:
+                    self._faceIndex = loadFaceIndex(self._fpath, self._data, self._cache)
+        return self._faceIndex
+
+    def getCellColors(self) -> np.ndarray:
+        '''(n_cells, 3) uint8 array shared with the CellColors VTK array. After
+        writing to it call updateColors() once.'''
+        return self._colors
+
+    #Coloring
+    def setCellColors(self, cells: np.ndarray | list[int], color: tuple[int, int, int]) -> None:
+        '''cells is a boolean mask or an index array.'''
+        self._colors[cells] = color
+        self.updateColors()
+
+    def resetColors(self, cells: np.ndarray | list[int] | None = None) -> None:
+        '''Restores the base coloring (default, by set or by material) of cells, or of all cells.'''
+        if cells is None:
+            self._colors[:] = self._baseColors
+        else:
+            self._colors[cells] = self._baseColors[cells]
+        self.updateColors()
+
+    def colorByGroups(self, groups: dict[str, np.ndarray]) -> dict[str, tuple[int, int, int]]:
+        '''Makes every group of cell indices the base color of its cells, cells
+        outside all groups keep the default color. Returns the legend.'''
+        self._baseColors[:] = DEFAULT_COLOR
+        legend: dict[str, tuple[int, int, int]] = {}
+        for i, (name, cells) in enumerate(groups.items()):
+            legend[name] = GROUP_COLORS[i % len(GROUP_COLORS)]
+            self._baseColors[cells] = legend[name]
+        self.resetColors()
+        return legend
+
+    def colorBySets(self) -> dict[str, tuple[int, int, int]]:
+        return self.colorByGroups(self._data.elementSets)
+
+    def colorByDefault(self) -> None:
+        self.colorByGroups({})
+
+    def updateColors(self) -> None:
+        self._vtkColors.Modified()
+        if hasattr(self, "_surfaceColors"):
+            np.take(self._colors, self._surfaceCellIds, axis=0, out=self._surfaceColors)
+            self._vtkSurfaceColors.Modified()
+
+    #Level of detail
+    def hasLowDetail(self) -> bool:
+        return self._proxy is not None
+
+    def setLowDetail(self, lowDetail: bool) -> None:
+        '''Swaps the full surface for the decimated proxy (uncolored) and back.'''
+        if self._proxy is None:
+            return
+        mapper = self._actor.GetMapper()
+        mapper.SetInputData(self._proxy if lowDetail else self._surface)
+        mapper.SetScalarVisibility(not lowDetail)
     
     #Internal
     def _loadMesh(self, fpath: str) -> vtk.vtkUnstructuredGrid | vtk.vtkPolyData:
-        if fpath.endswith(".msh") or fpath.endswith(".mesh"):
-            mesh: meshio.Mesh = meshio.read(fpath)
-
-            vtk_points = vtk.vtkPoints()
-            for i in mesh.points:
-                vtk_points.InsertNextPoint(i)
-
-            # Asummes only tetra elements
-            cells = mesh.cells_dict["tetra"]
-            vtk_cells = vtk.vtkCellArray()
-            for cell in cells:
-                tetra = vtk.vtkTetra()
-                for i in range(4):
-                    tetra.GetPointIds().SetId(i, cell[i])
-                vtk_cells.InsertNextCell(tetra)
-
-            grid = vtk.vtkUnstructuredGrid()
-            grid.SetPoints(vtk_points)
-            grid.SetCells(vtk.VTK_TETRA, vtk_cells)
-            return grid
-        elif fpath.endswith(".stl"):
-            reader = vtk.vtkSTLReader()
-            reader.SetFileName(fpath)  # Replace with your VTK file path
-            reader.Update()
-            grid = reader.GetOutput()
-            return grid
-        else:
-            print(f'This format is not yet implemented')
-            return vtk.vtkSTLReader().GetOutput()
+        self._data: MeshData = loadMeshData(fpath, self._cache, self._progress)
+        return gridFromMeshData(self._data, self._progress)
 
     def _MapGridToActor(self, grid: vtk.vtkUnstructuredGrid | vtk.vtkPolyData | None):
-        mapper = vtk.vtkDataSetMapper()
-        mapper.SetInputData(grid)
+        # Only the exterior faces are rendered, interior faces of volume cells
+        # never reach the mapper. Original ids are kept for picking.
+        self._surface, self._surfaceCellIds, self._surfacePointIds = exteriorSurface(grid)
+
+        self._surfaceColors: np.ndarray = self._colors[self._surfaceCellIds]
+        self._vtkSurfaceColors = numpy_to_vtk(self._surfaceColors, deep=False, array_type=vtk.VTK_UNSIGNED_CHAR)
+        self._vtkSurfaceColors.SetName("CellColors")
+        self._surface.GetCellData().SetScalars(self._vtkSurfaceColors)
+
+        self._proxy: vtk.vtkPolyData | None = None
+        if self._surface.GetNumberOfCells() > LOD_CELL_THRESHOLD:
+            self._proxy = self._makeProxy(self._surface)
+
+        mapper = vtk.vtkPolyDataMapper()
+        mapper.SetInputData(self._surface)
         actor = vtk.vtkActor()
         actor.SetMapper(mapper)
         return actor
-    
+
+    def _makeProxy(self, surface: vtk.vtkPolyData) -> vtk.vtkPolyData:
+        # A closed surface clustered on an n^3 grid keeps roughly 12 n^2 triangles
+        divisions = max(16, int(np.sqrt(LOD_TARGET_CELLS / 12)))
+        clustering = vtk.vtkQuadricClustering()
+        clustering.SetInputData(surface)
+        clustering.SetNumberOfDivisions(divisions, divisions, divisions)
+        clustering.Update()
+        proxy = vtk.vtkPolyData()
+        proxy.ShallowCopy(clustering.GetOutput())
+        proxy.GetCellData().Initialize()
+        proxy.GetPointData().Initialize()
+        return proxy
+
     def _setColors(self) -> None:
-        mesh = self._mesh
-        colors = vtk.vtkUnsignedCharArray()
-        colors.SetNumberOfComponents(3)
-        colors.SetName("CellColors")
-
-        for i in range(mesh.GetNumberOfCells()):
-                colors.InsertNextTuple3(255, 150, 255)
-        
-        mesh.GetCellData().SetScalars(colors)
+        nCells = self._mesh.GetNumberOfCells()
+        self._baseColors: np.ndarray = np.empty((nCells, 3), dtype=np.uint8)
+        self._baseColors[:] = DEFAULT_COLOR
+        self._colors: np.ndarray = self._baseColors.copy()
+
+        # VTK reads straight from self._colors, recoloring is a numpy assignment
+        self._vtkColors = numpy_to_vtk(self._colors, deep=False, array_type=vtk.VTK_UNSIGNED_CHAR)
+        self._vtkColors.SetName("CellColors")
+        self._mesh.GetCellData().SetScalars(self._vtkColors)
@@ -0,0 +1,171 @@
+import os
+import re
+import threading
+import json
+import hashlib
+import numpy as np
+from yapfc.meshData import MeshData, CellBlock, ProgressCallback, readMeshData
+from yapfc.inpReader import isInpFile, includedFiles
+
+CACHE_VERSION: int = 1
+DEFAULT_CACHE_DIR: str = os.path.join(os.path.expanduser("~"), ".cache", "yapfc", "meshes")
+DEFAULT_CACHE_SIZE_MB: int = 2048
+# Subdirectory of the mesh cache that holds the .msh files of geometry.GmshMesher
+GMSH_CACHE_DIR: str = "gmsh"
+# Cache entries are named by the sha1 hex digest of their key
+_ENTRY_NAME = re.compile(r'[0-9a-f]{40}')
+
+
+class MeshCache():
+    '''Keeps converted meshes as uncompressed .npz files so that reopening a
+    source file skips parsing. Entries are keyed by path, size and mtime and
+    the directory is trimmed to maxBytes, least recently used first. The size
+    budget covers the .msh files of the gmsh subdirectory as well.'''
+    def __init__(self, cacheDir: str = DEFAULT_CACHE_DIR, maxBytes: int = DEFAULT_CACHE_SIZE_MB * 2**20) -> None:
+        self._cacheDir = cacheDir
+        self._maxBytes = maxBytes
+
+    # Getters
+    def getCacheDir(self) -> str:
+        return self._cacheDir
+
+    def getMaxBytes(self) -> int:
+        return self._maxBytes
+
+    def getKey(self, fpath: str, extra: str = "") -> str | None:
+        '''Hash of the path, size and mtime of fpath and of every file a deck
+        includes, so that editing an include invalidates the entry. None when
+        one of them does not exist, nothing is cached for it then.'''
+        try:
+            files = [fpath, *includedFiles(fpath)] if isInpFile(fpath) else [fpath]
+            stats = [(os.path.abspath(i), os.stat(i)) for i in files]
+        except FileNotFoundError:
+            return None
+        source = "|".join([str(CACHE_VERSION), *(f'{path}|{stat.st_size}|{stat.st_mtime_ns}' for path, stat in stats), extra])
+        return hashlib.sha1(source.encode()).hexdigest()
+
+    def getEntryPath(self, key: str) -> str:
+        return os.path.join(self._cacheDir, f'{key}.npz')
+
+    # Actions
+    def load(self, fpath: str, extra: str = "") -> MeshData | None:
+        arrays = self.loadArrays(fpath, extra)
+        if arrays is None:
+            return None
+        try:
+            return _unpack(arrays)
+        except (KeyError, ValueError):
+            return None
+
+    def store(self, fpath: str, data: MeshData, extra: str = "") -> None:
+        self.storeArrays(fpath, _pack(data), extra)
+
+    def loadArrays(self, fpath: str, extra: str = "") -> dict[str, np.ndarray] | None:
+        '''Arrays stored for fpath under extra, None when there is no entry.
+        Other data derived from a mesh (see faces.loadFaceIndex) lives next to
+        it this way and is evicted with the meshes.'''
+        key = self.getKey(fpath, extra)
+        if key is None:
+            return None
+        entry = self.getEntryPath(key)
+        try:
+            with np.load(entry, allow_pickle=False) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+        except (OSError, ValueError):
+            return None
+        # mtime is the LRU clock
+        os.utime(entry)
+        return arrays
+
+    def storeArrays(self, fpath: str, arrays: dict[str, np.ndarray], extra: str = "") -> None:
+        key = self.getKey(fpath, extra)
+        if key is None:
+            return
+        os.makedirs(self._cacheDir, exist_ok=True)
+        entry = self.getEntryPath(key)
+        tmp = f'{entry}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, entry)
+        except OSError as e:
+            print(f'Unable to write mesh cache entry {entry}: {e}')
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        evictLeastRecentlyUsed([(self._cacheDir, ".npz"), (os.path.join(self._cacheDir, GMSH_CACHE_DIR), ".msh")],
+                               self._maxBytes)
+
+    def clear(self) -> None:
+        self._maxBytes, maxBytes = 0, self._maxBytes
+        self.evict()
+        self._maxBytes = maxBytes
+
+
+def evictLeastRecentlyUsed(locations: list[tuple[str, str]], maxBytes: int) -> None:
+    '''Deletes cache entries, oldest mtime first, until the rest fits into
+    maxBytes. Entries are the files of the (directory, suffix) locations
+    named <sha1 hex digest><suffix>, other files there are left alone.'''
+    stats: list[tuple[os.stat_result, str]] = []
+    for directory, suffix in locations:
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            continue
+        for name in names:
+            if name.endswith(suffix) and _ENTRY_NAME.fullmatch(name[:-len(suffix)]):
+                entry = os.path.join(directory, name)
+                try:
+                    stats.append((os.stat(entry), entry))
+                except FileNotFoundError:
+                    # Already evicted by a concurrent load
+                    pass
+    stats.sort(key=lambda x: x[0].st_mtime_ns)
+    total = sum(stat.st_size for stat, _ in stats)
+    for stat, entry in stats:
+        if total <= maxBytes:
+            break
+        try:
+            os.remove(entry)
+        except FileNotFoundError:
+            pass
+        total -= stat.st_size
+
+def loadMeshData(fpath: str, cache: MeshCache | None = None, progress: ProgressCallback | None = None) -> MeshData:
+    if cache is not None:
+        data = cache.load(fpath)
+        if data is not None:
+            if progress:
+                size = os.path.getsize(fpath)
+                progress("read", size, size)
+            return data
+    data = readMeshData(fpath, progress)
+    if cache is not None:
+        cache.store(fpath, data)
+    return data
+
+def _pack(data: MeshData) -> dict[str, np.ndarray]:
+    meta = {
+        "blocks": [[block.cellType, block.ccxType] for block in data.blocks],
+        "nodeSets": list(data.nodeSets),
+        "elementSets": list(data.elementSets),
+    }
+    arrays = {"meta": np.array(json.dumps(meta)), "points": data.points,
+              "nodeIds": data.nodeIds, "elementIds": data.elementIds}
+    for i, block in enumerate(data.blocks):
+        arrays[f'block{i}'] = block.connectivity
+    for i, ids in enumerate(data.nodeSets.values()):
+        arrays[f'nset{i}'] = ids
+    for i, ids in enumerate(data.elementSets.values()):
+        arrays[f'elset{i}'] = ids
+    return arrays
+
+def _unpack(npz) -> MeshData:
+    meta = json.loads(str(npz["meta"]))
+    blocks = [CellBlock(cellType, npz[f'block{i}'], ccxType) for i, (cellType, ccxType) in enumerate(meta["blocks"])]
+    nodeSets = {name: npz[f'nset{i}'] for i, name in enumerate(meta["nodeSets"])}
+    elementSets = {name: npz[f'elset{i}'] for i, name in enumerate(meta["elementSets"])}
+    return MeshData(npz["points"], blocks, npz["nodeIds"], npz["elementIds"], nodeSets, elementSets)
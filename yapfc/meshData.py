@@ -0,0 +1,165 @@
+import os
+import numpy as np
+from typing import Callable
+from yapfc.idMap import IdMap
+
+# Called as progress(stage, done, total), stage is "read" (bytes) or "convert" (cells).
+# A callback may raise LoadCancelled to abort the load.
+ProgressCallback = Callable[[str, int, int], None]
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+# meshio cell type -> number of nodes for every block type yapfc can show
+CELL_NODE_COUNT: dict[str, int] = {
+    "line": 2,
+    "line3": 3,
+    "triangle": 3,
+    "triangle6": 6,
+    "quad": 4,
+    "quad8": 8,
+    "tetra": 4,
+    "tetra10": 10,
+    "hexahedron": 8,
+    "hexahedron20": 20,
+    "wedge": 6,
+    "wedge15": 15,
+    "pyramid": 5,
+}
+
+CELL_DIMENSION: dict[str, int] = {
+    "line": 1, "line3": 1,
+    "triangle": 2, "triangle6": 2, "quad": 2, "quad8": 2,
+    "tetra": 3, "tetra10": 3, "hexahedron": 3, "hexahedron20": 3,
+    "wedge": 3, "wedge15": 3, "pyramid": 3,
+}
+
+
+# CalculiX element type -> meshio cell type, node ordering of both is the same
+CCX_CELL_TYPES: dict[str, str] = {
+    "C3D4": "tetra",
+    "C3D10": "tetra10", "C3D10T": "tetra10",
+    "C3D8": "hexahedron", "C3D8R": "hexahedron", "C3D8I": "hexahedron",
+    "C3D20": "hexahedron20", "C3D20R": "hexahedron20",
+    "C3D6": "wedge",
+    "C3D15": "wedge15",
+    "S3": "triangle", "CPS3": "triangle", "CPE3": "triangle", "CAX3": "triangle", "M3D3": "triangle",
+    "S6": "triangle6", "CPS6": "triangle6", "CPE6": "triangle6", "CAX6": "triangle6", "M3D6": "triangle6",
+    "S4": "quad", "S4R": "quad", "CPS4": "quad", "CPS4R": "quad", "CPE4": "quad", "CPE4R": "quad",
+    "CAX4": "quad", "CAX4R": "quad", "M3D4": "quad", "M3D4R": "quad",
+    "S8": "quad8", "S8R": "quad8", "CPS8": "quad8", "CPS8R": "quad8", "CPE8": "quad8", "CPE8R": "quad8",
+    "CAX8": "quad8", "CAX8R": "quad8", "M3D8": "quad8", "M3D8R": "quad8",
+    "T3D2": "line", "B31": "line", "B31R": "line",
+    "T3D3": "line3", "B32": "line3", "B32R": "line3",
+}
+
+# meshio cell type -> default CalculiX element type used on export. The node
+# order of every pair (wedges included) is the same in CalculiX and VTK.
+DEFAULT_CCX_TYPES: dict[str, str] = {
+    "tetra": "C3D4", "tetra10": "C3D10",
+    "hexahedron": "C3D8", "hexahedron20": "C3D20",
+    "wedge": "C3D6", "wedge15": "C3D15",
+    "triangle": "S3", "triangle6": "S6", "quad": "S4", "quad8": "S8",
+    "line": "B31", "line3": "B32",
+}
+
+
+class CellBlock():
+    def __init__(self, cellType: str, connectivity: np.ndarray, ccxType: str | None = None) -> None:
+        self.cellType: str = cellType
+        self.connectivity: np.ndarray = connectivity
+        self.ccxType: str | None = ccxType
+
+    def __len__(self) -> int:
+        return len(self.connectivity)
+
+
+class MeshData():
+    '''Plain numpy representation of a mesh: node coordinates and blocks of
+    cells whose connectivity holds zero based indices into points.
+    nodeIds/elementIds keep the external labels (nodeMap/elementMap translate
+    between labels and indices, maps built for the ids before can be handed
+    over), sets hold zero based indices.'''
+    def __init__(self, points: np.ndarray, blocks: list[CellBlock],
+                 nodeIds: np.ndarray | None = None, elementIds: np.ndarray | None = None,
+                 nodeSets: dict[str, np.ndarray] | None = None,
+                 elementSets: dict[str, np.ndarray] | None = None,
+                 nodeMap: IdMap | None = None, elementMap: IdMap | None = None) -> None:
+        self.points: np.ndarray = points
+        self.blocks: list[CellBlock] = blocks
+        if nodeIds is None:
+            nodeIds = np.arange(1, len(points) + 1, dtype=np.int64)
+        if elementIds is None:
+            elementIds = np.arange(1, self.getNumberOfCells() + 1, dtype=np.int64)
+        self.nodeIds: np.ndarray = nodeIds
+        self.elementIds: np.ndarray = elementIds
+        self.nodeMap: IdMap = nodeMap if nodeMap is not None else IdMap(nodeIds, "node")
+        self.elementMap: IdMap = elementMap if elementMap is not None else IdMap(elementIds, "element")
+        self.nodeSets: dict[str, np.ndarray] = nodeSets if nodeSets is not None else {}
+        self.elementSets: dict[str, np.ndarray] = elementSets if elementSets is not None else {}
+
+    def getNumberOfPoints(self) -> int:
+        return len(self.points)
+
+    def getNumberOfCells(self) -> int:
+        return sum(len(block) for block in self.blocks)
+
+    @classmethod
+    def fromMeshio(cls, mesh) -> 'MeshData':
+        points = np.asarray(mesh.points, dtype=np.float64)
+        if points.shape[1] < 3:
+            points = np.hstack([points, np.zeros((len(points), 3 - points.shape[1]))])
+
+        blocks: list[CellBlock] = []
+        skipped: set[str] = set()
+        # Global index of the first cell of every meshio block, None when skipped
+        starts: list[int | None] = []
+        nCells = 0
+        for block in mesh.cells:
+            if block.type not in CELL_NODE_COUNT:
+                skipped.add(block.type)
+                starts.append(None)
+                continue
+            connectivity = np.asarray(block.data, dtype=np.int64)
+            starts.append(nCells)
+            nCells += len(connectivity)
+            # Consecutive blocks of one type (gmsh writes one per entity) are merged
+            if blocks and blocks[-1].cellType == block.type:
+                blocks[-1].connectivity = np.concatenate([blocks[-1].connectivity, connectivity])
+            else:
+                blocks.append(CellBlock(block.type, connectivity))
+        if skipped - {"vertex"}:
+            print(f'Skipped unsupported cell types: {", ".join(sorted(skipped))}')
+
+        nodeSets = {name: np.asarray(ids, dtype=np.int64) for name, ids in mesh.point_sets.items()
+                    if not name.startswith("gmsh:")}
+        elementSets: dict[str, np.ndarray] = {}
+        for name, perBlock in mesh.cell_sets.items():
+            if name.startswith("gmsh:"):
+                continue
+            parts = [np.asarray(ids, dtype=np.int64) + start
+                     for ids, start in zip(perBlock, starts) if start is not None and ids is not None]
+            elementSets[name] = np.concatenate(parts) if parts else np.empty(0, np.int64)
+        return cls(np.ascontiguousarray(points), blocks, nodeSets=nodeSets, elementSets=elementSets)
+
+
+MESHIO_EXTENSIONS: tuple[str, ...] = (".msh", ".mesh", ".stl", ".vtu", ".vtk", ".obj", ".ply")
+
+def readMeshData(fpath: str, progress: ProgressCallback | None = None) -> MeshData:
+    # Readers are imported lazily, meshio alone takes a noticeable part of start up
+    from yapfc.inpReader import readInp, isInpFile
+    if fpath.lower().endswith(MESHIO_EXTENSIONS):
+        import meshio
+        size = os.path.getsize(fpath)
+        if progress:
+            progress("read", 0, size)
+        data = MeshData.fromMeshio(meshio.read(fpath))
+        if progress:
+            progress("read", size, size)
+        return data
+    elif isInpFile(fpath):
+        return readInp(fpath, progress=progress)
+    else:
+        raise ValueError(f'This format is not yet implemented: {fpath}')
@@ -1,5 +1,10 @@
+import os
+import uuid
+from typing import Iterator
 from PySide6.QtGui import QStandardItem
 from yapfc.dialogs import TextEditor, MaterialDialog, SectionDialog, CCXWriterCategory
+from yapfc.meshData import MeshData
+from yapfc.inpWriter import MeshInclude, includeName, includeLine
 
 class Label(QStandardItem):
     def __init__(self, text="Label"):
@@ -15,6 +20,10 @@ class Label(QStandardItem):
     def getStoredText(self) -> str:
         return ''
 
+    def toDict(self) -> dict:
+        return {"kind": "Label", "text": self.text(),
+                "children": [self.child(row).toDict() for row in range(self.rowCount())]}
+
 class CcxWriter(QStandardItem):
     writters: list['CcxWriter'] = []
     def __init__(self, text="CcxWriter", dialog: None | type[MaterialDialog | SectionDialog]=None):
@@ -22,6 +31,8 @@ class CcxWriter(QStandardItem):
         type(self).writters.append(self)
         self.setEditable(False)
         self._stored_text = ""
+        # Names the section file of the writer in incremental decks, survives renames and moves in the tree
+        self._writerId = uuid.uuid4().hex[:12]
         self._className = str(type(self)).split(".")[-1].split("Sub")[0]
         self._textLabel = self._className
         self._editor = TextEditor(self)
@@ -46,9 +57,20 @@ class CcxWriter(QStandardItem):
     def setStoredText(self, newText:str) -> None:
         self._stored_text = newText
 
+    def setWriterId(self, writerId: str) -> None:
+        self._writerId = writerId
+
     # Getters
     def getStoredText(self) -> str:
         return self._stored_text
+
+    def getWriterId(self) -> str:
+        return self._writerId
+
+    def toDict(self) -> dict:
+        '''Project representation, see project.py.'''
+        return {"kind": type(self).__name__, "text": self.text(), "stored_text": self.getStoredText(),
+                "id": self._writerId, "children": [self.child(row).toDict() for row in range(self.rowCount())]}
     
     def getTextLabel(self) -> str:
         return self._textLabel
@@ -66,9 +88,10 @@ class CcxWriter(QStandardItem):
         return result
 
 class MeshSubWriter(CcxWriter):
-    def __init__(self, text="Mesh"):
+    def __init__(self, text="Mesh", mesh: MeshData | None = None, meshPath: str | None = None):
         super().__init__(text)
         self.setEditable(False)
+        self._include: MeshInclude | None = None
         self.setStoredText('''*Node
 1, -2.62000000E+001, 5.79483884E+000, -4.82760553E+000
 2, -2.62000000E+001, 1.06948388E+001, -4.82760553E+000
@@ -109,6 +132,59 @@ Solid_part-2
 
 *Surface, Name=Internal_Selection-1_Surface_Traction-1, Type=Element
 Internal-1_Internal_Selection-1_Surface_Traction-1_S2, S2''')
+        # The text above stays as the fallback when no mesh is attached
+        self._include = MeshInclude(mesh, meshPath) if mesh is not None else None
+
+    # Setters
+    def setMesh(self, mesh: MeshData | None, meshPath: str | None = None) -> None:
+        self._include = MeshInclude(mesh, meshPath) if mesh is not None else None
+
+    def setStoredText(self, newText: str) -> None:
+        # Editing the *INCLUDE line by hand detaches the loaded mesh
+        if self._include is not None and newText != self.getStoredText():
+            self._include = None
+        super().setStoredText(newText)
+
+    # Getters
+    def getMesh(self) -> MeshData | None:
+        return self._include.getData() if self._include is not None else None
+
+    def getMeshPath(self) -> str | None:
+        return self._include.getSourcePath() if self._include is not None else None
+
+    def getIncludeName(self) -> str:
+        return includeName(self.text())
+
+    def getStoredText(self) -> str:
+        if self._include is not None:
+            return f'*INCLUDE, INPUT={self.getIncludeName()}'
+        return super().getStoredText()
+
+    def iterStoredText(self, deckDir: str = ".", includeDir: str | None = None) -> Iterator[str]:
+        '''includeDir is where the mesh include goes when it is written first,
+        later decks (e.g. the variants of a sweep) share that file.'''
+        if self._include is None:
+            yield self.getStoredText()
+            return
+        yield includeLine(self.exportMesh(includeDir or deckDir), deckDir)
+
+    def toDict(self) -> dict:
+        result = super().toDict()
+        # The fallback text is saved as well, the mesh itself is reloaded from its source
+        result["stored_text"] = self._stored_text
+        if self.getMeshPath():
+            result["mesh"] = os.path.abspath(self.getMeshPath())
+        return result
+
+    # Actions
+    def exportMesh(self, directory: str) -> str:
+        '''Writes the *NODE/*ELEMENT/*NSET/*ELSET include once, later runs reuse
+        it (wherever it was written) as long as the file on disk is the one
+        written here.'''
+        fpath = os.path.join(directory, self.getIncludeName())
+        if self._include is not None:
+            return self._include.export(fpath)
+        return fpath
 
 class MaterialSubWriter(CcxWriter):
     def __init__(self, text="Materials"):
@@ -165,7 +241,7 @@ class StepSubWriter(CcxWriter):
         super().__init__(text)
         self.setEditable(False)
         self.setStoredText('''*Step
-*Static, Solver=Spooles
+*Static, Solver=${solver=Spooles}
 *Output, Frequency=1''')
 
 class BoundarySubWriter(CcxWriter):
@@ -199,6 +275,37 @@ class AnalysisSubWriter(CcxWriter):
     def __init__(self, text="Analysis"):
         super().__init__(text)
         self._inp_string: str = ""
+        # Parameter ranges of the last parametric sweep, see sweep.parseRanges
+        self._sweep: str = ""
+
+    def setSweep(self, ranges: str) -> None:
+        self._sweep = ranges
+
+    def getSweep(self) -> str:
+        return self._sweep
+
+    def toDict(self) -> dict:
+        result = super().toDict()
+        result["sweep"] = self._sweep
+        return result
 
     def setInpString(self, newInpStr:str) -> None:
         self._inp_string = newInpStr
+
+
+WRITER_CLASSES: dict[str, type[CcxWriter]] = {cls.__name__: cls for cls in (
+    MeshSubWriter, MaterialSubWriter, SectionSubWriter, ConstraintSubWriter, ContactSubWriter,
+    AmplitudeSubWriter, InitialConditionSubWriter, StepSubWriter, BoundarySubWriter, AnalysisSubWriter)}
+
+def writerFromDict(node: dict) -> CcxWriter:
+    '''Rebuilds a writer and its children from project data. Meshes are not
+    loaded here, the caller attaches them with setMesh.'''
+    writer = WRITER_CLASSES[node["kind"]](node["text"])
+    writer.setStoredText(node.get("stored_text", ""))
+    if node.get("id"):
+        writer.setWriterId(node["id"])
+    if isinstance(writer, AnalysisSubWriter):
+        writer.setSweep(node.get("sweep", ""))
+    for child in node.get("children", []):
+        writer.appendRow(writerFromDict(child))
+    return writer
@@ -0,0 +1,174 @@
+import os
+import re
+import numpy as np
+from yapfc.resultCache import iterCanonicalLines
+
+# Rows kept per job, older increments and iterations fall out of the buffers
+HISTORY: int = 4096
+_STA_COLUMNS: tuple[str, ...] = ("step", "increment", "attempt", "iterations", "total_time", "step_time", "increment_time")
+_CVG_COLUMNS: tuple[str, ...] = ("step", "increment", "attempt", "iteration", "contact_elements",
+                                 "force_residual", "displacement_correction", "flux_residual", "temperature_correction")
+_RESIDUAL = re.compile(r'largest residual force=\s*(\S+)')
+_PROCEDURE = re.compile(r'^\*\s*(STATIC|DYNAMIC|HEAT\s*TRANSFER|COUPLED\s*TEMPERATURE-DISPLACEMENT|VISCO|UNCOUPLED\s*TEMPERATURE-DISPLACEMENT)', re.I)
+
+
+class RingBuffer():
+    '''Fixed capacity table of float rows, the oldest rows are overwritten.'''
+    def __init__(self, columns: int, capacity: int = HISTORY) -> None:
+        self._data = np.zeros((capacity, columns))
+        self._count = 0
+
+    def __len__(self) -> int:
+        return min(self._count, len(self._data))
+
+    def append(self, rows: np.ndarray) -> None:
+        rows = np.atleast_2d(rows)[-len(self._data):]
+        start = self._count % len(self._data)
+        end = start + len(rows)
+        if end <= len(self._data):
+            self._data[start:end] = rows
+        else:
+            split = len(self._data) - start
+            self._data[start:] = rows[:split]
+            self._data[:end - len(self._data)] = rows[split:]
+        self._count += len(rows)
+
+    def values(self) -> np.ndarray:
+        '''Rows in insertion order (a copy once the buffer wrapped).'''
+        if self._count <= len(self._data):
+            return self._data[:self._count]
+        start = self._count % len(self._data)
+        return np.concatenate([self._data[start:], self._data[:start]])
+
+    def last(self) -> np.ndarray | None:
+        return self._data[(self._count - 1) % len(self._data)] if self._count else None
+
+
+class FileTail():
+    '''Returns the lines appended to a file since the last call. Only the new
+    bytes are read, a partial last line is kept until it is completed.'''
+    def __init__(self, fpath: str) -> None:
+        self._fpath = fpath
+        self._offset = 0
+        self._partial = b""
+
+    def readLines(self) -> list[str]:
+        try:
+            size = os.path.getsize(self._fpath)
+        except OSError:
+            return []
+        if size < self._offset:
+            # Rewritten by a new run
+            self._offset, self._partial = 0, b""
+        if size == self._offset:
+            return []
+        with open(self._fpath, "rb") as f:
+            f.seek(self._offset)
+            data = self._partial + f.read(size - self._offset)
+        self._offset = size
+        cut = data.rfind(b"\n") + 1
+        self._partial = data[cut:]
+        return data[:cut].decode(errors="replace").splitlines()
+
+
+def stepPeriods(deckPath: str) -> list[float]:
+    '''Time period of every *STEP of a deck and its includes (the second
+    value of the procedure data line, 1.0 when not given), used for time
+    fractions.'''
+    periods: list[float] = []
+    expectData = False
+    try:
+        for line in iterCanonicalLines(deckPath):
+            if expectData:
+                expectData = False
+                if not line.startswith("*"):
+                    try:
+                        periods[-1] = float(line.split(",")[1])
+                    except (IndexError, ValueError):
+                        pass
+                    continue
+            if _PROCEDURE.match(line):
+                periods.append(1.0)
+                expectData = True
+    except OSError:
+        pass
+    return periods
+
+def _numericRows(lines: list[str], columns: int) -> np.ndarray:
+    rows = []
+    for line in lines:
+        parts = line.split()
+        if len(parts) != columns:
+            continue
+        try:
+            rows.append([float(i) for i in parts])
+        except ValueError:
+            continue
+    return np.array(rows).reshape(-1, columns)
+
+
+class JobMonitor():
+    '''Follows a running ccx job through its .sta/.cvg files and stdout and
+    keeps the parsed increments, iterations and residuals in ring buffers.'''
+    def __init__(self, jobPath: str) -> None:
+        self._jobPath = jobPath
+        self._sta = FileTail(f'{jobPath}.sta')
+        self._cvg = FileTail(f'{jobPath}.cvg')
+        self._periods = stepPeriods(f'{jobPath}.inp')
+        self.increments = RingBuffer(len(_STA_COLUMNS))
+        self.iterations = RingBuffer(len(_CVG_COLUMNS))
+        self.residuals = RingBuffer(1)
+        self._changed = False
+
+    # Getters
+    def getJobPath(self) -> str:
+        return self._jobPath
+
+    def getStepFraction(self) -> float | None:
+        '''Fraction of the current step's time period that is solved.'''
+        last = self.increments.last()
+        if last is None:
+            return None
+        step = int(last[0])
+        period = self._periods[step - 1] if 0 < step <= len(self._periods) else 1.0
+        return float(last[5] / period) if period > 0 else None
+
+    def getSummary(self) -> str:
+        last = self.increments.last()
+        if last is None:
+            return "waiting for the first increment"
+        fraction = self.getStepFraction()
+        text = f'step {int(last[0])}, increment {int(last[1])}, total time {last[4]:g}'
+        if fraction is not None:
+            text += f' ({fraction:.0%} of step)'
+        return text
+
+    # Actions
+    def feedOutput(self, text: str) -> None:
+        '''Parses solver stdout as it is streamed by the job.'''
+        values = [float(i) for i in _RESIDUAL.findall(text) if _isFloat(i)]
+        if values:
+            self.residuals.append(np.array(values).reshape(-1, 1))
+            self._changed = True
+
+    def poll(self) -> bool:
+        '''Reads what was appended to the .sta/.cvg files since the last poll.
+        Returns True when anything changed since the previous poll.'''
+        rows = _numericRows(self._sta.readLines(), len(_STA_COLUMNS))
+        if len(rows):
+            self.increments.append(rows)
+            self._changed = True
+        rows = _numericRows(self._cvg.readLines(), len(_CVG_COLUMNS))
+        if len(rows):
+            self.iterations.append(rows)
+            self._changed = True
+        changed, self._changed = self._changed, False
+        return changed
+
+
+def _isFloat(text: str) -> bool:
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
@@ -0,0 +1,95 @@
+import os
+import numpy as np
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QComboBox, QLabel
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
+from yapfc.monitor import JobMonitor
+from yapfc.jobs import SolverJob
+
+# One poll of all running jobs per interval, a redraw only when the shown job changed
+POLL_INTERVAL_MS: int = 1000
+
+
+class MonitorPanel(QWidget):
+    '''Live convergence plots of running solver jobs. All jobs are tailed by a
+    single timer, only the job selected in the combo box is drawn, and only
+    when new data arrived while the panel is visible.'''
+    def __init__(self, parent: QWidget | None = None, interval: int = POLL_INTERVAL_MS) -> None:
+        super().__init__(parent)
+        self._monitors: dict[str, JobMonitor] = {}
+        self._active: set[str] = set()
+
+        self._jobs = QComboBox()
+        self._jobs.currentTextChanged.connect(lambda _: self._redraw())
+        self._summary = QLabel("No running jobs")
+        self._figure = Figure(figsize=(4, 3), tight_layout=True)
+        self._canvas = FigureCanvasQTAgg(self._figure)
+        self._residualAxes = self._figure.add_subplot(2, 1, 1)
+        self._residualAxes.set_xlabel("iteration")
+        self._residualAxes.set_ylabel("force residual")
+        self._residualAxes.set_yscale("log")
+        self._residualLine, = self._residualAxes.plot([], [], ".-")
+        self._progressAxes = self._figure.add_subplot(2, 1, 2)
+        self._progressAxes.set_xlabel("increment")
+        self._progressAxes.set_ylabel("total time")
+        self._progressLine, = self._progressAxes.step([], [], where="post")
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self._jobs)
+        layout.addWidget(self._summary)
+        layout.addWidget(self._canvas)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._tick)
+
+    # Actions
+    def addJob(self, job: SolverJob) -> None:
+        name = job.getName()
+        self._monitors[name] = JobMonitor(os.path.join(job.getWorkDir(), name))
+        self._active.add(name)
+        if self._jobs.findText(name) < 0:
+            self._jobs.addItem(name)
+        self._jobs.setCurrentText(name)
+        self._timer.start()
+
+    def feedOutput(self, job: SolverJob, text: str) -> None:
+        monitor = self._monitors.get(job.getName())
+        if monitor is not None:
+            monitor.feedOutput(text)
+
+    def finishJob(self, job: SolverJob) -> None:
+        '''Reads what the job wrote last and stops tailing it, the plots stay.'''
+        name = job.getName()
+        monitor = self._monitors.get(name)
+        if monitor is not None and monitor.poll() and name == self._jobs.currentText():
+            self._redraw()
+        self._active.discard(name)
+        if not self._active:
+            self._timer.stop()
+
+    # Internal
+    def _tick(self) -> None:
+        current = self._jobs.currentText()
+        changed = False
+        for name in list(self._active):
+            if self._monitors[name].poll() and name == current:
+                changed = True
+        if changed and self.isVisible():
+            self._redraw()
+
+    def _redraw(self) -> None:
+        monitor = self._monitors.get(self._jobs.currentText())
+        if monitor is None:
+            return
+        self._summary.setText(monitor.getSummary())
+        iterations = monitor.iterations.values()
+        residuals = iterations[:, 5] if len(iterations) else monitor.residuals.values()[:, 0]
+        self._residualLine.set_data(np.arange(1, len(residuals) + 1), np.where(residuals > 0, residuals, np.nan))
+        increments = monitor.increments.values()
+        self._progressLine.set_data(np.arange(1, len(increments) + 1), increments[:, 4])
+        for axes in (self._residualAxes, self._progressAxes):
+            axes.relim()
+            axes.autoscale_view()
+        self._canvas.draw_idle()
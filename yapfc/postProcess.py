@@ -0,0 +1,261 @@
+import os
+import numpy as np
+from typing import Callable
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from concurrent.futures import ProcessPoolExecutor
+from yapfc.resultCache import iterCanonicalLines
+from yapfc.coreBudget import availableCpus
+
+# Rows evaluated per numpy pass, bounds the temporaries of derived fields
+CHUNK_ROWS: int = 1 << 16
+# Below this many steps a pool costs more to start than it saves
+MIN_POOL_STEPS: int = 4
+# Stress and strain tensors are stored as xx, yy, zz, xy, yz, zx by ccx
+_TENSOR_INDEX: np.ndarray = np.array([[0, 3, 5], [3, 1, 4], [5, 4, 2]])
+
+
+def vonMises(stress: np.ndarray) -> np.ndarray:
+    xx, yy, zz, xy, yz, zx = stress.T
+    return np.sqrt(0.5 * ((xx - yy)**2 + (yy - zz)**2 + (zz - xx)**2) + 3.0 * (xy**2 + yz**2 + zx**2))
+
+def principalStresses(stress: np.ndarray) -> np.ndarray:
+    '''(n, 3) principal values of (n, 6) tensors, largest first.'''
+    return np.linalg.eigvalsh(stress[:, _TENSOR_INDEX])[:, ::-1]
+
+def tresca(stress: np.ndarray) -> np.ndarray:
+    principal = principalStresses(stress)
+    return principal[:, 0] - principal[:, 2]
+
+def magnitude(values: np.ndarray) -> np.ndarray:
+    return np.linalg.norm(values, axis=1)
+
+# Derived fields by name, each maps a chunk of (n, components) values to (n,) or (n, k)
+DERIVED: dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "von Mises": vonMises,
+    "Tresca": tresca,
+    "Max Principal": lambda stress: principalStresses(stress)[:, 0],
+    "Mid Principal": lambda stress: principalStresses(stress)[:, 1],
+    "Min Principal": lambda stress: principalStresses(stress)[:, 2],
+    "Principal": principalStresses,
+    "Magnitude": magnitude,
+}
+# Derived fields that need a symmetric tensor (6 components)
+TENSOR_DERIVED: tuple[str, ...] = ("von Mises", "Tresca", "Max Principal", "Mid Principal", "Min Principal", "Principal")
+
+
+def evaluate(derived: str | None, values: np.ndarray, chunkRows: int = CHUNK_ROWS) -> np.ndarray:
+    '''Derived field of (n, components) values as (n, k), CHUNK_ROWS rows at a
+    time. None gives the values themselves.'''
+    values = np.asarray(values)
+    if derived is None:
+        return values if values.ndim == 2 else values.reshape(len(values), -1)
+    if derived not in DERIVED:
+        raise KeyError(f'Unknown derived field {derived}')
+    if derived in TENSOR_DERIVED and (values.ndim != 2 or values.shape[1] != 6):
+        raise ValueError(f'{derived} needs 6 tensor components, got {values.shape[1:]}')
+    function = DERIVED[derived]
+    out: np.ndarray | None = None
+    for start in range(0, len(values), chunkRows):
+        chunk = function(np.asarray(values[start:start + chunkRows], dtype=np.float64))
+        chunk = chunk.reshape(len(chunk), -1)
+        if out is None:
+            out = np.empty((len(values), chunk.shape[1]))
+        out[start:start + len(chunk)] = chunk
+    return out if out is not None else np.empty((0, 1))
+
+def safetyFactor(equivalent: np.ndarray, allowable: float | np.ndarray) -> np.ndarray:
+    '''allowable / equivalent, inf where nothing is loaded. allowable is one
+    value or one per row (see rowAllowables), NaN rows stay NaN.'''
+    equivalent = np.asarray(equivalent, dtype=np.float64).reshape(len(equivalent), -1)[:, 0]
+    allowable = np.broadcast_to(np.asarray(allowable, dtype=np.float64), equivalent.shape)
+    factor = np.full(equivalent.shape, np.inf)
+    loaded = equivalent > 0
+    np.divide(allowable, equivalent, out=factor, where=loaded)
+    factor[np.isnan(allowable)] = np.nan
+    return factor
+
+def rowAllowables(count: int, groups: dict[str, np.ndarray], allowables: dict[str, float]) -> np.ndarray:
+    '''Allowable stress per result row from material name -> row indices.
+    Rows shared by several materials (interface nodes) get the lowest one,
+    rows of no material NaN.'''
+    rows = np.full(count, np.inf)
+    for material, indices in groups.items():
+        if material in allowables:
+            np.minimum.at(rows, np.asarray(indices, dtype=np.int64), allowables[material])
+    rows[np.isinf(rows)] = np.nan
+    return rows
+
+def materialYieldStrengths(deckPath: str) -> dict[str, float]:
+    '''Initial yield stress (first *PLASTIC data line) of every material of a
+    deck, materials without plasticity are left out. Names are upper case.'''
+    strengths: dict[str, float] = {}
+    material = None
+    inPlastic = False
+    for line in iterCanonicalLines(deckPath):
+        if line.startswith("*"):
+            params = line.split(",")
+            inPlastic = params[0] == "*PLASTIC" and material is not None and material not in strengths
+            if params[0] == "*MATERIAL":
+                material = dict(i.partition("=")[::2] for i in params[1:]).get("NAME")
+        elif inPlastic:
+            try:
+                strengths[material] = float(line.split(",")[0])  # type:ignore
+            except ValueError:
+                pass
+            inPlastic = False
+    return strengths
+
+def sectionMaterials(deckPath: str) -> dict[str, str]:
+    '''Element set -> material name of the *... SECTION lines of a deck.'''
+    materials: dict[str, str] = {}
+    for line in iterCanonicalLines(deckPath):
+        params = line.split(",")
+        if line.startswith("*") and params[0].endswith("SECTION"):
+            values = dict(i.partition("=")[::2] for i in params[1:])
+            if "ELSET" in values and "MATERIAL" in values:
+                materials[values["ELSET"]] = values["MATERIAL"]
+    return materials
+
+
+class Envelope():
+    '''Maximum and minimum of a field over time steps with the step each was
+    reached at, built in one streaming pass. The four arrays live in one
+    (4, n, k) float64 buffer, which may be shared memory. A buffer that
+    already holds the envelope of steps is taken as it is.'''
+    def __init__(self, shape: tuple[int, ...], buffer: np.ndarray | None = None, steps: int = 0) -> None:
+        self._buffer = buffer if buffer is not None else np.empty((4, *shape))
+        self._steps = steps
+        if not steps:
+            self._buffer[0] = -np.inf
+            self._buffer[1] = np.inf
+            self._buffer[2:] = -1
+
+    # Getters
+    def getMax(self) -> np.ndarray:
+        return self._buffer[0]
+
+    def getMin(self) -> np.ndarray:
+        return self._buffer[1]
+
+    def getMaxStep(self) -> np.ndarray:
+        return self._buffer[2].astype(np.int64)
+
+    def getMinStep(self) -> np.ndarray:
+        return self._buffer[3].astype(np.int64)
+
+    def getNumberOfSteps(self) -> int:
+        return self._steps
+
+    def getBuffer(self) -> np.ndarray:
+        return self._buffer
+
+    # Actions
+    def update(self, step: int, values: np.ndarray) -> None:
+        '''Folds in the (n, k) values of a step. Steps are expected in time
+        order, on ties the earlier step is kept.'''
+        self._fold(values, values, float(step), float(step))
+        self._steps += 1
+
+    def merge(self, other: 'Envelope') -> None:
+        '''Folds in the envelope of later steps.'''
+        buffer = other.getBuffer()
+        self._fold(buffer[0], buffer[1], buffer[2], buffer[3])
+        self._steps += other.getNumberOfSteps()
+
+    # Internal
+    def _fold(self, maximum: np.ndarray, minimum: np.ndarray,
+              maxStep: np.ndarray | float, minStep: np.ndarray | float) -> None:
+        higher = maximum > self._buffer[0]
+        np.copyto(self._buffer[0], maximum, where=higher)
+        np.copyto(self._buffer[2], maxStep, where=higher)
+        lower = minimum < self._buffer[1]
+        np.copyto(self._buffer[1], minimum, where=lower)
+        np.copyto(self._buffer[3], minStep, where=lower)
+
+
+def resultSteps(fpath: str, name: str) -> list[int]:
+    '''Steps of a field in a result file: time step indices of an .exo,
+    result set indices of an .frd or an exported FrdArchive directory.'''
+    source = _openSource(fpath)
+    if fpath.lower().endswith(".exo"):
+        if name not in source.getFields():
+            raise KeyError(f'{os.path.basename(fpath)} has no field {name}')
+        return list(range(source.getNumberOfSteps()))
+    steps = [block.setIndex for block in source.getBlocks() if block.name == name]
+    if not steps:
+        raise KeyError(f'{os.path.basename(fpath)} has no field {name}')
+    return steps
+
+def readStep(fpath: str, step: int, name: str, derived: str | None = None, chunkRows: int = CHUNK_ROWS,
+             source=None) -> np.ndarray:
+    '''Derived field of one step of a result file as (n, k).'''
+    source = source if source is not None else _openSource(fpath)
+    values = source.getField(step, name) if fpath.lower().endswith(".exo") else source.read(step, name)[1]
+    return evaluate(derived, values, chunkRows)
+
+def envelope(fpath: str, name: str, derived: str | None = None, steps: list[int] | None = None,
+             workers: int | None = None, chunkRows: int = CHUNK_ROWS) -> Envelope:
+    '''Max/min envelope of a (derived) field over steps, all steps by default.
+    The steps are split into contiguous runs, one per pool process (as many
+    as cpus this process may run on by default); every process folds its run
+    into its own slot of a shared memory buffer, so only step lists and the
+    buffer name are pickled. The slots are merged in step order.'''
+    steps = resultSteps(fpath, name) if steps is None else list(steps)
+    if not steps:
+        raise ValueError(f'No steps of {name} to build an envelope of')
+    first = readStep(fpath, steps[0], name, derived, chunkRows)
+    result = Envelope(first.shape)
+    result.update(steps[0], first)
+    rest = steps[1:]
+    workers = min(workers or len(availableCpus()), len(rest))
+    if workers <= 1 or len(rest) < MIN_POOL_STEPS:
+        source = _openSource(fpath)
+        for step in rest:
+            result.update(step, readStep(fpath, step, name, derived, chunkRows, source))
+        return result
+
+    runs = [list(run) for run in np.array_split(np.array(rest), workers)]
+    shape = (workers, 4, *first.shape)
+    memory = SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+    slots = np.ndarray(shape, dtype=np.float64, buffer=memory.buf)
+    try:
+        # Spawned processes do not inherit the Qt and VTK state of the GUI
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            futures = [pool.submit(_envelopeRun, fpath, name, derived, [int(i) for i in run],
+                                   memory.name, shape, slot, chunkRows)
+                       for slot, run in enumerate(runs)]
+            counts = [future.result() for future in futures]
+        for slot, count in enumerate(counts):
+            result.merge(Envelope(first.shape, slots[slot], count))
+    finally:
+        # The buffer cannot be released while an array still points into it
+        del slots
+        memory.close()
+        memory.unlink()
+    return result
+
+def _envelopeRun(fpath: str, name: str, derived: str | None, steps: list[int],
+                 memoryName: str, shape: tuple[int, ...], slot: int, chunkRows: int) -> int:
+    memory = SharedMemory(name=memoryName)
+    partial = Envelope(shape[2:], np.ndarray(shape, dtype=np.float64, buffer=memory.buf)[slot])
+    try:
+        source = _openSource(fpath)
+        for step in steps:
+            partial.update(step, readStep(fpath, step, name, derived, chunkRows, source))
+        return partial.getNumberOfSteps()
+    finally:
+        del partial
+        memory.close()
+
+def _openSource(fpath: str):
+    if fpath.lower().endswith(".exo"):
+        # Imported here, .frd files are post-processed without VTK
+        from yapfc.results import ExodusResults
+        return ExodusResults(fpath)
+    from yapfc.frdReader import FrdReader, FrdArchive, INDEX_NAME
+    if os.path.isfile(os.path.join(fpath, INDEX_NAME)):
+        return FrdArchive(fpath)
+    if not os.path.isfile(fpath):
+        raise FileNotFoundError(f'{fpath} does not exist')
+    return FrdReader(fpath)
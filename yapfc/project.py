@@ -0,0 +1,129 @@
+import os
+import json
+import shutil
+from typing import Iterator
+from yapfc.inpWriter import MeshInclude, includeName, includeLine
+
+PROJECT_VERSION: int = 1
+PROJECT_EXTENSION: str = ".yapfc"
+
+
+def saveProject(model, analyses, fpath: str) -> None:
+    '''Saves the component tree of the model and the analyses (anything with
+    toDict, i.e. the Label/CcxWriter items of the GUI) as JSON.'''
+    modelDict = model.toDict()
+    _relativeMeshPaths(modelDict, os.path.dirname(os.path.abspath(fpath)))
+    project = {"version": PROJECT_VERSION, "model": modelDict, "analyses": analyses.toDict()}
+    tmp = f'{fpath}.tmp'
+    with open(tmp, "w") as f:
+        json.dump(project, f, indent=1)
+    os.replace(tmp, fpath)
+
+def readProject(fpath: str) -> dict:
+    with open(fpath, "r") as f:
+        project = json.load(f)
+    if project.get("version", 0) > PROJECT_VERSION:
+        raise ValueError(f'{fpath} was saved by a newer yapfc (version {project["version"]})')
+    return project
+
+def loadProject(fpath: str, cache=None) -> tuple['ProjectNode', 'ProjectNode']:
+    '''Model and analyses trees of a project without Qt, the model is usable
+    with deck.iterComponents and deck.writeDeck. Relative mesh paths are
+    resolved against the project, meshes are read through cache (a MeshCache)
+    when given.'''
+    project = readProject(fpath)
+    model = ProjectNode.fromDict(project["model"], os.path.dirname(os.path.abspath(fpath)), cache)
+    analyses = ProjectNode.fromDict(project.get("analyses", {"kind": "Label", "text": "Analyses"}))
+    return model, analyses
+
+def iterAnalyses(node: 'ProjectNode') -> Iterator['ProjectNode']:
+    if node.getKind() == "AnalysisSubWriter":
+        yield node
+    for child in node.getChildren():
+        yield from iterAnalyses(child)
+
+
+def _relativeMeshPaths(node: dict, baseDir: str) -> None:
+    '''Mesh paths are stored relative to the project so that a project
+    directory can be moved to a compute node as a whole.'''
+    if node.get("mesh"):
+        try:
+            node["mesh"] = os.path.relpath(node["mesh"], baseDir).replace(os.sep, "/")
+        except ValueError:
+            pass  # another drive on Windows, keep the absolute path
+    for child in node.get("children", []):
+        _relativeMeshPaths(child, baseDir)
+
+
+class ProjectNode():
+    '''Headless stand-in for the Label/CcxWriter items, it provides the part
+    of the QStandardItem interface the deck assembler walks.'''
+    def __init__(self, kind: str, text: str, storedText: str = "",
+                 children: list['ProjectNode'] | None = None) -> None:
+        self._kind = kind
+        self._text = text
+        self._storedText = storedText
+        self._children = children or []
+
+    @classmethod
+    def fromDict(cls, node: dict, baseDir: str = ".", cache=None) -> 'ProjectNode':
+        children = [cls.fromDict(child, baseDir, cache) for child in node.get("children", [])]
+        if node.get("mesh"):
+            return MeshNode(node["text"], os.path.join(baseDir, node["mesh"]), node.get("stored_text", ""),
+                            children, cache)
+        return cls(node["kind"], node["text"], node.get("stored_text", ""), children)
+
+    # Getters
+    def getKind(self) -> str:
+        return self._kind
+
+    def getChildren(self) -> list['ProjectNode']:
+        return self._children
+
+    def getStoredText(self) -> str:
+        return self._storedText
+
+    def text(self) -> str:
+        return self._text
+
+    def hasChildren(self) -> bool:
+        return bool(self._children)
+
+    def rowCount(self) -> int:
+        return len(self._children)
+
+    def child(self, row: int) -> 'ProjectNode':
+        return self._children[row]
+
+
+class MeshNode(ProjectNode):
+    '''Mesh writer whose mesh is read (through the mesh cache) on first use.'''
+    def __init__(self, text: str, meshPath: str, storedText: str = "",
+                 children: list[ProjectNode] | None = None, cache=None) -> None:
+        super().__init__("MeshSubWriter", text, storedText, children)
+        self._meshPath = meshPath
+        self._cache = cache
+        self._include: MeshInclude | None = None
+
+    # Getters
+    def getMeshPath(self) -> str:
+        return self._meshPath
+
+    def getStoredText(self) -> str:
+        return f'*INCLUDE, INPUT={includeName(self._text)}'
+
+    def iterStoredText(self, deckDir: str = ".", includeDir: str | None = None) -> Iterator[str]:
+        if self._include is None:
+            # meshCache pulls in the readers, only pay for them when a mesh is written
+            from yapfc.meshCache import loadMeshData
+            from yapfc.geometry import GmshMesher, isGeometryFile
+            fpath = self._meshPath
+            if isGeometryFile(fpath):
+                fpath = GmshMesher(cache=self._cache).mesh(fpath)
+            data = loadMeshData(fpath, self._cache)
+            if self._cache is None and fpath != self._meshPath:
+                # Meshed into a temporary directory, nothing is cached
+                shutil.rmtree(os.path.dirname(fpath), ignore_errors=True)
+            self._include = MeshInclude(data, self._meshPath)
+        fpath = self._include.export(os.path.join(includeDir or deckDir, includeName(self._text)))
+        yield includeLine(fpath, deckDir)
@@ -0,0 +1,126 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import zipfile
+from yapfc.meshCache import evictLeastRecentlyUsed
+
+CACHE_VERSION: int = 1
+DEFAULT_RESULT_CACHE_DIR: str = os.path.join(os.path.expanduser("~"), ".cache", "yapfc", "results")
+DEFAULT_RESULT_CACHE_SIZE_MB: int = 4096
+# Solver outputs restored on a hit, named <job><extension>
+RESULT_EXTENSIONS: tuple[str, ...] = (".exo", ".frd", ".dat", ".sta", ".cvg")
+LOG_NAME: str = "results.log"
+
+_INCLUDE = re.compile(r'^\*\s*INCLUDE\s*,(.*)$', re.I)
+
+
+def iterCanonicalLines(fpath: str):
+    '''Deck lines with *INCLUDE files spliced in, comments and blank lines
+    dropped and whitespace normalised, so that cosmetic edits and the layout
+    of section files do not change the hash.'''
+    with open(fpath, "r", errors="replace") as f:
+        for line in f:
+            line = "".join(line.split())
+            if not line or line.startswith("**"):
+                continue
+            match = _INCLUDE.match(line)
+            if match:
+                params = dict(part.partition("=")[::2] for part in match.group(1).split(","))
+                include = {k.upper(): v for k, v in params.items()}.get("INPUT", "").strip('"')
+                yield from iterCanonicalLines(os.path.join(os.path.dirname(fpath), include))
+                continue
+            yield line.upper() if line.startswith("*") else line
+
+def deckHash(fpath: str, options: dict | None = None) -> str:
+    digest = hashlib.sha1(f'{CACHE_VERSION}|{json.dumps(options or {}, sort_keys=True)}'.encode())
+    for line in iterCanonicalLines(fpath):
+        digest.update(line.encode())
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+class ResultCache():
+    '''Keeps solver outputs of finished runs as uncompressed zip files keyed by
+    the canonical hash of the deck, its includes and the solver options.
+    The directory is trimmed to maxBytes, least recently used first, and every
+    lookup is appended to a hit/miss log.'''
+    def __init__(self, cacheDir: str = DEFAULT_RESULT_CACHE_DIR,
+                 maxBytes: int = DEFAULT_RESULT_CACHE_SIZE_MB * 2**20) -> None:
+        self._cacheDir = cacheDir
+        self._maxBytes = maxBytes
+        self._hits = 0
+        self._misses = 0
+
+    # Getters
+    def getCacheDir(self) -> str:
+        return self._cacheDir
+
+    def getKey(self, deckPath: str, options: dict | None = None) -> str:
+        return deckHash(deckPath, options)
+
+    def getEntryPath(self, key: str) -> str:
+        return os.path.join(self._cacheDir, f'{key}.zip')
+
+    def getStats(self) -> tuple[int, int]:
+        return self._hits, self._misses
+
+    # Actions
+    def restore(self, key: str, jobPath: str) -> bool:
+        '''Extracts the cached outputs next to jobPath (the deck path without
+        extension). Returns False on a miss.'''
+        entry = self.getEntryPath(key)
+        try:
+            with zipfile.ZipFile(entry) as archive:
+                for ext in archive.namelist():
+                    with archive.open(ext) as src, open(f'{jobPath}{ext}', "wb") as dst:
+                        while chunk := src.read(1 << 20):
+                            dst.write(chunk)
+        except (OSError, zipfile.BadZipFile):
+            self._misses += 1
+            self._log("miss", key, jobPath)
+            return False
+        # mtime is the LRU clock
+        os.utime(entry)
+        self._hits += 1
+        self._log("hit", key, jobPath)
+        return True
+
+    def store(self, key: str, jobPath: str, since: float = 0.0) -> None:
+        '''Archives the outputs of jobPath, files older than since (left over
+        from an earlier run) are skipped.'''
+        outputs = [ext for ext in RESULT_EXTENSIONS
+                   if os.path.exists(f'{jobPath}{ext}') and os.path.getmtime(f'{jobPath}{ext}') >= since]
+        if not outputs:
+            return
+        os.makedirs(self._cacheDir, exist_ok=True)
+        entry = self.getEntryPath(key)
+        tmp = f'{entry}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with zipfile.ZipFile(tmp, "w", zipfile.ZIP_STORED, allowZip64=True) as archive:
+                for ext in outputs:
+                    archive.write(f'{jobPath}{ext}', ext)
+            os.replace(tmp, entry)
+        except OSError as e:
+            print(f'Unable to write result cache entry {entry}: {e}')
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self._log("store", key, jobPath)
+        self.evict()
+
+    def evict(self) -> None:
+        evictLeastRecentlyUsed([(self._cacheDir, ".zip")], self._maxBytes)
+
+    # Internal
+    def _log(self, event: str, key: str, jobPath: str) -> None:
+        line = f'{time.strftime("%Y-%m-%d %H:%M:%S")} {event} {key} {jobPath}'
+        print(f'Result cache {line}')
+        try:
+            os.makedirs(self._cacheDir, exist_ok=True)
+            with open(os.path.join(self._cacheDir, LOG_NAME), "a") as f:
+                f.write(line + "\n")
+        except OSError:
+            pass
@@ -0,0 +1,266 @@
+import os
+import re
+import vtk
+import numpy as np
+from collections import OrderedDict
+from vtkmodules.util.numpy_support import numpy_to_vtk, numpy_to_vtkIdTypeArray, vtk_to_numpy
+from vtkmodules.vtkCommonExecutionModel import vtkStreamingDemandDrivenPipeline
+from yapfc.postProcess import evaluate
+from yapfc.mesh import exteriorSurface
+
+# Field arrays of recently viewed steps kept in memory, least recently used dropped first
+DEFAULT_STEP_CACHE_MB: int = 512
+POINT_FIELD: str = "point"
+CELL_FIELD: str = "cell"
+# Component index that stands for the magnitude of a vector or tensor field
+MAGNITUDE: int = -1
+# Tensor components the reader leaves as separate scalars (S_XX, SYY, ...), in ccx order
+TENSOR_SUFFIXES: tuple[tuple[str, ...], ...] = (("XX",), ("YY",), ("ZZ",), ("XY", "YX"), ("YZ", "ZY"), ("ZX", "XZ"))
+_TENSOR_COMPONENT = re.compile(r'^(.+?)_?(XX|YY|ZZ|XY|YX|YZ|ZY|ZX|XZ)$', re.I)
+
+
+class ExodusResults():
+    '''Lazy view of an Exodus II result file. Opening reads the metadata only
+    (time steps, field names); the geometry is read on first use and every
+    field is read for one time step at a time. Read arrays are kept in a
+    bounded LRU cache, so going back to a recently viewed step is a lookup.'''
+    def __init__(self, fpath: str, cacheBytes: int = DEFAULT_STEP_CACHE_MB * 2**20) -> None:
+        self._fpath = fpath
+        self._cacheBytes = cacheBytes
+        self._cache: OrderedDict[tuple[int, str], np.ndarray] = OrderedDict()
+        self._cachedBytes = 0
+        self._grid: vtk.vtkUnstructuredGrid | None = None
+        if not os.path.isfile(fpath):
+            raise FileNotFoundError(f'{fpath} does not exist')
+
+        self._reader = vtk.vtkExodusIIReader()
+        self._reader.SetFileName(fpath)
+        # Every block carries all nodes, so a nodal field is complete in the first block
+        self._reader.SetSqueezePoints(False)
+        self._reader.UpdateInformation()
+        info = self._reader.GetOutputInformation(0)
+        timeSteps = vtkStreamingDemandDrivenPipeline.TIME_STEPS()
+        times = info.Get(timeSteps) if info.Has(timeSteps) else None
+        self._times: list[float] = list(times or [])
+        self._fields: dict[str, str] = {}
+        for kind, objectType in ((POINT_FIELD, vtk.vtkExodusIIReader.NODAL), (CELL_FIELD, vtk.vtkExodusIIReader.ELEM_BLOCK)):
+            for i in range(self._reader.GetNumberOfObjectArrays(objectType)):
+                self._fields[self._reader.GetObjectArrayName(objectType, i)] = kind
+        self._tensors = _groupTensors(self._fields)
+        for name, components in self._tensors.items():
+            self._fields[name] = self._fields[components[0]]
+        self._setArrays(None)
+
+    # Getters
+    def getFilePath(self) -> str:
+        return self._fpath
+
+    def getTimes(self) -> list[float]:
+        return self._times
+
+    def getNumberOfSteps(self) -> int:
+        return max(len(self._times), 1)
+
+    def getFields(self) -> dict[str, str]:
+        '''Field name -> POINT_FIELD or CELL_FIELD. Six scalar tensor
+        components are also listed as one (n, 6) field under their base name.'''
+        return self._fields
+
+    def getNumberOfNodes(self) -> int:
+        return self._reader.GetNumberOfNodesInFile()
+
+    def getNumberOfElements(self) -> int:
+        return self._reader.GetNumberOfElementsInFile()
+
+    def getGrid(self) -> vtk.vtkUnstructuredGrid:
+        '''All element blocks as one grid, in block order, without fields.'''
+        if self._grid is None:
+            self._grid = self._readGrid()
+        return self._grid
+
+    def isCached(self, step: int, name: str) -> bool:
+        return (step, name) in self._cache
+
+    def getCachedBytes(self) -> int:
+        return self._cachedBytes
+
+    def getField(self, step: int, name: str) -> np.ndarray:
+        '''(n, components) values of a field at a time step, per node for
+        point fields and per element (in grid order) for cell fields.'''
+        key = (step, name)
+        values = self._cache.get(key)
+        if values is not None:
+            self._cache.move_to_end(key)
+            return values
+        values = self._readField(step, name)
+        self._cache[key] = values
+        self._cachedBytes += values.nbytes
+        while self._cachedBytes > self._cacheBytes and len(self._cache) > 1:
+            _, dropped = self._cache.popitem(last=False)
+            self._cachedBytes -= dropped.nbytes
+        return values
+
+    # Actions
+    def clearCache(self) -> None:
+        self._cache.clear()
+        self._cachedBytes = 0
+
+    # Internal
+    def _setArrays(self, name: str | None) -> None:
+        '''Enables only the named field, the reader skips every other array.'''
+        for objectType in (vtk.vtkExodusIIReader.NODAL, vtk.vtkExodusIIReader.ELEM_BLOCK):
+            self._reader.SetAllArrayStatus(objectType, 0)
+        if name is not None:
+            objectType = vtk.vtkExodusIIReader.NODAL if self._fields[name] == POINT_FIELD else vtk.vtkExodusIIReader.ELEM_BLOCK
+            for array in self._tensors.get(name, [name]):
+                self._reader.SetObjectArrayStatus(objectType, array, 1)
+
+    def _blocks(self) -> list[vtk.vtkUnstructuredGrid]:
+        output = self._reader.GetOutput()
+        elementBlocks = output.GetBlock(0) if output is not None and output.GetNumberOfBlocks() else None
+        if elementBlocks is None:
+            raise ValueError(f'{os.path.basename(self._fpath)} is not a readable Exodus file')
+        blocks = [elementBlocks.GetBlock(i) for i in range(elementBlocks.GetNumberOfBlocks())]
+        return [i for i in blocks if i is not None and i.GetNumberOfCells()]
+
+    def _readGrid(self) -> vtk.vtkUnstructuredGrid:
+        self._setArrays(None)
+        self._reader.SetTimeStep(0)
+        self._reader.Update()
+        blocks = self._blocks()
+        grid = vtk.vtkUnstructuredGrid()
+        if not blocks:
+            return grid
+        points = vtk.vtkPoints()
+        points.DeepCopy(blocks[0].GetPoints())
+        offsets: list[np.ndarray] = []
+        connectivity: list[np.ndarray] = []
+        start = 0
+        for block in blocks:
+            cells = block.GetCells()
+            blockOffsets = vtk_to_numpy(cells.GetOffsetsArray())
+            offsets.append(blockOffsets[:-1] + start)
+            connectivity.append(vtk_to_numpy(cells.GetConnectivityArray()))
+            start += int(blockOffsets[-1])
+        offsets.append(np.array([start]))
+        self._offsets = np.concatenate(offsets).astype(np.int64)
+        self._connectivity = np.concatenate(connectivity).astype(np.int64)
+        self._types = np.concatenate([vtk_to_numpy(block.GetCellTypesArray()) for block in blocks]).astype(np.uint8)
+        vtkCells = vtk.vtkCellArray()
+        vtkCells.SetData(numpy_to_vtkIdTypeArray(self._offsets, deep=False),
+                         numpy_to_vtkIdTypeArray(self._connectivity, deep=False))
+        grid.SetPoints(points)
+        grid.SetCells(numpy_to_vtk(self._types, deep=False, array_type=vtk.VTK_UNSIGNED_CHAR), vtkCells)
+        return grid
+
+    def _readField(self, step: int, name: str) -> np.ndarray:
+        if name not in self._fields:
+            raise KeyError(f'{os.path.basename(self._fpath)} has no field {name}')
+        self._setArrays(name)
+        self._reader.SetTimeStep(min(max(step, 0), self.getNumberOfSteps() - 1))
+        self._reader.Update()
+        blocks = self._blocks()
+        columns: list[np.ndarray] = []
+        for array in self._tensors.get(name, [name]):
+            if self._fields[name] == POINT_FIELD:
+                arrays = [blocks[0].GetPointData().GetArray(array)] if blocks else []
+            else:
+                arrays = [block.GetCellData().GetArray(array) for block in blocks]
+            if not arrays or any(i is None for i in arrays):
+                raise KeyError(f'{name} is not written for step {step + 1}')
+            columns.append(np.concatenate([vtk_to_numpy(i).reshape(i.GetNumberOfTuples(), -1) for i in arrays]))
+        # The reader reuses its arrays between updates, keep our own copy
+        return np.array(np.hstack(columns), dtype=np.float64)
+
+
+def _groupTensors(fields: dict[str, str]) -> dict[str, list[str]]:
+    '''Base name -> the six component fields in TENSOR_SUFFIXES order, for
+    every base name that has all six on the same kind of entity.'''
+    found: dict[str, dict[str, str]] = {}
+    for name in fields:
+        match = _TENSOR_COMPONENT.match(name)
+        if match:
+            found.setdefault(match.group(1), {})[match.group(2).upper()] = name
+    tensors: dict[str, list[str]] = {}
+    for base, components in found.items():
+        names = [next((components[i] for i in suffixes if i in components), None) for suffixes in TENSOR_SUFFIXES]
+        if None not in names and base not in fields and len({fields[i] for i in names}) == 1:  # type:ignore
+            tensors[base] = names  # type:ignore
+    return tensors
+
+def fieldComponent(values: np.ndarray, component: int | str = MAGNITUDE) -> np.ndarray:
+    '''One column of a field: a component index, MAGNITUDE or the name of a
+    postProcess.DERIVED field.'''
+    if isinstance(component, str):
+        return evaluate(component, values)[:, 0]
+    if component == MAGNITUDE or values.shape[1] == 1:
+        return values[:, 0] if values.shape[1] == 1 else np.linalg.norm(values, axis=1)
+    return values[:, component]
+
+
+class ResultView():
+    '''Renders one field of an ExodusResults on the exterior surface of its
+    grid. Changing step or field only swaps the scalar array of the surface.'''
+    def __init__(self, results: ExodusResults) -> None:
+        self._results = results
+        self._surface, self._surfaceCellIds, self._surfacePointIds = exteriorSurface(results.getGrid())
+
+        self._lookupTable = vtk.vtkLookupTable()
+        self._lookupTable.SetHueRange(0.667, 0.0)
+        self._lookupTable.Build()
+        self._mapper = vtk.vtkPolyDataMapper()
+        self._mapper.SetInputData(self._surface)
+        self._mapper.SetLookupTable(self._lookupTable)
+        self._mapper.ScalarVisibilityOff()
+        self._actor = vtk.vtkActor()
+        self._actor.SetMapper(self._mapper)
+        self._scalarBar = vtk.vtkScalarBarActor()
+        self._scalarBar.SetLookupTable(self._lookupTable)
+        self._scalarBar.SetNumberOfLabels(5)
+        self._scalarBar.SetMaximumWidthInPixels(90)
+        self._scalarBar.VisibilityOff()
+        self._state: tuple[int, str, int | str] | None = None
+
+    # Getters
+    def getResults(self) -> ExodusResults:
+        return self._results
+
+    def getActor(self) -> vtk.vtkActor:
+        return self._actor
+
+    def getScalarBar(self) -> vtk.vtkScalarBarActor:
+        return self._scalarBar
+
+    def getState(self) -> tuple[int, str, int | str] | None:
+        '''(step, field, component) shown, None before the first show.'''
+        return self._state
+
+    # Actions
+    def show(self, step: int, name: str, component: int | str = MAGNITUDE) -> tuple[float, float]:
+        '''Colors the surface by a field component at a step, returns its range.'''
+        values = fieldComponent(self._results.getField(step, name), component)
+        if self._results.getFields()[name] == POINT_FIELD:
+            scalars = values[self._surfacePointIds]
+            data = self._surface.GetPointData()
+            self._surface.GetCellData().SetActiveScalars(None)
+            self._mapper.SetScalarModeToUsePointData()
+        else:
+            scalars = values[self._surfaceCellIds]
+            data = self._surface.GetCellData()
+            self._surface.GetPointData().SetActiveScalars(None)
+            self._mapper.SetScalarModeToUseCellData()
+        self._scalars = np.ascontiguousarray(scalars)
+        array = numpy_to_vtk(self._scalars, deep=False)
+        array.SetName(name)
+        data.SetScalars(array)
+        valueRange = (float(values.min()), float(values.max())) if len(values) else (0.0, 1.0)
+        self._mapper.SetScalarRange(valueRange)
+        self._mapper.ScalarVisibilityOn()
+        if isinstance(component, str):
+            self._scalarBar.SetTitle(f'{name} {component}')
+        else:
+            self._scalarBar.SetTitle(name if component == MAGNITUDE or len(self._results.getField(step, name)[0]) == 1
+                                     else f'{name} [{component}]')
+        self._scalarBar.VisibilityOn()
+        self._state = (step, name, component)
+        return valueRange
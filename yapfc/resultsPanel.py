@@ -0,0 +1,102 @@
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QLabel, QSlider, QPushButton
+from yapfc.results import ResultView, MAGNITUDE
+from yapfc.postProcess import TENSOR_DERIVED
+
+
+class ResultsPanel(QWidget):
+    '''Field, component and time step controls of the in-process results
+    mode. Every change re-colors the ResultView and emits changed, the
+    viewer only has to render.'''
+    changed = Signal()
+    closed = Signal()
+
+    def __init__(self, parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+        self._view: ResultView | None = None
+
+        self._fields = QComboBox()
+        self._components = QComboBox()
+        self._steps = QSlider(Qt.Orientation.Horizontal)
+        self._steps.setMinimum(0)
+        self._steps.setPageStep(1)
+        self._time = QLabel()
+        self._range = QLabel()
+        closeButton = QPushButton("Close Results")
+        closeButton.clicked.connect(self.closed.emit)
+
+        self._fields.currentTextChanged.connect(lambda _: self._fieldChanged())
+        self._components.currentIndexChanged.connect(lambda _: self._update())
+        self._steps.valueChanged.connect(lambda _: self._update())
+
+        row = QHBoxLayout()
+        row.addWidget(self._fields)
+        row.addWidget(self._components)
+        layout = QVBoxLayout(self)
+        layout.addLayout(row)
+        layout.addWidget(self._steps)
+        layout.addWidget(self._time)
+        layout.addWidget(self._range)
+        layout.addWidget(closeButton)
+        layout.addStretch()
+
+    # Getters
+    def getView(self) -> ResultView | None:
+        return self._view
+
+    # Actions
+    def setView(self, view: ResultView) -> None:
+        results = view.getResults()
+        self._view = None
+        self._steps.setMaximum(results.getNumberOfSteps() - 1)
+        self._steps.setValue(self._steps.maximum())
+        self._fields.clear()
+        self._fields.addItems(list(results.getFields()))
+        self._view = view
+        self._fieldChanged()
+
+    # Internal
+    def _fieldChanged(self) -> None:
+        if self._view is None or not self._fields.currentText():
+            return
+        # The number of components is known once a step of the field is read
+        try:
+            values = self._view.getResults().getField(self._steps.value(), self._fields.currentText())
+        except KeyError as e:
+            self._showMissing(e)
+            return
+        view, self._view = self._view, None
+        self._components.clear()
+        if values.shape[1] > 1:
+            self._components.addItem("Magnitude", MAGNITUDE)
+        for i in range(values.shape[1]):
+            self._components.addItem(f'Component {i + 1}', i)
+        if values.shape[1] == 6:
+            for derived in TENSOR_DERIVED:
+                # Principal holds all three values, the view colors by one
+                if derived != "Principal":
+                    self._components.addItem(derived, derived)
+        self._view = view
+        self._update()
+
+    def _update(self) -> None:
+        if self._view is None or not self._fields.currentText():
+            return
+        results = self._view.getResults()
+        step = self._steps.value()
+        component = self._components.currentData()
+        try:
+            low, high = self._view.show(step, self._fields.currentText(), MAGNITUDE if component is None else component)
+        except KeyError as e:
+            self._showMissing(e)
+            return
+        times = results.getTimes()
+        self._time.setText(f'Step {step + 1} of {results.getNumberOfSteps()}'
+                           + (f', time {times[step]:g}' if step < len(times) else ""))
+        self._range.setText(f'min {low:.6g}, max {high:.6g}')
+        self.changed.emit()
+
+    def _showMissing(self, error: KeyError) -> None:
+        '''A field not written for the step, the surface keeps its last coloring.'''
+        self._time.setText(f'Step {self._steps.value() + 1} of {self._steps.maximum() + 1}')
+        self._range.setText(str(error.args[0]) if error.args else "Field not available")
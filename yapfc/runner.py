@@ -1,27 +1,27 @@
+import os
 import subprocess
 
+CCX_ARGS: list[str] = ["-o", "exo"]
+
 def save_inp_file(inp_text, inp_name) -> None:
     with open(f"{inp_name}.inp", 'w') as file:
         file.writelines(inp_text)
 
-def run_script(ccx_path: str, inp_name: str) -> None:
-    try:
-        process = subprocess.Popen(
-            [f"{ccx_path}", inp_name, "-o", "exo"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            shell=False
-        )
-        print("Script output:", process.stdout)
-    except Exception as e:
-        print("Error starting CalculiX script:", str(e))
+def solver_options(ccx_path: str) -> dict:
+    '''Everything besides the deck that changes the results, part of the result cache key.'''
+    options: dict = {"ccx": os.path.abspath(ccx_path) if os.path.exists(ccx_path) else ccx_path,
+                     "args": CCX_ARGS}
+    if os.path.exists(ccx_path):
+        stat = os.stat(ccx_path)
+        options["ccx_stat"] = [stat.st_size, stat.st_mtime_ns]
+    return options
 
 def open_paraview(paraview_path, result_file_path: str) -> None:
     try:
         process = subprocess.Popen(
             [f"{paraview_path}", result_file_path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
             shell=False
         )
         print("ParaView launched successfully.")
@@ -0,0 +1,247 @@
+import numpy as np
+from typing import Callable, Hashable
+
+# Called as listener(kind, added, removed) once per operation that changed something
+SelectionListener = Callable[[Hashable, np.ndarray, np.ndarray], None]
+
+_EMPTY: np.ndarray = np.empty(0, np.int64)
+
+
+class SelectionSet():
+    '''Selected ids of one entity type (VTK point or cell ids) as a boolean
+    mask: membership is a lookup and every operation is one numpy pass over
+    the given ids. The mask grows when larger ids are added; invert works on
+    the size set by resize. Mutating operations return the (added, removed)
+    ids, so that a display only updates what actually changed.'''
+    def __init__(self, size: int = 0, ids: np.ndarray | list[int] | None = None) -> None:
+        self._mask = np.zeros(size, dtype=bool)
+        self._count = 0
+        if ids is not None:
+            self.add(ids)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, id: int) -> bool:
+        return 0 <= id < len(self._mask) and bool(self._mask[id])
+
+    def __or__(self, other: 'SelectionSet') -> 'SelectionSet':
+        return self.union(other)
+
+    def __and__(self, other: 'SelectionSet') -> 'SelectionSet':
+        return self.intersection(other)
+
+    def __sub__(self, other: 'SelectionSet') -> 'SelectionSet':
+        return self.difference(other)
+
+    # Getters
+    def getSize(self) -> int:
+        return len(self._mask)
+
+    def getMask(self) -> np.ndarray:
+        '''Read only view of the mask, getSize() entries long.'''
+        mask = self._mask.view()
+        mask.flags.writeable = False
+        return mask
+
+    def getIds(self) -> np.ndarray:
+        '''Selected ids in ascending order.'''
+        return np.flatnonzero(self._mask)
+
+    def copy(self) -> 'SelectionSet':
+        selection = SelectionSet()
+        selection._mask = self._mask.copy()
+        selection._count = self._count
+        return selection
+
+    # Set operations, the size of the result is the larger one
+    def union(self, other: 'SelectionSet') -> 'SelectionSet':
+        first, second = _aligned(self, other)
+        return _fromMask(first | second)
+
+    def intersection(self, other: 'SelectionSet') -> 'SelectionSet':
+        first, second = _aligned(self, other)
+        return _fromMask(first & second)
+
+    def difference(self, other: 'SelectionSet') -> 'SelectionSet':
+        first, second = _aligned(self, other)
+        return _fromMask(first & ~second)
+
+    # Actions
+    def resize(self, size: int) -> tuple[np.ndarray, np.ndarray]:
+        '''Sets the number of entities, ids beyond a smaller size are removed.'''
+        removed = np.flatnonzero(self._mask[size:]) + size if size < len(self._mask) else _EMPTY
+        if size < len(self._mask):
+            self._mask = self._mask[:size].copy()
+            self._count -= len(removed)
+        elif size > len(self._mask):
+            self._mask = _padded(self._mask, size)
+        return _EMPTY, removed
+
+    def add(self, ids: np.ndarray | list[int]) -> tuple[np.ndarray, np.ndarray]:
+        ids = self._prepare(ids, grow=True)
+        added = ids[~self._mask[ids]]
+        self._mask[added] = True
+        self._count += len(added)
+        return added, _EMPTY
+
+    def remove(self, ids: np.ndarray | list[int]) -> tuple[np.ndarray, np.ndarray]:
+        ids = self._prepare(ids)
+        removed = ids[self._mask[ids]]
+        self._mask[removed] = False
+        self._count -= len(removed)
+        return _EMPTY, removed
+
+    def toggle(self, ids: np.ndarray | list[int]) -> tuple[np.ndarray, np.ndarray]:
+        ids = self._prepare(ids, grow=True)
+        selected = self._mask[ids]
+        added, removed = ids[~selected], ids[selected]
+        self._mask[ids] = ~selected
+        self._count += len(added) - len(removed)
+        return added, removed
+
+    def invert(self) -> tuple[np.ndarray, np.ndarray]:
+        removed = np.flatnonzero(self._mask)
+        np.logical_not(self._mask, out=self._mask)
+        added = np.flatnonzero(self._mask)
+        self._count = len(added)
+        return added, removed
+
+    def clear(self) -> tuple[np.ndarray, np.ndarray]:
+        removed = np.flatnonzero(self._mask) if self._count else _EMPTY
+        self._mask[removed] = False
+        self._count = 0
+        return _EMPTY, removed
+
+    def set(self, ids: 'np.ndarray | list[int] | SelectionSet') -> tuple[np.ndarray, np.ndarray]:
+        '''Replaces the selection by ids (or by another selection).'''
+        if isinstance(ids, SelectionSet):
+            mask = _padded(ids.getMask(), max(len(self._mask), ids.getSize()))
+        else:
+            ids = self._prepare(ids, grow=True)
+            mask = np.zeros(len(self._mask), dtype=bool)
+            mask[ids] = True
+        old = _padded(self._mask, len(mask))
+        added = np.flatnonzero(mask & ~old)
+        removed = np.flatnonzero(old & ~mask)
+        self._mask = mask
+        self._count = int(np.count_nonzero(mask))
+        return added, removed
+
+    # Internal
+    def _prepare(self, ids: np.ndarray | list[int], grow: bool = False) -> np.ndarray:
+        '''Sorted unique non negative ids, the mask grown to hold them or ids
+        it cannot hold dropped.'''
+        ids = np.asarray(ids, dtype=np.int64).ravel()
+        ids = ids[ids >= 0]
+        if len(ids) and ids.max() >= len(self._mask):
+            if grow:
+                self.resize(int(ids.max()) + 1)
+            else:
+                ids = ids[ids < len(self._mask)]
+        if len(ids) > len(self._mask) // 16:
+            # Scattering into a mask is cheaper than sorting many ids
+            scattered = np.zeros(len(self._mask), dtype=bool)
+            scattered[ids] = True
+            return np.flatnonzero(scattered)
+        return np.unique(ids)
+
+
+class SelectionEngine():
+    '''Current selection per entity kind (any hashable, the viewer uses its
+    SelectionFilter) and named selections. Every operation notifies the
+    listeners once with all ids it added and removed, so that the display is
+    updated in one batch however many entities changed.'''
+    def __init__(self) -> None:
+        self._current: dict[Hashable, SelectionSet] = {}
+        self._named: dict[str, tuple[Hashable, SelectionSet]] = {}
+        self._listeners: list[SelectionListener] = []
+
+    # Getters
+    def getSelection(self, kind: Hashable) -> SelectionSet:
+        if kind not in self._current:
+            self._current[kind] = SelectionSet()
+        return self._current[kind]
+
+    def getNames(self, kind: Hashable | None = None) -> list[str]:
+        return [name for name, (named, _) in self._named.items() if kind is None or named == kind]
+
+    def getNamed(self, name: str) -> tuple[Hashable, SelectionSet]:
+        if name not in self._named:
+            raise KeyError(f'No selection named {name}')
+        return self._named[name]
+
+    # Setters
+    def addListener(self, listener: SelectionListener) -> None:
+        self._listeners.append(listener)
+
+    def setSize(self, kind: Hashable, size: int) -> None:
+        '''Number of entities of a kind, needed by invert.'''
+        self._notify(kind, *self.getSelection(kind).resize(size))
+
+    # Actions
+    def add(self, kind: Hashable, ids: np.ndarray | list[int]) -> None:
+        self._notify(kind, *self.getSelection(kind).add(ids))
+
+    def remove(self, kind: Hashable, ids: np.ndarray | list[int]) -> None:
+        self._notify(kind, *self.getSelection(kind).remove(ids))
+
+    def toggle(self, kind: Hashable, ids: np.ndarray | list[int]) -> None:
+        self._notify(kind, *self.getSelection(kind).toggle(ids))
+
+    def invert(self, kind: Hashable) -> None:
+        self._notify(kind, *self.getSelection(kind).invert())
+
+    def set(self, kind: Hashable, ids: np.ndarray | list[int] | SelectionSet) -> None:
+        self._notify(kind, *self.getSelection(kind).set(ids))
+
+    def clear(self, kind: Hashable | None = None) -> None:
+        '''Clears the current selection of a kind, or of every kind.'''
+        for clearedKind in ([kind] if kind is not None else list(self._current)):
+            self._notify(clearedKind, *self.getSelection(clearedKind).clear())
+
+    def store(self, name: str, kind: Hashable) -> None:
+        '''Keeps a copy of the current selection of a kind under name.'''
+        self._named[name] = (kind, self.getSelection(kind).copy())
+
+    def restore(self, name: str) -> None:
+        '''Makes a named selection the current one of its kind.'''
+        kind, selection = self.getNamed(name)
+        self.set(kind, selection)
+
+    def delete(self, name: str) -> None:
+        self._named.pop(name, None)
+
+    def combine(self, name: str, operation: str, first: str, second: str) -> SelectionSet:
+        '''Stores "union", "intersection" or "difference" of two named
+        selections of the same kind under name.'''
+        kind, firstSet = self.getNamed(first)
+        secondKind, secondSet = self.getNamed(second)
+        if kind != secondKind:
+            raise ValueError(f'{first} and {second} select different entities')
+        if operation not in ("union", "intersection", "difference"):
+            raise ValueError(f'Unknown selection operation {operation}')
+        result = getattr(firstSet, operation)(secondSet)
+        self._named[name] = (kind, result)
+        return result
+
+    # Internal
+    def _notify(self, kind: Hashable, added: np.ndarray, removed: np.ndarray) -> None:
+        if len(added) or len(removed):
+            for listener in self._listeners:
+                listener(kind, added, removed)
+
+
+def _fromMask(mask: np.ndarray) -> SelectionSet:
+    selection = SelectionSet()
+    selection._mask = mask
+    selection._count = int(np.count_nonzero(mask))
+    return selection
+
+def _padded(mask: np.ndarray, size: int) -> np.ndarray:
+    return mask.copy() if len(mask) == size else np.concatenate([mask, np.zeros(size - len(mask), dtype=bool)])
+
+def _aligned(first: SelectionSet, second: SelectionSet) -> tuple[np.ndarray, np.ndarray]:
+    '''Both masks padded to the larger size.'''
+    size = max(first.getSize(), second.getSize())
+    return _padded(first.getMask(), size), _padded(second.getMask(), size)
@@ -0,0 +1,146 @@
+import os
+import re
+import csv
+import itertools
+import numpy as np
+from typing import Iterable
+from yapfc.deck import writeDeck, templateNames
+from yapfc.autoTune import SOLVER_VARIABLE
+
+SUMMARY_NAME: str = "summary.csv"
+# Variants solved at the same time when max_jobs is not set, the core budget
+# splits the cores between them
+SWEEP_JOBS: int = 4
+_DAT_HEADER = re.compile(r'^\s*(.+?)\s*\((.*?)\)\s*for set\s+(\S+)\s+and time\s+(\S+)', re.I)
+# Columns of *EL PRINT blocks that are labels rather than values
+_DAT_LABELS: tuple[str, ...] = ("elem", "integ.pnt.")
+
+
+def parseRanges(text: str) -> dict[str, list[float]]:
+    '''One parameter per line (or separated by ";"), either an inclusive
+    linspace "E = 1000:3000:5" or a list of values "load = 10, 20, 30".'''
+    ranges: dict[str, list[float]] = {}
+    for item in re.split(r'[;\n]', text):
+        if not item.strip():
+            continue
+        name, sep, values = item.partition("=")
+        if not sep or not name.strip():
+            raise ValueError(f'Expected name = values, got "{item.strip()}"')
+        if ":" in values:
+            parts = values.split(":")
+            if len(parts) != 3:
+                raise ValueError(f'Expected start:stop:count, got "{values.strip()}"')
+            start, stop, count = float(parts[0]), float(parts[1]), int(parts[2])
+            ranges[name.strip()] = np.linspace(start, stop, count).tolist()
+        else:
+            ranges[name.strip()] = [float(i) for i in re.split(r'[,\s]+', values.strip()) if i]
+    return ranges
+
+def expandVariants(ranges: dict[str, list[float]]) -> list[dict[str, float]]:
+    '''Full factorial combination of all ranges.'''
+    names = list(ranges)
+    return [dict(zip(names, values)) for values in itertools.product(*(ranges[i] for i in names))]
+
+def collectTemplateNames(items: Iterable) -> dict[str, str | None]:
+    '''Placeholders open to sweeps, the solver is filled in by the auto-tuner.'''
+    names: dict[str, str | None] = {}
+    for item in items:
+        if hasattr(item, "getStoredText") and not hasattr(item, "iterStoredText"):
+            names.update(templateNames(item.getStoredText()))
+    names.pop(SOLVER_VARIABLE, None)
+    return names
+
+def readDatMaxima(fpath: str) -> dict[str, float]:
+    '''Largest absolute value of every *NODE PRINT / *EL PRINT component in
+    a .dat file, taken at the last time written for each block.'''
+    blocks: dict[str, tuple[float, list[str], list[list[float]]]] = {}
+    current: list[list[float]] | None = None
+    with open(fpath, "r", errors="replace") as f:
+        for line in f:
+            header = _DAT_HEADER.match(line)
+            if header:
+                quantity, components, elset, time = header.groups()
+                names = [i.strip() for i in components.split(",") if i.strip().lower() not in _DAT_LABELS]
+                key = f'{quantity.strip()}[{elset}]'
+                current = []
+                # Later times replace earlier ones
+                blocks[key] = (float(time), names, current)
+                continue
+            if current is None or not line.strip():
+                continue
+            try:
+                values = [float(i) for i in line.split()]
+            except ValueError:
+                current = None
+                continue
+            current.append(values)
+    maxima: dict[str, float] = {}
+    for key, (_, names, rows) in blocks.items():
+        if not rows or not names:
+            continue
+        width = min(len(row) for row in rows)
+        values = np.abs(np.array([row[width - len(names):width] for row in rows]))
+        for column, name in enumerate(names):
+            maxima[f'{key}.{name}'] = float(values[:, column].max())
+    return maxima
+
+
+class Sweep():
+    '''Variants of one analysis, each in its own working directory below
+    root. Mesh includes are shared by all decks, they go to root unless the
+    mesh was exported before.'''
+    def __init__(self, name: str, root: str, variants: list[dict[str, float]]) -> None:
+        self._name = name
+        self._root = root
+        self._variants = variants
+        # variant index -> (state, exit code, wall time)
+        self._results: dict[int, tuple[str, int | None, float]] = {}
+
+    # Getters
+    def getName(self) -> str:
+        return self._name
+
+    def getRoot(self) -> str:
+        return self._root
+
+    def getVariants(self) -> list[dict[str, float]]:
+        return self._variants
+
+    def getJobName(self, index: int) -> str:
+        return f'{self._name}_{index + 1:03d}'
+
+    def getWorkDir(self, index: int) -> str:
+        return os.path.join(self._root, self.getJobName(index))
+
+    def isComplete(self) -> bool:
+        return len(self._results) == len(self._variants)
+
+    # Actions
+    def writeDecks(self, items: list) -> None:
+        os.makedirs(self._root, exist_ok=True)
+        for index, variant in enumerate(self._variants):
+            os.makedirs(self.getWorkDir(index), exist_ok=True)
+            deck = os.path.join(self.getWorkDir(index), f'{self.getJobName(index)}.inp')
+            writeDeck(items, deck, variant, includeDir=self._root)
+
+    def record(self, index: int, state: str, exitCode: int | None, wallTime: float) -> None:
+        self._results[index] = (state, exitCode, wallTime)
+
+    def writeSummary(self) -> str:
+        '''One row per variant with its parameters, run state and the .dat maxima.'''
+        rows: list[dict[str, object]] = []
+        for index, variant in enumerate(self._variants):
+            state, exitCode, wallTime = self._results.get(index, ("not run", None, 0.0))
+            row: dict[str, object] = {"variant": self.getJobName(index), **variant,
+                                      "state": state, "exit_code": exitCode, "wall_time_s": round(wallTime, 3)}
+            dat = os.path.join(self.getWorkDir(index), f'{self.getJobName(index)}.dat')
+            if os.path.exists(dat):
+                row.update(readDatMaxima(dat))
+            rows.append(row)
+        columns = list(dict.fromkeys(key for row in rows for key in row))
+        fpath = os.path.join(self._root, SUMMARY_NAME)
+        with open(fpath, "w", newline="") as f:
+            writer = csv.DictWriter(f, columns)
+            writer.writeheader()
+            writer.writerows(rows)
+        return fpath